@@ -67,6 +67,66 @@ def create_sample_pdf():
         print("インストール: pip install reportlab")
         return create_simple_text_pdf()
 
+def create_example_vendor_pdf(filename="sample_invoice_example.pdf"):
+    """株式会社エグザンプルのテンプレート（local_extraction のルール）どおりの請求書PDFを作成"""
+    try:
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+        
+        pdfmetrics.registerFont(UnicodeCIDFont('HeiseiMin-W3'))
+        
+        c = canvas.Canvas(filename, pagesize=A4)
+        width, height = A4
+        
+        c.setFont("HeiseiMin-W3", 16)
+        c.drawString(200, height - 80, "請求書")
+        
+        c.setFont("HeiseiMin-W3", 12)
+        y_pos = height - 150
+        
+        header_lines = [
+            "株式会社エグザンプル",
+            "〒100-0001 東京都千代田区千代田2-2-2",
+            "請求No. EX-2024-0042",
+            "請求書発行日: 令和6年3月1日",
+            "お振込期限: 令和6年3月31日",
+            "お客様コード: C-1001",
+            "ご請求金額 ¥88,000"
+        ]
+        
+        for line in header_lines:
+            c.drawString(50, y_pos, line)
+            y_pos -= 20
+        
+        # 明細表（列の左端はテンプレートの列境界 0 / 240 / 320 / 420 に合わせる）
+        y_pos -= 20
+        table_rows = [
+            ("商品・サービス名", "個数", "単価（税抜）", "金額（税込）"),
+            ("保守サポート", "1", "50,000", "55,000"),
+            ("クラウド利用料", "3", "10,000", "33,000")
+        ]
+        
+        for row in table_rows:
+            for x, text in zip((50, 250, 330, 430), row):
+                c.drawString(x, y_pos, text)
+            y_pos -= 20
+        
+        y_pos -= 10
+        for line in ("合計: ¥88,000", "（内消費税 ¥8,000）"):
+            c.drawString(50, y_pos, line)
+            y_pos -= 20
+        
+        c.save()
+        print(f"✅ エグザンプル社テンプレートのPDFを作成しました: {filename}")
+        return filename
+        
+    except ImportError:
+        print("❌ reportlabライブラリが必要です")
+        print("インストール: pip install reportlab")
+        return None
+
 def create_simple_text_pdf():
     """reportlabが使えない場合の簡易PDF作成"""
     try:
@@ -160,6 +220,7 @@ if __name__ == "__main__":
     print("サンプルPDF作成ツール\n")
     
     created_file = create_sample_pdf()
+    create_example_vendor_pdf()
     
     if created_file.endswith('.pdf'):
         print(f"\n次のステップ:")
@@ -0,0 +1,47 @@
+import logging
+import os
+import sys
+from pathlib import Path
+
+import azure.functions as func
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir.parent))
+
+from src.operation_poller import DEFAULT_BUDGET_SECONDS, poll_operations
+from src.operation_store import get_operation_store
+from src.storage_io import read_blob, save_artifacts, save_to_cosmos
+
+def load_pdf(blob_name: str) -> bytes:
+    """Blobトリガーが受け取ったBLOB名（<コンテナ>/<パス>）からPDFを読み込む"""
+    container, _, blob_path = blob_name.partition("/")
+    return read_blob(container, blob_path)
+
+def on_complete(blob_name, success, cdm_data, validation_report, raw_extraction, context):
+    """再開したパイプラインの結果を保存"""
+    save_artifacts(
+        blob_name=blob_name,
+        raw_data=raw_extraction,
+        cdm_data=cdm_data,
+        validation_report=validation_report,
+        container="artifacts",
+        context=context
+    )
+    
+    if success and cdm_data:
+        save_to_cosmos(cdm_data)
+        logging.info(f"Successfully processed {blob_name}")
+    else:
+        logging.warning(f"Validation failed for {blob_name}: {validation_report}")
+
+def main(timer: func.TimerRequest) -> None:
+    """Azure Functions Timer Trigger エントリポイント（送信済みの解析操作を確認して処理を再開）"""
+    store = get_operation_store()
+    if store is None:
+        logging.info("Operation store is not configured, nothing to poll")
+        return
+    
+    budget_seconds = float(os.environ.get("OPERATION_POLLER_BUDGET_SECONDS", DEFAULT_BUDGET_SECONDS))
+    counts = poll_operations(store, on_complete, pdf_loader=load_pdf, budget_seconds=budget_seconds)
+    logging.info(f"Operation poller finished: {counts}")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Document Normalizer - Document Intelligence 抽出のベンチマーク
+extract_with_document_intelligence（同期・スレッド並列）または非同期クライアントで
+PDFを抽出し、結果取得までの時間・ポーリング回数・スロットリングを集計する
+（--standin でスタンドインサーバーをプロセス内に起動し、実サービスを呼ばずに計測できる）
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmark_text_modes import collect_pdfs
+from docint_standin_server import add_server_arguments, build_state, start_server
+
+def percentile(values, ratio: float) -> float:
+    """ratio（0〜1）の位置の値（最近傍法）"""
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * ratio), len(ordered) - 1)]
+
+def run_sync(documents, doc_type: str, concurrency: int, timeout: float, extraction_config: dict = None):
+    """同期版をスレッドプールで実行し、文書ごとのメトリクスを返す"""
+    from src.extract_azure_docint import extract_with_document_intelligence
+
+    def extract_one(pdf_bytes):
+        metrics = {}
+        started = time.perf_counter()
+        result = extract_with_document_intelligence(
+            pdf_bytes, doc_type, timeout, metrics, force_refresh=True, extraction_config=extraction_config
+        )
+        metrics["elapsed_ms"] = (time.perf_counter() - started) * 1000
+        metrics["ok"] = result is not None
+        return metrics
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(extract_one, documents))
+
+def run_async(documents, doc_type: str, concurrency: int, timeout: float, extraction_config: dict = None):
+    """非同期クライアントで実行し、文書ごとのメトリクスを返す"""
+    from src.extract_azure_docint_async import AsyncDocumentIntelligenceClient
+
+    async def extract_all():
+        async with AsyncDocumentIntelligenceClient(max_concurrency=concurrency) as client:
+            async def extract_one(pdf_bytes):
+                metrics = {}
+                started = time.perf_counter()
+                result = await client.extract(pdf_bytes, doc_type, timeout, metrics, extraction_config=extraction_config)
+                metrics["elapsed_ms"] = (time.perf_counter() - started) * 1000
+                metrics["ok"] = result is not None
+                return metrics
+
+            results = await asyncio.gather(*(extract_one(pdf_bytes) for pdf_bytes in documents))
+            print(f"   同時進行数のピーク: {client.peak_in_flight}")
+            return results
+
+    return asyncio.run(extract_all())
+
+def report(results, wall_seconds: float):
+    """集計結果を表示"""
+    elapsed = [metrics["elapsed_ms"] for metrics in results]
+    succeeded = sum(1 for metrics in results if metrics["ok"])
+    statuses = {}
+    for metrics in results:
+        status = metrics.get("status", "error")
+        statuses[status] = statuses.get(status, 0) + 1
+
+    print(f"\n📊 {len(results)} 件（成功 {succeeded} 件）/ {wall_seconds:.2f}s "
+          f"({len(results) / wall_seconds:.1f} docs/s)")
+    print(f"   結果取得まで(ms): p50 {percentile(elapsed, 0.5):.0f} / p95 {percentile(elapsed, 0.95):.0f} / "
+          f"p99 {percentile(elapsed, 0.99):.0f} / max {max(elapsed):.0f}")
+    print(f"   ポーリング回数: 平均 {statistics.mean(m.get('poll_count', 0) for m in results):.1f} / "
+          f"最大 {max(m.get('poll_count', 0) for m in results)}")
+    print(f"   スロットリング: 429/503 {sum(m.get('throttled_responses', 0) for m in results)} 回 / "
+          f"待機合計 {sum(m.get('throttle_wait_ms', 0.0) for m in results):.0f}ms")
+    print(f"   ステータス: {statuses}")
+
+    from src.extract_azure_docint import get_model_latency_stats
+    for model, stats in get_model_latency_stats().items():
+        print(f"   モデル {model}: {stats['count']} 件 / 平均 {stats['mean_ms']:.0f}ms / "
+              f"p50 {stats['p50_ms']:.0f}ms / p95 {stats['p95_ms']:.0f}ms")
+
+    from src.endpoint_pool import get_endpoint_pool
+    pool = get_endpoint_pool()
+    for endpoint in pool.snapshot() if pool else []:
+        print(f"   エンドポイント {endpoint['name']}: 操作 {endpoint['operations']} 件 / "
+              f"429率 {endpoint['throttle_rate']:.2f} / エラー率 {endpoint['error_rate']:.2f} / "
+              f"操作 p95 {endpoint['operation_p95_ms'] or 0:.0f}ms / 除外 {endpoint['ejections']} 回")
+
+def main():
+    parser = argparse.ArgumentParser(description='Document Intelligence 抽出のベンチマーク')
+    parser.add_argument('paths', nargs='*', default=['sample_invoice.pdf'],
+                        help='PDFファイルまたはディレクトリ（既定: sample_invoice.pdf）')
+    parser.add_argument('--doc-type', type=str, default='INVOICE', help='文書種別')
+    parser.add_argument('--documents', type=int, default=20, help='抽出する文書数（PDFを繰り返し使う）')
+    parser.add_argument('--concurrency', type=int, default=10, help='同時に進行させる文書数')
+    parser.add_argument('--mode', choices=['sync', 'async'], default='sync', help='同期版（スレッド）か非同期クライアントか')
+    parser.add_argument('--timeout', type=float, default=None, help='1文書あたりの上限秒数')
+    parser.add_argument('--model', type=str, default=None, help='解析モデル（省略時はマッピング設定の extraction.model_id）')
+    parser.add_argument('--api-version', type=str, default=None, help='APIバージョン（省略時はマッピング設定）')
+    parser.add_argument('--features', type=str, default=None, help='追加機能（カンマ区切り、例: keyValuePairs）')
+    parser.add_argument('--vendor', type=str, default=None, help='マッピング設定を読むベンダー名')
+    parser.add_argument('--standin', action='store_true',
+                        help='スタンドインサーバーを起動し、DOCUMENT_INTELLIGENCE_ENDPOINT をそこに向ける')
+    add_server_arguments(parser)
+
+    args = parser.parse_args()
+
+    pdf_files = collect_pdfs(args.paths)
+    if not pdf_files:
+        print("❌ PDFファイルが見つかりません")
+        exit(1)
+
+    if args.standin:
+        server = start_server(build_state(args))
+        os.environ["DOCUMENT_INTELLIGENCE_ENDPOINT"] = f"http://127.0.0.1:{server.server_port}"
+        os.environ.setdefault("DOCUMENT_INTELLIGENCE_API_KEY", "standin")
+        print(f"🚀 スタンドインサーバー: {os.environ['DOCUMENT_INTELLIGENCE_ENDPOINT']} (latency={args.latency})")
+
+    if not os.environ.get("DOCUMENT_INTELLIGENCE_ENDPOINT") and not os.environ.get("DOCUMENT_INTELLIGENCE_ENDPOINTS"):
+        print("❌ DOCUMENT_INTELLIGENCE_ENDPOINT(S) が未設定です（--standin でスタンドインを使用できます）")
+        exit(1)
+
+    pdf_bytes_list = [pdf_file.read_bytes() for pdf_file in pdf_files]
+    documents = [pdf_bytes_list[i % len(pdf_bytes_list)] for i in range(args.documents)]
+
+    from src.config_loader import ConfigLoader
+    from src.extract_azure_docint import resolve_model
+    extraction_config = dict(ConfigLoader().get_extraction_config(args.doc_type, args.vendor))
+    for key, value in (("model_id", args.model), ("api_version", args.api_version), ("features", args.features)):
+        if value:
+            extraction_config[key] = value
+    model_id, api_version, features = resolve_model(args.doc_type, extraction_config)
+
+    print(f"⏱️ {args.mode} / {len(documents)} 件 / 同時 {args.concurrency} / "
+          f"{model_id}@{api_version}{f' [{features}]' if features else ''}")
+    started = time.perf_counter()
+    if args.mode == 'async':
+        results = run_async(documents, args.doc_type, args.concurrency, args.timeout, extraction_config)
+    else:
+        results = run_sync(documents, args.doc_type, args.concurrency, args.timeout, extraction_config)
+    report(results, time.perf_counter() - started)
+
+    if args.standin:
+        print(f"   サーバー側カウンタ: {server.RequestHandlerClass.state.counters}")
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Document Normalizer - テキスト抽出方式のベンチマーク
+レイアウト解析あり（layout）と高速モード（fast）の抽出時間と分類結果を比較する
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.classify import fold_text, get_classifier_patterns, score_document_type
+from src.config_loader import ConfigLoader
+from src.pdf_text import TEXT_MODE_FAST, TEXT_MODE_LAYOUT, extract_page_texts
+
+def collect_pdfs(paths):
+    """引数のファイル・ディレクトリからPDFを集める"""
+    pdf_files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            pdf_files.extend(sorted(path.rglob("*.pdf")))
+        elif path.suffix.lower() == ".pdf":
+            pdf_files.append(path)
+    return pdf_files
+
+def benchmark(pdf_bytes: bytes, text_mode: str, repeat: int):
+    """抽出を繰り返して所要時間（ミリ秒）の中央値とテキストを返す"""
+    timings = []
+    page_texts = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        page_texts, _ = extract_page_texts(pdf_bytes, text_mode=text_mode)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), "".join(page_texts)
+
+def classify_text(text: str, patterns):
+    """抽出テキストから文書種別とベンダーを判定"""
+    keyword_hits, vendor_hits = patterns.scan(fold_text(text))
+    return score_document_type(keyword_hits), patterns.resolve_vendor(vendor_hits, text)
+
+def main():
+    parser = argparse.ArgumentParser(description='テキスト抽出方式（layout / fast）のベンチマーク')
+    parser.add_argument('paths', nargs='*', default=['sample_invoice.pdf'],
+                        help='PDFファイルまたはディレクトリ（既定: sample_invoice.pdf）')
+    parser.add_argument('--repeat', type=int, default=5, help='1ファイルあたりの計測回数')
+    parser.add_argument('--config-dir', type=str, default=None, help='設定ディレクトリ')
+
+    args = parser.parse_args()
+
+    pdf_files = collect_pdfs(args.paths)
+    if not pdf_files:
+        print("❌ PDFファイルが見つかりません")
+        exit(1)
+
+    patterns = get_classifier_patterns(ConfigLoader(args.config_dir))
+
+    print(f"{'file':40} {'layout(ms)':>11} {'fast(ms)':>9} {'speedup':>8}  result")
+    totals = {TEXT_MODE_LAYOUT: 0.0, TEXT_MODE_FAST: 0.0}
+    mismatches = 0
+
+    for pdf_file in pdf_files:
+        pdf_bytes = pdf_file.read_bytes()
+        try:
+            layout_ms, layout_text = benchmark(pdf_bytes, TEXT_MODE_LAYOUT, args.repeat)
+            fast_ms, fast_text = benchmark(pdf_bytes, TEXT_MODE_FAST, args.repeat)
+        except Exception as e:
+            print(f"{pdf_file.name[:40]:40} ✗ {e}")
+            continue
+
+        totals[TEXT_MODE_LAYOUT] += layout_ms
+        totals[TEXT_MODE_FAST] += fast_ms
+
+        layout_result = classify_text(layout_text, patterns)
+        fast_result = classify_text(fast_text, patterns)
+        if layout_result == fast_result:
+            result = f"✅ {layout_result[0]} / {layout_result[1]}"
+        else:
+            mismatches += 1
+            result = f"⚠️ layout={layout_result} fast={fast_result}"
+
+        speedup = layout_ms / fast_ms if fast_ms else 0.0
+        print(f"{pdf_file.name[:40]:40} {layout_ms:11.2f} {fast_ms:9.2f} {speedup:7.1f}x  {result}")
+
+    if totals[TEXT_MODE_FAST]:
+        print(f"\n合計: layout {totals[TEXT_MODE_LAYOUT]:.2f}ms / fast {totals[TEXT_MODE_FAST]:.2f}ms "
+              f"({totals[TEXT_MODE_LAYOUT] / totals[TEXT_MODE_FAST]:.1f}x)")
+    print(f"分類結果の不一致: {mismatches}/{len(pdf_files)} 件")
+
+if __name__ == "__main__":
+    main()
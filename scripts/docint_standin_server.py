@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Document Normalizer - Document Intelligence スタンドインサーバー
+解析の送信（POST）と Operation-Location のポーリングを模擬し、記録済みの analyzeResult を返す
+（負荷試験・レイテンシ計測用。DOCUMENT_INTELLIGENCE_ENDPOINT をこのサーバーに向けて使う）
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+ANALYZE_PATH = re.compile(r"^/(?P<service>formrecognizer|documentintelligence)/documentModels/(?P<model>[^/:]+):analyze$")
+RESULT_PATH = re.compile(
+    r"^/(?P<service>formrecognizer|documentintelligence)/documentModels/(?P<model>[^/]+)/analyzeResults/(?P<operation>[^/?]+)$"
+)
+
+class LatencyDistribution:
+    """解析完了までの時間の分布（fixed:秒 / uniform:最小,最大 / normal:平均,標準偏差 / lognormal:mu,sigma）"""
+
+    def __init__(self, spec: str):
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(value) for value in params.split(",") if value]
+
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+    def sample(self) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return random.uniform(*self.params)
+        if self.kind == "normal":
+            return max(random.gauss(*self.params), 0.0)
+        return random.lognormvariate(*self.params)
+
+class RecordingStore:
+    """
+    記録済み analyzeResult の置き場所
+
+    <dir>/<sha256>.<model_id>.json または <dir>/<sha256>.json を探す。
+    ファイルの中身は analyzeResult そのもの、{"analyzeResult": ...}（APIレスポンス）、
+    {"analyze_result": ...}（抽出結果キャッシュのエントリ）のいずれでもよい。
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = Path(directory) if directory else None
+
+    def find(self, content_hash: str, model_id: str):
+        if self.directory is None:
+            return None
+
+        for name in (f"{content_hash}.{model_id}.json", f"{content_hash}.json"):
+            path = self.directory / name
+            if path.exists():
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                return data.get("analyzeResult") or data.get("analyze_result") or data
+
+        return None
+
+    def save(self, content_hash: str, model_id: str, analyze_result: dict) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{content_hash}.{model_id}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"analyzeResult": analyze_result}, f, ensure_ascii=False)
+        return path
+
+class StandinState:
+    """サーバー全体の設定・進行中の操作・カウンタ"""
+
+    def __init__(
+        self,
+        recordings: RecordingStore,
+        latency: LatencyDistribution,
+        failure_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        throttle_retry_after: float = 1.0,
+        retry_after: float = None,
+        strict: bool = False
+    ):
+        self.recordings = recordings
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.throttle_retry_after = throttle_retry_after
+        self.retry_after = retry_after
+        self.strict = strict
+
+        self.operations = {}
+        self.lock = threading.Lock()
+        self.counters = {"submits": 0, "polls": 0, "throttled": 0, "failed": 0, "replayed": 0, "missing": 0}
+
+    def count(self, name: str):
+        with self.lock:
+            self.counters[name] += 1
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """解析APIのPOSTと結果取得のGETを模擬するハンドラー"""
+
+    protocol_version = "HTTP/1.1"
+    state: StandinState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        match = ANALYZE_PATH.match(self.path.split("?", 1)[0])
+        if not match:
+            self.send_json(404, {"error": {"code": "NotFound", "message": self.path}})
+            return
+
+        if self.maybe_throttle():
+            return
+
+        state = self.state
+        state.count("submits")
+        model_id = match.group("model")
+        content_hash = hashlib.sha256(body).hexdigest()
+
+        analyze_result = state.recordings.find(content_hash, model_id)
+        if analyze_result is None:
+            state.count("missing")
+            if state.strict:
+                self.send_json(400, {"error": {"code": "NoRecording", "message": f"No recording for {content_hash}"}})
+                return
+            analyze_result = {"apiVersion": "2023-07-31", "modelId": model_id, "content": "", "pages": [], "documents": []}
+        else:
+            state.count("replayed")
+
+        operation_id = uuid.uuid4().hex
+        with state.lock:
+            state.operations[operation_id] = {
+                "ready_at": time.monotonic() + state.latency.sample(),
+                "failed": random.random() < state.failure_rate,
+                "analyze_result": analyze_result
+            }
+
+        host = self.headers.get("Host", f"127.0.0.1:{self.server.server_port}")
+        headers = {
+            "Operation-Location": (
+                f"http://{host}/{match.group('service')}/documentModels/{model_id}/analyzeResults/{operation_id}"
+            )
+        }
+        if state.retry_after is not None:
+            headers["Retry-After"] = str(state.retry_after)
+        self.send_json(202, None, headers)
+
+    def do_GET(self):
+        match = RESULT_PATH.match(self.path.split("?", 1)[0])
+        if not match:
+            self.send_json(404, {"error": {"code": "NotFound", "message": self.path}})
+            return
+
+        if self.maybe_throttle():
+            return
+
+        state = self.state
+        state.count("polls")
+        with state.lock:
+            operation = state.operations.get(match.group("operation"))
+
+        if operation is None:
+            self.send_json(404, {"error": {"code": "NotFound", "message": "Operation not found"}})
+            return
+
+        if time.monotonic() < operation["ready_at"]:
+            headers = {"Retry-After": str(state.retry_after)} if state.retry_after is not None else {}
+            self.send_json(200, {"status": "running"}, headers)
+            return
+
+        if operation["failed"]:
+            state.count("failed")
+            self.send_json(200, {"status": "failed", "error": {"code": "InternalServerError", "message": "Injected failure"}})
+            return
+
+        self.send_json(200, {"status": "succeeded", "analyzeResult": operation["analyze_result"]})
+
+    def maybe_throttle(self) -> bool:
+        """設定された割合で429を返す"""
+        if random.random() >= self.state.throttle_rate:
+            return False
+
+        self.state.count("throttled")
+        self.send_json(
+            429,
+            {"error": {"code": "429", "message": "Rate limit is exceeded."}},
+            {"Retry-After": str(self.state.throttle_retry_after)}
+        )
+        return True
+
+    def send_json(self, status: int, payload, headers: dict = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_server(state: StandinState, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """バックグラウンドスレッドでサーバーを起動（port=0なら空きポート）"""
+    handler = type("BoundStandinHandler", (StandinHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    """サーバーの挙動を指定する引数（ベンチマークスクリプトと共用）"""
+    parser.add_argument('--recordings', type=str, default=None,
+                        help='記録済み analyzeResult のディレクトリ（<sha256>[.<model_id>].json）')
+    parser.add_argument('--latency', type=str, default='uniform:0.5,2.0',
+                        help='解析完了までの時間の分布（fixed:1.0 / uniform:0.5,2.0 / normal:1.0,0.3 / lognormal:0,0.5）')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='解析を失敗させる割合')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='429を返す割合')
+    parser.add_argument('--throttle-retry-after', type=float, default=1.0, help='429で返す Retry-After（秒）')
+    parser.add_argument('--retry-after', type=float, default=None, help='202/実行中レスポンスに付ける Retry-After（秒）')
+    parser.add_argument('--strict', action='store_true', help='記録が無い文書は400を返す（既定は空の結果）')
+
+def build_state(args) -> StandinState:
+    """引数からサーバー状態を作成"""
+    return StandinState(
+        recordings=RecordingStore(args.recordings),
+        latency=LatencyDistribution(args.latency),
+        failure_rate=args.failure_rate,
+        throttle_rate=args.throttle_rate,
+        throttle_retry_after=args.throttle_retry_after,
+        retry_after=args.retry_after,
+        strict=args.strict
+    )
+
+def record(args):
+    """実サービスで解析した analyzeResult を記録する"""
+    from src.extract_azure_docint import analyze_document, get_model_id
+
+    store = RecordingStore(args.output)
+    model_id = args.model or get_model_id(args.doc_type)
+
+    for pdf_path in map(Path, args.pdfs):
+        pdf_bytes = pdf_path.read_bytes()
+        analyze_result = analyze_document(pdf_bytes, model_id)
+        if analyze_result is None:
+            print(f"   ✗ {pdf_path}: 解析に失敗しました")
+            continue
+        saved = store.save(hashlib.sha256(pdf_bytes).hexdigest(), model_id, analyze_result)
+        print(f"   💾 {pdf_path} → {saved}")
+
+def serve(args):
+    """サーバーを起動して待ち受ける"""
+    server = start_server(build_state(args), args.host, args.port)
+    print(f"🚀 Document Intelligence stand-in listening on http://{args.host}:{server.server_port}")
+    print(f"   export DOCUMENT_INTELLIGENCE_ENDPOINT=http://{args.host}:{server.server_port}")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description='Document Intelligence スタンドインサーバー')
+    subparsers = parser.add_subparsers(dest='command')
+
+    serve_parser = subparsers.add_parser('serve', help='スタンドインサーバーを起動')
+    serve_parser.add_argument('--host', type=str, default='127.0.0.1', help='待ち受けアドレス')
+    serve_parser.add_argument('--port', type=int, default=8765, help='待ち受けポート')
+    add_server_arguments(serve_parser)
+
+    record_parser = subparsers.add_parser('record', help='実サービスの解析結果を記録')
+    record_parser.add_argument('pdfs', nargs='+', help='記録するPDFファイル')
+    record_parser.add_argument('--output', type=str, required=True, help='記録の保存先ディレクトリ')
+    record_parser.add_argument('--doc-type', type=str, default='INVOICE', help='文書種別（モデルIDの決定に使用）')
+    record_parser.add_argument('--model', type=str, default=None, help='モデルID（指定時は文書種別より優先）')
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record(args)
+    elif args.command == 'serve':
+        serve(args)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Document Normalizer - n-gram文書種別分類モデルの学習スクリプト
+ラベル付きコーパス（<corpus>/<文書種別>/*.pdf | *.txt）から線形モデルを学習する
+"""
+
+import argparse
+import logging
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.classify import fold_text
+from src.ngram_classifier import (
+    DEFAULT_NUM_FEATURES,
+    NgramClassifier,
+    train_ngram_classifier
+)
+from src.pdf_text import extract_page_texts
+
+def load_corpus(corpus_dir: Path):
+    """コーパスを読み込み (テキスト, ラベル) のリストを返す"""
+    samples = []
+
+    for label_dir in sorted(p for p in corpus_dir.iterdir() if p.is_dir()):
+        label = label_dir.name
+        for file_path in sorted(label_dir.iterdir()):
+            try:
+                if file_path.suffix.lower() == ".pdf":
+                    page_texts, _ = extract_page_texts(file_path.read_bytes())
+                    text = "".join(page_texts)
+                elif file_path.suffix.lower() == ".txt":
+                    text = file_path.read_text(encoding="utf-8")
+                else:
+                    continue
+            except Exception as e:
+                print(f"   ✗ {file_path}: {e}")
+                continue
+
+            samples.append((fold_text(text), label))
+
+        print(f"   📄 {label}: {sum(1 for _, l in samples if l == label)} 件")
+
+    return samples
+
+def evaluate(model: NgramClassifier, samples) -> float:
+    """正解率を計算"""
+    if not samples:
+        return 0.0
+
+    predictions = model.classify_texts([text for text, _ in samples])
+    correct = sum(1 for (predicted, _), (_, label) in zip(predictions, samples) if predicted == label)
+    return correct / len(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description='n-gram文書種別分類モデルの学習')
+    parser.add_argument('--corpus', type=str, required=True,
+                        help='ラベル付きコーパスのディレクトリ（<corpus>/<文書種別>/*.pdf|*.txt）')
+    parser.add_argument('--output', type=str, default='config/classifier/ngram_model.npz',
+                        help='モデルの出力先')
+    parser.add_argument('--num-features', type=int, default=DEFAULT_NUM_FEATURES,
+                        help='ハッシュ特徴量の次元数')
+    parser.add_argument('--ngram-min', type=int, default=1, help='n-gramの最小長')
+    parser.add_argument('--ngram-max', type=int, default=3, help='n-gramの最大長')
+    parser.add_argument('--epochs', type=int, default=200, help='学習の反復回数')
+    parser.add_argument('--learning-rate', type=float, default=1.0, help='学習率')
+    parser.add_argument('--holdout', type=float, default=0.2, help='評価用に取り分ける割合')
+    parser.add_argument('--seed', type=int, default=0, help='データ分割の乱数シード')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    print("🔄 コーパス読み込み中...")
+    samples = load_corpus(Path(args.corpus))
+    if len(set(label for _, label in samples)) < 2:
+        print("❌ 2種類以上のラベルが必要です")
+        exit(1)
+
+    random.Random(args.seed).shuffle(samples)
+    holdout_size = int(len(samples) * args.holdout)
+    test_samples, train_samples = samples[:holdout_size], samples[holdout_size:]
+
+    print(f"🧮 学習中... (学習 {len(train_samples)} 件 / 評価 {len(test_samples)} 件)")
+    model = train_ngram_classifier(
+        [text for text, _ in train_samples],
+        [label for _, label in train_samples],
+        num_features=args.num_features,
+        ngram_range=(args.ngram_min, args.ngram_max),
+        epochs=args.epochs,
+        learning_rate=args.learning_rate
+    )
+
+    print(f"   学習データ正解率: {evaluate(model, train_samples):.3f}")
+    if test_samples:
+        print(f"   評価データ正解率: {evaluate(model, test_samples):.3f}")
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    model.save(output_path)
+    print(f"✅ モデルを保存しました: {output_path}")
+
+if __name__ == "__main__":
+    main()
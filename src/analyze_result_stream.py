@@ -0,0 +1,130 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+# process_extraction_result と OCR（pages[].lines[].content）が参照する analyzeResult のセクション
+RESULT_SECTIONS = ("content", "documents", "tables", "keyValuePairs", "pages")
+
+# 内容ノード（ページ・行・表・セル・文書・フィールドの値など）の座標・オフセット
+GEOMETRY_KEYS = frozenset(("boundingRegions", "spans", "polygon"))
+
+# ページの単語単位のデータ（analyzeResult.pages[] の直下だけ読み飛ばす）
+PAGE_PREFIX = "analyzeResult.pages.item"
+PAGE_SKIPPED_KEYS = frozenset(("words", "selectionMarks"))
+
+# キーがフィールド名になるオブジェクト（words / spans などの名前のカスタムフィールドを読み飛ばさない）
+FIELD_MAP_SUFFIXES = (".fields", ".valueObject")
+
+READ_CHUNK_SIZE = 64 * 1024
+
+class PrunedResultBuilder:
+    """
+    ijsonのイベント列から、必要なセクションだけを組み立てる
+    
+    読み飛ばす値はイベントを数えて捨てるだけで、オブジェクトとして生成しない。
+    読み飛ばすのは既知の位置のキーだけで、フィールド名のキー（documents[].fields など）はすべて残す。
+    イベント数はペイロードの大きさに比例するため、1イベントあたりの処理は consume 内に展開している。
+    """
+    
+    def __init__(self, sections=RESULT_SECTIONS):
+        self.sections = frozenset(sections)
+        self.result: Optional[Dict[str, Any]] = None
+        
+        self._stack: List[list] = []
+        self._skip_next = False
+        self._skip_depth = 0
+    
+    def consume(self, events: Iterable[Tuple[str, str, Any]]):
+        """(prefix, event, value) のイベント列を処理（分割して何度呼んでもよい）"""
+        stack = self._stack
+        skip_next = self._skip_next
+        skip_depth = self._skip_depth
+        sections = self.sections
+        
+        for prefix, event, value in events:
+            if skip_depth:
+                if event == "start_map" or event == "start_array":
+                    skip_depth += 1
+                elif event == "end_map" or event == "end_array":
+                    skip_depth -= 1
+                continue
+            
+            if event == "map_key":
+                if prefix == "analyzeResult":
+                    skip_next = value not in sections
+                elif value in GEOMETRY_KEYS:
+                    skip_next = not prefix.endswith(FIELD_MAP_SUFFIXES)
+                else:
+                    skip_next = prefix == PAGE_PREFIX and value in PAGE_SKIPPED_KEYS
+                if skip_next:
+                    continue
+                stack[-1][1] = value
+                continue
+            
+            if skip_next:
+                skip_next = False
+                if event == "start_map" or event == "start_array":
+                    skip_depth = 1
+                continue
+            
+            if event == "end_map" or event == "end_array":
+                stack.pop()
+                continue
+            
+            if event == "start_map":
+                value = {}
+            elif event == "start_array":
+                value = []
+            
+            if not stack:
+                self.result = value
+            elif isinstance(stack[-1][0], list):
+                stack[-1][0].append(value)
+            else:
+                stack[-1][0][stack[-1][1]] = value
+            
+            if event == "start_map" or event == "start_array":
+                stack.append([value, None])
+        
+        self._skip_next = skip_next
+        self._skip_depth = skip_depth
+
+def parse_operation_result(response) -> Dict[str, Any]:
+    """
+    ポーリングレスポンス（requests、stream=True で取得）を必要なセクションだけ読み込む
+    
+    ijsonが無い場合は response.json() で全体を読み込む。
+    """
+    if ijson is None:
+        return response.json()
+    
+    response.raw.decode_content = True
+    builder = PrunedResultBuilder()
+    builder.consume(ijson.parse(response.raw, buf_size=READ_CHUNK_SIZE, use_float=True))
+    
+    return builder.result or {}
+
+async def parse_operation_result_async(response) -> Dict[str, Any]:
+    """parse_operation_result の非同期版（aiohttpのレスポンスを受信したチャンクごとに解析）"""
+    if ijson is None:
+        return await response.json(content_type=None)
+    
+    builder = PrunedResultBuilder()
+    events = ijson.sendable_list()
+    parser = ijson.parse_coro(events, use_float=True)
+    
+    async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+        parser.send(chunk)
+        builder.consume(events)
+        del events[:]
+    
+    parser.close()
+    builder.consume(events)
+    
+    return builder.result or {}
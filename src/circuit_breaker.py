@@ -0,0 +1,233 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+DEFAULT_WINDOW_SIZE = 20
+DEFAULT_MIN_CALLS = 10
+DEFAULT_FAILURE_RATE = 0.5
+DEFAULT_SLOW_CALL_SECONDS = 30.0
+DEFAULT_SLOW_CALL_RATE = 0.8
+DEFAULT_OPEN_SECONDS = 60.0
+DEFAULT_HALF_OPEN_CALLS = 1
+DEFAULT_PROBE_TIMEOUT_SECONDS = 120.0
+MAX_TRANSITIONS = 50
+
+# closed で許可した呼び出しの送信許可（half_open の試験送信は試験送信ごとの識別子）
+PERMIT_CALL = "call"
+PROBE_PREFIX = "probe:"
+
+class CircuitBreaker:
+    """
+    直近の呼び出しの失敗率・遅延率から外部サービスへの送信を止めるサーキットブレーカー
+    
+    closed: 通常どおり送信し、直近 window_size 件の結果を記録する
+    open: 送信せずに即座に失敗させる（open_seconds 経過後に half_open へ）
+    half_open: half_open_calls 件だけ試験的に送信し、成功すれば closed、失敗・遅延なら open に戻る
+    （判定に使うのは half_open で許可した試験送信の結果だけで、closed の間に送信した呼び出しの結果は使わない。
+    probe_timeout_seconds 経っても結果が記録されない試験送信は失われたものとして枠を空ける）
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        min_calls: int = DEFAULT_MIN_CALLS,
+        failure_rate: float = DEFAULT_FAILURE_RATE,
+        slow_call_seconds: float = DEFAULT_SLOW_CALL_SECONDS,
+        slow_call_rate: float = DEFAULT_SLOW_CALL_RATE,
+        open_seconds: float = DEFAULT_OPEN_SECONDS,
+        half_open_calls: int = DEFAULT_HALF_OPEN_CALLS,
+        probe_timeout_seconds: float = DEFAULT_PROBE_TIMEOUT_SECONDS
+    ):
+        """
+        Args:
+            name: ログ・メトリクス用の名前
+            window_size: 失敗率・遅延率を計算する直近の呼び出し数
+            min_calls: 判定に必要な最小呼び出し数
+            failure_rate: この割合以上が失敗したら open にする
+            slow_call_seconds: この秒数以上かかった呼び出しを遅延とみなす
+            slow_call_rate: この割合以上が遅延したら open にする
+            open_seconds: open から half_open に移るまでの秒数
+            half_open_calls: half_open で試験的に送信する呼び出し数
+            probe_timeout_seconds: 試験送信の結果を待つ最大秒数（別プロセスのポーラーが結果を記録する場合など）
+        """
+        self.name = name
+        self.min_calls = max(min_calls, 1)
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(half_open_calls, 1)
+        self.probe_timeout_seconds = probe_timeout_seconds
+        
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=max(window_size, self.min_calls))
+        self._state = STATE_CLOSED
+        self._opened_at = 0.0
+        self._probes: Dict[str, float] = {}
+        self._transitions = deque(maxlen=MAX_TRANSITIONS)
+        self._rejected = 0
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh_state()
+            return self._state
+    
+    def allow_request(self) -> Optional[str]:
+        """
+        送信してよいか判定（half_open では試験送信の枠を確保する）
+        
+        Returns:
+            送信許可（closed では PERMIT_CALL、half_open では試験送信の識別子）。送信してはいけない場合はNone。
+            Noneでない場合は必ず record に渡すこと
+        """
+        with self._lock:
+            self._refresh_state()
+            
+            if self._state == STATE_CLOSED:
+                return PERMIT_CALL
+            
+            if self._state == STATE_HALF_OPEN:
+                now = time.time()
+                for probe, started in list(self._probes.items()):
+                    if now - started >= self.probe_timeout_seconds:
+                        del self._probes[probe]
+                if len(self._probes) < self.half_open_calls:
+                    probe = f"{PROBE_PREFIX}{uuid.uuid4().hex}"
+                    self._probes[probe] = now
+                    return probe
+            
+            self._rejected += 1
+            return None
+    
+    def record(self, success: bool, elapsed_seconds: float, permit: Optional[str] = None):
+        """
+        呼び出し結果を記録して状態を更新
+        
+        Args:
+            success: 成功したか
+            elapsed_seconds: 呼び出しの所要時間
+            permit: allow_request が返した送信許可（half_open では許可した試験送信の結果だけを判定に使う）
+        """
+        slow = elapsed_seconds >= self.slow_call_seconds
+        
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                if permit is None or self._probes.pop(permit, None) is None:
+                    logger.debug(f"Circuit breaker {self.name}: ignoring result of a call that is not a probe")
+                    return
+                if success and not slow:
+                    self._outcomes.clear()
+                    self._transition(STATE_CLOSED, "probe succeeded")
+                else:
+                    self._open("probe failed" if not success else f"probe slow ({elapsed_seconds:.1f}s)")
+                return
+            
+            if self._state == STATE_OPEN:
+                return
+            
+            self._outcomes.append((success, slow))
+            if len(self._outcomes) < self.min_calls:
+                return
+            
+            failures = sum(1 for ok, _ in self._outcomes if not ok)
+            slow_calls = sum(1 for _, is_slow in self._outcomes if is_slow)
+            calls = len(self._outcomes)
+            
+            if failures / calls >= self.failure_rate:
+                self._open(f"failure rate {failures}/{calls}")
+            elif slow_calls / calls >= self.slow_call_rate:
+                self._open(f"slow call rate {slow_calls}/{calls}")
+    
+    def snapshot(self) -> Dict:
+        """状態・直近の失敗率と遅延率・状態遷移の履歴"""
+        with self._lock:
+            self._refresh_state()
+            calls = len(self._outcomes)
+            failures = sum(1 for ok, _ in self._outcomes if not ok)
+            slow_calls = sum(1 for _, is_slow in self._outcomes if is_slow)
+            retry_in = max(self._opened_at + self.open_seconds - time.time(), 0.0) if self._state == STATE_OPEN else 0.0
+            
+            return {
+                "name": self.name,
+                "state": self._state,
+                "calls": calls,
+                "failure_rate": round(failures / calls, 3) if calls else 0.0,
+                "slow_call_rate": round(slow_calls / calls, 3) if calls else 0.0,
+                "rejected": self._rejected,
+                "retry_in_seconds": round(retry_in, 1),
+                "transitions": list(self._transitions)
+            }
+    
+    def _refresh_state(self):
+        if self._state == STATE_OPEN and time.time() - self._opened_at >= self.open_seconds:
+            self._probes.clear()
+            self._transition(STATE_HALF_OPEN, f"open for {self.open_seconds:.0f}s")
+    
+    def _open(self, reason: str):
+        self._opened_at = time.time()
+        self._outcomes.clear()
+        self._transition(STATE_OPEN, reason)
+    
+    def _transition(self, state: str, reason: str):
+        if state == self._state:
+            return
+        
+        self._transitions.append({"from": self._state, "to": state, "at": time.time(), "reason": reason})
+        log = logger.info if state == STATE_CLOSED else logger.warning
+        log(f"Circuit breaker {self.name}: {self._state} -> {state} ({reason})")
+        self._state = state
+
+_breaker: Optional[CircuitBreaker] = None
+_breaker_key: Optional[tuple] = None
+_breaker_lock = threading.Lock()
+
+def get_circuit_breaker() -> Optional[CircuitBreaker]:
+    """
+    Document Intelligence呼び出し用のサーキットブレーカーを取得（プロセス内で共有）
+    
+    環境変数:
+        DOCUMENT_INTELLIGENCE_BREAKER_ENABLED: false で無効（既定 true）
+        DOCUMENT_INTELLIGENCE_BREAKER_WINDOW / DOCUMENT_INTELLIGENCE_BREAKER_MIN_CALLS: 判定に使う呼び出し数
+        DOCUMENT_INTELLIGENCE_BREAKER_FAILURE_RATE: open にする失敗率（既定 0.5）
+        DOCUMENT_INTELLIGENCE_BREAKER_SLOW_SECONDS / DOCUMENT_INTELLIGENCE_BREAKER_SLOW_RATE: 遅延とみなす秒数と open にする遅延率
+        DOCUMENT_INTELLIGENCE_BREAKER_OPEN_SECONDS: half_open で試験送信するまでの秒数（既定 60）
+        DOCUMENT_INTELLIGENCE_TIMEOUT: 試験送信の結果を待つ最大秒数（解析の上限秒数と同じ）
+        
+    Returns:
+        サーキットブレーカー（無効設定の場合はNone）
+    """
+    global _breaker, _breaker_key
+    
+    if os.environ.get("DOCUMENT_INTELLIGENCE_BREAKER_ENABLED", "true").lower() == "false":
+        return None
+    
+    options = {
+        "window_size": int(os.environ.get("DOCUMENT_INTELLIGENCE_BREAKER_WINDOW", DEFAULT_WINDOW_SIZE)),
+        "min_calls": int(os.environ.get("DOCUMENT_INTELLIGENCE_BREAKER_MIN_CALLS", DEFAULT_MIN_CALLS)),
+        "failure_rate": float(os.environ.get("DOCUMENT_INTELLIGENCE_BREAKER_FAILURE_RATE", DEFAULT_FAILURE_RATE)),
+        "slow_call_seconds": float(os.environ.get("DOCUMENT_INTELLIGENCE_BREAKER_SLOW_SECONDS", DEFAULT_SLOW_CALL_SECONDS)),
+        "slow_call_rate": float(os.environ.get("DOCUMENT_INTELLIGENCE_BREAKER_SLOW_RATE", DEFAULT_SLOW_CALL_RATE)),
+        "open_seconds": float(os.environ.get("DOCUMENT_INTELLIGENCE_BREAKER_OPEN_SECONDS", DEFAULT_OPEN_SECONDS)),
+        "probe_timeout_seconds": float(os.environ.get("DOCUMENT_INTELLIGENCE_TIMEOUT", DEFAULT_PROBE_TIMEOUT_SECONDS))
+    }
+    key = tuple(sorted(options.items()))
+    
+    with _breaker_lock:
+        if _breaker is None or _breaker_key != key:
+            _breaker = CircuitBreaker("document_intelligence", **options)
+            _breaker_key = key
+            logger.info(f"Circuit breaker initialized ({options})")
+        
+        return _breaker
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CLASSIFIER_CONFIG_FILES = [
+    "classifier/vendors.yaml",
+    "classifier/settings.yaml",
+    "classifier/ngram_model.npz",
+    "entity/dictionary.yaml"
+]
+
+class ClassificationCache:
+    """PDF内容ハッシュをキーにした分類結果キャッシュ（メモリLRU＋任意のディスク層）"""
+    
+    def __init__(self, max_entries: int = 1024, cache_dir: Optional[str] = None, max_mb: float = 64):
+        """
+        Args:
+            max_entries: メモリ層に保持する最大件数
+            cache_dir: ディスク層のディレクトリ（省略時はメモリのみ）
+            max_mb: メモリ層に保持する合計サイズの上限（MB、ページテキストを含むJSONのサイズで数える）
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_mb * 1024 * 1024 if max_mb else None
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        
+        self._entries: "OrderedDict[str, Tuple[Dict, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._fingerprint: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "invalidations": 0
+        }
+    
+    def get(self, pdf_bytes: bytes, fingerprint: str) -> Optional[Dict]:
+        """
+        キャッシュ済みの分類結果を取得
+        
+        Args:
+            pdf_bytes: PDFファイルのバイトデータ
+            fingerprint: 分類設定のフィンガープリント
+            
+        Returns:
+            分類結果（無ければNone）
+        """
+        content_hash = hash_content(pdf_bytes)
+        
+        with self._lock:
+            self._switch_fingerprint(fingerprint)
+            
+            cached = self._entries.get(content_hash)
+            if cached is not None:
+                self._entries.move_to_end(content_hash)
+                self._stats["hits"] += 1
+                self._stats["memory_hits"] += 1
+                return cached[0]
+        
+        entry, size = self._read_disk(fingerprint, content_hash)
+        
+        with self._lock:
+            if entry is not None:
+                self._remember(content_hash, entry, size)
+                self._stats["hits"] += 1
+                self._stats["disk_hits"] += 1
+            else:
+                self._stats["misses"] += 1
+        
+        return entry
+    
+    def put(self, pdf_bytes: bytes, fingerprint: str, entry: Dict):
+        """分類結果を保存"""
+        content_hash = hash_content(pdf_bytes)
+        data = json.dumps(entry, ensure_ascii=False)
+        
+        with self._lock:
+            self._switch_fingerprint(fingerprint)
+            self._remember(content_hash, entry, len(data.encode("utf-8")))
+            self._stats["stores"] += 1
+        
+        self._write_disk(fingerprint, content_hash, data)
+    
+    def stats(self) -> Dict:
+        """ヒット・ミスなどのカウンタ"""
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._total_bytes}
+    
+    def _remember(self, content_hash: str, entry: Dict, size: int):
+        """
+        メモリ層に追加し、件数・合計サイズの上限を超えたら古いものから捨てる
+        
+        1件で合計サイズの上限を超えるエントリはメモリ層に置かない（ディスク層があればそちらにだけ残る）。
+        """
+        previous = self._entries.pop(content_hash, None)
+        if previous is not None:
+            self._total_bytes -= previous[1]
+        
+        if self.max_bytes and size > self.max_bytes:
+            logger.debug(f"Classification cache entry {content_hash[:12]} ({size} bytes) exceeds the memory limit")
+            return
+        
+        self._entries[content_hash] = (entry, size)
+        self._total_bytes += size
+        while len(self._entries) > self.max_entries or (self.max_bytes and self._total_bytes > self.max_bytes):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._total_bytes -= evicted_size
+    
+    def _switch_fingerprint(self, fingerprint: str):
+        """設定が変わっていたら古いエントリを無効化"""
+        if self._fingerprint == fingerprint:
+            return
+        
+        if self._fingerprint is not None:
+            logger.info(f"Classifier config changed ({self._fingerprint} -> {fingerprint}), invalidating cache")
+            self._stats["invalidations"] += 1
+        
+        self._entries.clear()
+        self._total_bytes = 0
+        self._fingerprint = fingerprint
+        self._purge_stale_disk_entries(fingerprint)
+    
+    def _purge_stale_disk_entries(self, fingerprint: str):
+        """現在の設定以外のフィンガープリントのディスクエントリを削除"""
+        if self.cache_dir is None or not self.cache_dir.exists():
+            return
+        
+        for entry_dir in self.cache_dir.iterdir():
+            if entry_dir.is_dir() and entry_dir.name != fingerprint:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                logger.debug(f"Removed stale classification cache: {entry_dir}")
+    
+    def _read_disk(self, fingerprint: str, content_hash: str) -> Tuple[Optional[Dict], int]:
+        """ディスク層からエントリとそのサイズ（バイト）を読む"""
+        if self.cache_dir is None:
+            return None, 0
+        
+        entry_file = self.cache_dir / fingerprint / f"{content_hash}.json"
+        if not entry_file.exists():
+            return None, 0
+        
+        try:
+            data = entry_file.read_bytes()
+            return json.loads(data.decode("utf-8")), len(data)
+        except Exception as e:
+            logger.warning(f"Failed to read classification cache {entry_file}: {str(e)}")
+            return None, 0
+    
+    def _write_disk(self, fingerprint: str, content_hash: str, data: str):
+        """ディスク層にエントリを書く（一時ファイル経由で置き換え）"""
+        if self.cache_dir is None:
+            return
+        
+        entry_dir = self.cache_dir / fingerprint
+        entry_file = entry_dir / f"{content_hash}.json"
+        
+        try:
+            entry_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = entry_dir / f".{content_hash}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_file, entry_file)
+        except Exception as e:
+            logger.warning(f"Failed to write classification cache {entry_file}: {str(e)}")
+
+def hash_content(pdf_bytes: bytes) -> str:
+    """PDF内容のハッシュ"""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+def get_classifier_fingerprint(config_loader) -> str:
+    """分類結果に影響する設定（ベンダー定義・分類設定・取引先マスタ・文書種別キーワード）のフィンガープリント"""
+    from .classify import DOC_TYPE_KEYWORDS
+    
+    hasher = hashlib.sha256()
+    hasher.update(config_loader.get_config_fingerprint(CLASSIFIER_CONFIG_FILES).encode("utf-8"))
+    hasher.update(json.dumps(DOC_TYPE_KEYWORDS, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    return hasher.hexdigest()[:16]
+
+_cache: Optional[ClassificationCache] = None
+_cache_key: Optional[tuple] = None
+_cache_lock = threading.Lock()
+
+def get_classification_cache(settings: Dict) -> Optional[ClassificationCache]:
+    """
+    プロセス共有の分類キャッシュを取得
+    
+    Args:
+        settings: classifier/settings.yaml の cache 設定
+        
+    Returns:
+        キャッシュ（無効設定の場合はNone）
+    """
+    global _cache, _cache_key
+    
+    if not settings.get("enabled", False):
+        return None
+    
+    max_entries = int(settings.get("max_entries", 1024))
+    max_mb = float(settings.get("max_mb", 64))
+    cache_dir = os.environ.get("CLASSIFICATION_CACHE_DIR") or settings.get("directory") or None
+    key = (max_entries, max_mb, cache_dir)
+    
+    with _cache_lock:
+        if _cache is None or _cache_key != key:
+            _cache = ClassificationCache(max_entries=max_entries, cache_dir=cache_dir, max_mb=max_mb)
+            _cache_key = key
+            logger.info(
+                f"Classification cache initialized (max_entries={max_entries}, max_mb={max_mb}, dir={cache_dir})"
+            )
+        
+        return _cache
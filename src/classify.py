@@ -1,57 +1,564 @@
 import logging
 import re
-from typing import Tuple, Optional
-from io import BytesIO
-from pdfminer.high_level import extract_text
-from pdfminer.layout import LAParams
+import threading
+from typing import Tuple, Optional, Dict, List, Set
+from .pdf_text import (
+    TEXT_MODE_FAST,
+    TEXT_MODE_LAYOUT,
+    extract_page_lines,
+    extract_page_texts,
+    inspect_text_layer,
+    iter_page_texts
+)
+from .pattern_matcher import AhoCorasickMatcher
+from .extraction_executor import ExtractionError, get_extraction_executor
+from .ngram_classifier import get_ngram_classifier
+from .vendor_index import get_vendor_index
 
 logger = logging.getLogger(__name__)
 
-def classify_document(pdf_bytes: bytes, config_loader) -> Tuple[Optional[str], Optional[str], float]:
+DOC_TYPE_KEYWORDS = {
+    "INVOICE": [
+        "請求書", "invoice", "bill", "請求番号", "請求金額",
+        "お支払い", "payment", "支払期限", "振込先"
+    ],
+    "PURCHASE_ORDER": [
+        "発注書", "purchase order", "注文書", "発注番号", "注文番号",
+        "納期", "delivery", "納品先", "発注金額"
+    ]
+}
+
+NGRAM_MODEL_PATH = "classifier/ngram_model.npz"
+
+VENDOR_TEXT_PATTERN_TYPES = ("company_names", "domains", "addresses")
+
+VENDOR_CONFIG_RESERVED_KEYS = ("description", "default_patterns")
+
+LITERAL_PHONE_PATTERN = re.compile(r"[\d\-\s]+")
+
+PHONE_RUN_PATTERN = re.compile(r"\d(?:[\-\s]?\d)+")
+
+class NoTextLayer(Exception):
+    """テキスト層が無いと判定され、pdfminerによる抽出を行わなかった場合の例外"""
+
+_patterns_cache: Dict[str, "ClassifierPatterns"] = {}
+_patterns_lock = threading.Lock()
+_keyword_patterns: Optional["ClassifierPatterns"] = None
+
+def classify_document(pdf_bytes: bytes, config_loader, context=None) -> Tuple[Optional[str], Optional[str], float]:
     """
     PDFから文書種別とベンダーを判定
     
     Args:
         pdf_bytes: PDFファイルのバイトデータ
         config_loader: 設定ローダー
+        context: 文書コンテキスト（指定時は抽出テキストを保持し、後続ステップで再利用）
         
     Returns:
         (文書種別, ベンダー名, 信頼度スコア)
     """
     try:
-        text = extract_text(
-            BytesIO(pdf_bytes),
-            laparams=LAParams(detect_vertical=True)
-        )
+        if context is None:
+            from .document_context import DocumentContext
+            context = DocumentContext(None, pdf_bytes)
         
-        text_lower = text.lower()
-        text_normalized = normalize_japanese_text(text)
+        settings = config_loader.get_classifier_settings()
+        text_layer_check = settings.get("text_layer_check", {})
+        isolated = settings.get("isolated_extraction", {}).get("enabled", False)
         
-        doc_type = detect_document_type(text_lower, text_normalized)
-        vendor_name = detect_vendor(text, config_loader)
-        confidence = calculate_confidence(doc_type, vendor_name, text)
+        # 隔離ワーカーを使う場合は最初の抽出ジョブの中で確認する（load_page_texts）
+        if not context.has_text and text_layer_check.get("enabled", False) and not isolated:
+            context.text_layer = inspect_text_layer(pdf_bytes, int(text_layer_check.get("max_pages", 3)))
+            if not context.text_layer["has_text_layer"]:
+                raise NoTextLayer()
         
-        logger.info(f"Classification result: type={doc_type}, vendor={vendor_name}, confidence={confidence}")
+        if context.has_text:
+            doc_type, vendor_name, confidence = score_text(context, config_loader)
+        else:
+            context.text_mode = settings.get("text_mode", TEXT_MODE_LAYOUT)
+            doc_type, vendor_name, confidence = extract_and_score(pdf_bytes, config_loader, context, settings)
+            
+            if context.text_mode == TEXT_MODE_FAST and needs_layout_analysis(doc_type, vendor_name, settings):
+                logger.info(f"Re-extracting with layout analysis (type={doc_type}, vendor={vendor_name})")
+                context.text_mode = TEXT_MODE_LAYOUT
+                context.set_page_texts([], 0)
+                doc_type, vendor_name, confidence = extract_and_score(pdf_bytes, config_loader, context, settings)
+        
+        logger.info(
+            f"Classification result: type={doc_type}, vendor={vendor_name}, confidence={confidence}, "
+            f"pages={context.pages_read}/{context.page_count}"
+        )
         return doc_type, vendor_name, confidence
         
+    except NoTextLayer:
+        logger.info(
+            f"No text layer detected in {context.text_layer['elapsed_ms']}ms, skipping pdfminer extraction"
+        )
+        return None, None, 0.0
+        
+    except ExtractionError as e:
+        logger.warning(f"Classification skipped: {str(e)}")
+        return None, None, 0.0
+        
     except Exception as e:
         logger.error(f"Classification error: {str(e)}", exc_info=True)
         return None, None, 0.0
 
-def detect_document_type(text_lower: str, text_normalized: str) -> Optional[str]:
-    """文書種別を判定"""
-    invoice_keywords = [
-        "請求書", "invoice", "bill", "請求番号", "請求金額",
-        "お支払い", "payment", "支払期限", "振込先"
-    ]
+def extract_and_score(
+    pdf_bytes: bytes,
+    config_loader,
+    context,
+    settings: Dict
+) -> Tuple[Optional[str], Optional[str], float]:
+    """設定に応じた方式（ストリーミング／先頭ページ優先／全ページ）でテキストを抽出して分類"""
+    page_bounded = settings.get("page_bounded", {})
+    streaming = settings.get("streaming", {})
     
-    po_keywords = [
-        "発注書", "purchase order", "注文書", "発注番号", "注文番号",
-        "納期", "delivery", "納品先", "発注金額"
+    if streaming.get("enabled", False):
+        stream_options = {
+            "config_dir": str(config_loader.config_dir),
+            "decision_margin": int(streaming.get("decision_margin", 2)),
+            "max_pages": int(streaming.get("max_pages", 0)),
+            "text_mode": context.text_mode
+        }
+        page_texts, page_count = load_page_texts(pdf_bytes, settings, context, stream_options=stream_options)
+        context.set_page_texts(page_texts, page_count)
+        return score_text(context, config_loader)
+    
+    if page_bounded.get("enabled", False):
+        return classify_page_bounded(pdf_bytes, config_loader, context, page_bounded)
+    
+    page_texts, page_count = load_page_texts(pdf_bytes, settings, context)
+    context.set_page_texts(page_texts, page_count)
+    return score_text(context, config_loader)
+
+def needs_layout_analysis(doc_type: Optional[str], vendor_name: Optional[str], settings: Dict) -> bool:
+    """高速モードの結果ではなくレイアウト解析ありで抽出し直すべきか"""
+    if doc_type is None:
+        return True
+    return vendor_name in (settings.get("layout_vendors") or [])
+
+def load_page_texts(
+    pdf_bytes: bytes,
+    settings: Dict,
+    context,
+    page_numbers: Optional[range] = None,
+    stream_options: Optional[Dict] = None
+) -> Tuple[List[str], int]:
+    """
+    分類用にページテキストを抽出（設定により隔離ワーカープロセスで実行）
+    
+    隔離ワーカーで実行する場合、テキスト層をまだ確認していなければ同じジョブの中で先に確認する
+    （信頼できないPDFの解析はすべてワーカー内で行う）。
+    
+    Args:
+        pdf_bytes: PDFファイルのバイトデータ
+        settings: 分類処理設定
+        context: 文書コンテキスト
+        page_numbers: 抽出するページ番号（0始まり、省略時は全ページ）
+        stream_options: 指定時はページを逐次抽出し、判定が確定した時点で打ち切る
+    
+    Raises:
+        ExtractionError: ワーカーでの抽出がタイムアウト・サイズ超過・異常終了した場合
+        NoTextLayer: ワーカーでテキスト層が無いと判定された場合（context.text_layer に結果が入る）
+    """
+    executor_settings = settings.get("isolated_extraction", {})
+    
+    if not executor_settings.get("enabled", False):
+        if stream_options is not None:
+            return stream_page_texts(pdf_bytes, stream_options)
+        return extract_page_texts(pdf_bytes, page_numbers=page_numbers, text_mode=context.text_mode)
+    
+    text_layer_check = settings.get("text_layer_check", {})
+    text_layer_pages = (
+        int(text_layer_check.get("max_pages", 3))
+        if text_layer_check.get("enabled", False) and context.text_layer is None
+        else None
+    )
+    
+    result = get_extraction_executor(executor_settings).extract(
+        pdf_bytes, page_numbers, stream_options, text_mode=context.text_mode, text_layer_pages=text_layer_pages
+    )
+    if not result.ok:
+        context.extraction_failure = result
+        raise ExtractionError(result)
+    
+    if result.text_layer is not None:
+        context.text_layer = result.text_layer
+        if not result.text_layer["has_text_layer"]:
+            raise NoTextLayer()
+    
+    return result.page_texts, result.page_count
+
+def load_remaining_page_texts(pdf_bytes: bytes, settings: Dict, context) -> bool:
+    """
+    分類で読まなかった残りのページテキストを抽出してコンテキストに追加（後続ステップで全文が必要な場合）
+    
+    Returns:
+        全ページのテキストが揃っているか（抽出に失敗した場合はFalse）
+    """
+    if context.is_complete:
+        return True
+    if not pdf_bytes:
+        return False
+    
+    try:
+        if context.has_text and context.page_count:
+            page_texts, page_count = load_page_texts(
+                pdf_bytes, settings, context, page_numbers=range(context.pages_read, context.page_count)
+            )
+            context.extend_page_texts(page_texts, page_count)
+        else:
+            context.set_page_texts(*load_page_texts(pdf_bytes, settings, context))
+    except Exception as e:
+        logger.warning(f"Failed to extract remaining page texts: {str(e)}")
+        return False
+    
+    return context.is_complete
+
+def load_page_lines(pdf_bytes: bytes, settings: Dict) -> Tuple[List[List[tuple]], int]:
+    """
+    テンプレートによるローカル抽出用に位置付きのテキスト行を抽出（設定により隔離ワーカープロセスで実行）
+    
+    Args:
+        pdf_bytes: PDFファイルのバイトデータ
+        settings: 分類処理設定（isolated_extraction のタイムアウト・メモリ上限・サイズ上限に従う）
+    
+    Raises:
+        ExtractionError: ワーカーでの抽出がタイムアウト・サイズ超過・異常終了した場合
+    """
+    executor_settings = settings.get("isolated_extraction", {})
+    
+    if not executor_settings.get("enabled", False):
+        return extract_page_lines(pdf_bytes)
+    
+    result = get_extraction_executor(executor_settings).extract_lines(pdf_bytes)
+    if not result.ok:
+        raise ExtractionError(result)
+    
+    return result.page_lines, result.page_count
+
+def stream_page_texts(pdf_bytes: bytes, stream_options: Dict) -> Tuple[List[str], int]:
+    """
+    ページを1枚ずつ抽出しながらキーワードとベンダーを照合し、両方が確定した時点で打ち切る
+    
+    Args:
+        pdf_bytes: PDFファイルのバイトデータ
+        stream_options: config_dir / decision_margin / max_pages / text_mode
+        
+    Returns:
+        (読み込んだページのテキストリスト, 総ページ数)
+    """
+    from .config_loader import ConfigLoader
+    
+    patterns = get_classifier_patterns(ConfigLoader(stream_options["config_dir"]))
+    margin = stream_options.get("decision_margin", 2)
+    max_pages = stream_options.get("max_pages", 0)
+    text_mode = stream_options.get("text_mode", TEXT_MODE_LAYOUT)
+    
+    keyword_hits: Dict[str, Set[str]] = {doc_type: set() for doc_type in DOC_TYPE_KEYWORDS}
+    vendor_hits: Set[int] = set()
+    page_texts: List[str] = []
+    page_count = 0
+    
+    for page_text, page_count in iter_page_texts(pdf_bytes, text_mode=text_mode):
+        page_texts.append(page_text)
+        
+        page_keywords, page_vendors = patterns.scan(fold_text(page_text))
+        for doc_type, hits in page_keywords.items():
+            keyword_hits[doc_type] |= hits
+        vendor_hits |= page_vendors | patterns.scan_phones(page_text)
+        
+        if vendor_hits and is_document_type_decided(keyword_hits, margin):
+            logger.debug(f"Streaming classification decided after {len(page_texts)}/{page_count} pages")
+            break
+        if max_pages > 0 and len(page_texts) >= max_pages:
+            break
+    
+    return page_texts, page_count
+
+def is_document_type_decided(keyword_hits: Dict[str, Set[str]], margin: int) -> bool:
+    """文書種別のキーワード数が十分な差で確定しているか"""
+    scores = sorted((len(hits) for hits in keyword_hits.values()), reverse=True)
+    runner_up = scores[1] if len(scores) > 1 else 0
+    return scores[0] >= 2 and scores[0] - runner_up >= margin
+
+def classify_page_bounded(
+    pdf_bytes: bytes,
+    config_loader,
+    context,
+    page_bounded: Dict
+) -> Tuple[Optional[str], Optional[str], float]:
+    """
+    先頭Nページだけで分類し、信頼度が閾値未満の場合のみ読み込みページを増やす
+    
+    Args:
+        pdf_bytes: PDFファイルのバイトデータ
+        config_loader: 設定ローダー
+        context: 文書コンテキスト（読み込んだページテキストを蓄積）
+        page_bounded: page_bounded 設定
+        
+    Returns:
+        (文書種別, ベンダー名, 信頼度スコア)
+    """
+    settings = config_loader.get_classifier_settings()
+    pages_to_read = max(int(page_bounded.get("initial_pages", 2)), 1)
+    threshold = float(page_bounded.get("confidence_threshold", 0.8))
+    factor = max(int(page_bounded.get("escalation_factor", 2)), 2)
+    
+    while True:
+        page_texts, page_count = load_page_texts(
+            pdf_bytes,
+            settings,
+            context,
+            page_numbers=range(context.pages_read, pages_to_read)
+        )
+        context.extend_page_texts(page_texts, page_count)
+        
+        doc_type, vendor_name, confidence = score_text(context, config_loader)
+        
+        if confidence >= threshold or context.pages_read >= context.page_count:
+            return doc_type, vendor_name, confidence
+        
+        logger.debug(
+            f"Confidence {confidence} below {threshold} after {context.pages_read} pages, reading more"
+        )
+        pages_to_read = min(pages_to_read * factor, context.page_count)
+
+def score_text(context, config_loader) -> Tuple[Optional[str], Optional[str], float]:
+    """抽出済みテキストから文書種別・ベンダー・信頼度を算出（キーワードとベンダーを1回の走査で検出）"""
+    patterns = get_classifier_patterns(config_loader)
+    text_folded = fold_text(context.text_normalized)
+    keyword_hits, vendor_hits = patterns.scan(text_folded)
+    
+    doc_type = score_document_type(keyword_hits)
+    
+    settings = config_loader.get_classifier_settings()
+    if settings.get("backend") == "ngram":
+        predictions = predict_document_types([text_folded], config_loader, settings.get("ngram", {}))
+        if predictions is not None:
+            doc_type = predictions[0][0]
+    vendor_name = patterns.resolve_vendor(vendor_hits, context.text)
+    if vendor_name is None:
+        vendor_name = extract_vendor_from_text(context.text, config_loader)
+    
+    confidence = calculate_confidence(doc_type, vendor_name, context.text)
+    return doc_type, vendor_name, confidence
+
+class ClassifierPatterns:
+    """文書種別キーワードとベンダーパターンから構築した一括マッチャー"""
+    
+    def __init__(self, vendor_config: Dict):
+        """
+        Args:
+            vendor_config: ベンダー分類設定（classifier/vendors.yaml）
+        """
+        self.vendor_names: List[str] = []
+        self.phone_group_vendors: Dict[str, int] = {}
+        self._phone_alternatives: List[str] = []
+        self.phone_digits = AhoCorasickMatcher()
+        self.automaton = AhoCorasickMatcher()
+        
+        for doc_type, keywords in DOC_TYPE_KEYWORDS.items():
+            for keyword in keywords:
+                self.automaton.add(fold_text(keyword), ("keyword", doc_type, keyword))
+        
+        for vendor_name, patterns in (vendor_config or {}).items():
+            if vendor_name in VENDOR_CONFIG_RESERVED_KEYS or not isinstance(patterns, dict):
+                continue
+            
+            vendor_index = len(self.vendor_names)
+            self.vendor_names.append(vendor_name)
+            
+            for pattern_type in VENDOR_TEXT_PATTERN_TYPES:
+                for pattern in patterns.get(pattern_type) or []:
+                    self.automaton.add(fold_text(str(pattern)), ("vendor", vendor_index))
+            
+            for phone in patterns.get("phone_patterns") or []:
+                self._add_phone_pattern(vendor_index, str(phone))
+        
+        self.automaton.build()
+        self.phone_digits.build()
+        self.phone_regex = (
+            re.compile("|".join(self._phone_alternatives)) if self._phone_alternatives else None
+        )
+        logger.info(
+            f"Built classifier patterns: {len(self.vendor_names)} vendors, "
+            f"{self.automaton.pattern_count} text patterns, "
+            f"{self.phone_digits.pattern_count + len(self.phone_group_vendors)} phone patterns"
+        )
+    
+    def _add_phone_pattern(self, vendor_index: int, phone: str):
+        """
+        電話番号パターンを登録
+        
+        数字と区切り文字だけのパターンは数字列のオートマトンに、
+        それ以外（正規表現を含むもの）は名前付きグループの結合正規表現に入れる。
+        """
+        if LITERAL_PHONE_PATTERN.fullmatch(phone):
+            self.phone_digits.add(re.sub(r"\D", "", phone), vendor_index)
+            return
+        
+        phone_regex = phone.replace("-", r"[\-\s]?")
+        
+        try:
+            re.compile(phone_regex)
+        except re.error as e:
+            logger.warning(f"Invalid phone pattern '{phone}' for {self.vendor_names[vendor_index]}: {str(e)}")
+            return
+        
+        group_name = f"p{len(self.phone_group_vendors)}"
+        self.phone_group_vendors[group_name] = vendor_index
+        self._phone_alternatives.append(f"(?P<{group_name}>{phone_regex})")
+    
+    def scan_phones(self, text: str) -> Set[int]:
+        """テキスト中の電話番号らしき数字列を1回走査し、一致したベンダーのインデックスを返す"""
+        vendor_hits: Set[int] = set()
+        
+        if self.phone_digits.pattern_count:
+            for match in PHONE_RUN_PATTERN.finditer(text):
+                digits = re.sub(r"\D", "", match.group())
+                vendor_hits.update(self.phone_digits.find_all(digits))
+        
+        if self.phone_regex is not None:
+            vendor_hits.update(
+                self.phone_group_vendors[match.lastgroup]
+                for match in self.phone_regex.finditer(text)
+                if match.lastgroup in self.phone_group_vendors
+            )
+        
+        return vendor_hits
+    
+    def scan(self, text_folded: str) -> Tuple[Dict[str, Set[str]], Set[int]]:
+        """
+        正規化済みテキストを1回走査してキーワードとベンダーの一致を収集
+        
+        Returns:
+            (文書種別ごとの一致キーワード, 一致したベンダーのインデックス)
+        """
+        keyword_hits: Dict[str, Set[str]] = {doc_type: set() for doc_type in DOC_TYPE_KEYWORDS}
+        vendor_hits: Set[int] = set()
+        
+        for payload in self.automaton.find_all(text_folded):
+            if payload[0] == "keyword":
+                keyword_hits[payload[1]].add(payload[2])
+            else:
+                vendor_hits.add(payload[1])
+        
+        return keyword_hits, vendor_hits
+    
+    def resolve_vendor(self, vendor_hits: Set[int], text: str) -> Optional[str]:
+        """設定順で最初に一致したベンダーを返す（電話番号パターンも考慮）"""
+        all_hits = vendor_hits | self.scan_phones(text)
+        
+        if all_hits:
+            return self.vendor_names[min(all_hits)]
+        
+        return None
+
+def predict_document_types(
+    texts_folded: List[str],
+    config_loader,
+    ngram_settings: Dict
+) -> Optional[List[Tuple[Optional[str], float]]]:
+    """
+    n-gram線形モデルで複数テキストの文書種別を一括判定
+    
+    Args:
+        texts_folded: fold_text で正規化済みのテキストリスト
+        config_loader: 設定ローダー
+        ngram_settings: classifier/settings.yaml の ngram 設定
+        
+    Returns:
+        (文書種別, 確率) のリスト。確率が min_probability 未満なら文書種別はNone。
+        モデルが無い場合はNone
+    """
+    model = get_ngram_classifier(config_loader, ngram_settings.get("model_path", NGRAM_MODEL_PATH))
+    if model is None:
+        return None
+    
+    min_probability = float(ngram_settings.get("min_probability", 0.6))
+    return [
+        (label if probability >= min_probability else None, probability)
+        for label, probability in model.classify_texts(texts_folded)
     ]
+
+def classify_texts(texts: List[str], config_loader) -> List[Tuple[Optional[str], float]]:
+    """
+    抽出済みテキストの文書種別を一括判定（バックフィル用）
     
-    invoice_score = sum(1 for kw in invoice_keywords if kw in text_lower or kw in text_normalized)
-    po_score = sum(1 for kw in po_keywords if kw in text_lower or kw in text_normalized)
+    n-gramモデルがあれば1回のベクトル演算でまとめて判定し、無ければキーワード判定を行う。
+    
+    Returns:
+        (文書種別, 確率または信頼度) のリスト
+    """
+    texts_folded = [fold_text(text) for text in texts]
+    ngram_settings = config_loader.get_classifier_settings().get("ngram", {})
+    
+    predictions = predict_document_types(texts_folded, config_loader, ngram_settings)
+    if predictions is not None:
+        return predictions
+    
+    results = []
+    for text, text_folded in zip(texts, texts_folded):
+        keyword_hits, _ = get_keyword_patterns().scan(text_folded)
+        doc_type = score_document_type(keyword_hits)
+        results.append((doc_type, calculate_confidence(doc_type, None, text)))
+    
+    return results
+
+def find_keyword_pages(page_texts: List[str], doc_type: Optional[str], config_loader) -> List[int]:
+    """文書種別のキーワードが出現するページ番号（1始まり）"""
+    if not doc_type:
+        return []
+    
+    patterns = get_classifier_patterns(config_loader)
+    keyword_pages = []
+    for page_number, page_text in enumerate(page_texts, start=1):
+        keyword_hits, _ = patterns.scan(fold_text(page_text))
+        if keyword_hits.get(doc_type):
+            keyword_pages.append(page_number)
+    
+    return keyword_pages
+
+def get_classifier_patterns(config_loader) -> ClassifierPatterns:
+    """ベンダー設定から構築したマッチャーを取得（設定内容が変わるまで再利用）"""
+    fingerprint = config_loader.get_config_fingerprint(["classifier/vendors.yaml"])
+    
+    patterns = _patterns_cache.get(fingerprint)
+    if patterns is not None:
+        return patterns
+    
+    with _patterns_lock:
+        patterns = _patterns_cache.get(fingerprint)
+        if patterns is None:
+            patterns = ClassifierPatterns(config_loader.get_vendor_config())
+            _patterns_cache.clear()
+            _patterns_cache[fingerprint] = patterns
+    
+    return patterns
+
+def get_keyword_patterns() -> ClassifierPatterns:
+    """文書種別キーワードだけのマッチャーを取得（ベンダー設定に依存しないため初回に構築して共有）"""
+    global _keyword_patterns
+    
+    if _keyword_patterns is not None:
+        return _keyword_patterns
+    
+    with _patterns_lock:
+        if _keyword_patterns is None:
+            _keyword_patterns = ClassifierPatterns({})
+    
+    return _keyword_patterns
+
+def fold_text(text: str) -> str:
+    """照合用にテキストを正規化・小文字化"""
+    return normalize_japanese_text(text).lower()
+
+def score_document_type(keyword_hits: Dict[str, Set[str]]) -> Optional[str]:
+    """一致キーワード数から文書種別を判定"""
+    invoice_score = len(keyword_hits.get("INVOICE", ()))
+    po_score = len(keyword_hits.get("PURCHASE_ORDER", ()))
     
     if invoice_score > po_score and invoice_score >= 2:
         return "INVOICE"
@@ -60,57 +567,59 @@ def detect_document_type(text_lower: str, text_normalized: str) -> Optional[str]
     
     return None
 
+def detect_document_type(text_lower: str, text_normalized: str) -> Optional[str]:
+    """文書種別を判定"""
+    keyword_hits, _ = get_keyword_patterns().scan(fold_text(text_normalized))
+    return score_document_type(keyword_hits)
+
 def detect_vendor(text: str, config_loader) -> Optional[str]:
     """ベンダーを判定"""
     try:
-        vendor_config = config_loader.get_vendor_config()
-        if not vendor_config:
-            return None
-        
-        for vendor_name, patterns in vendor_config.items():
-            for pattern_type, pattern_list in patterns.items():
-                if pattern_type == "company_names":
-                    for name in pattern_list:
-                        if name in text:
-                            return vendor_name
-                            
-                elif pattern_type == "phone_patterns":
-                    for phone in pattern_list:
-                        phone_regex = phone.replace("-", r"[\-\s]?")
-                        if re.search(phone_regex, text):
-                            return vendor_name
-                            
-                elif pattern_type == "domains":
-                    for domain in pattern_list:
-                        if domain in text:
-                            return vendor_name
-                            
-                elif pattern_type == "addresses":
-                    for addr in pattern_list:
-                        if addr in text:
-                            return vendor_name
-        
-        return extract_vendor_from_text(text)
+        patterns = get_classifier_patterns(config_loader)
+        _, vendor_hits = patterns.scan(fold_text(text))
+        
+        vendor_name = patterns.resolve_vendor(vendor_hits, text)
+        if vendor_name:
+            return vendor_name
+        
+        return extract_vendor_from_text(text, config_loader)
         
     except Exception as e:
         logger.warning(f"Vendor detection error: {str(e)}")
         return None
 
-def extract_vendor_from_text(text: str) -> Optional[str]:
-    """テキストから直接ベンダー名を抽出する試み"""
-    company_patterns = [
-        r"(株式会社[\s　]*[\u4e00-\u9faf\u3040-\u309f\u30a0-\u30ff]+)",
-        r"([\u4e00-\u9faf\u3040-\u309f\u30a0-\u30ff]+[\s　]*株式会社)",
-        r"(合同会社[\s　]*[\u4e00-\u9faf\u3040-\u309f\u30a0-\u30ff]+)",
-        r"(有限会社[\s　]*[\u4e00-\u9faf\u3040-\u309f\u30a0-\u30ff]+)"
-    ]
+COMPANY_NAME_PATTERNS = [
+    re.compile(r"(株式会社[\s　]*[\u4e00-\u9faf\u3040-\u309f\u30a0-\u30ff]+)"),
+    re.compile(r"([\u4e00-\u9faf\u3040-\u309f\u30a0-\u30ff]+[\s　]*株式会社)"),
+    re.compile(r"(合同会社[\s　]*[\u4e00-\u9faf\u3040-\u309f\u30a0-\u30ff]+)"),
+    re.compile(r"(有限会社[\s　]*[\u4e00-\u9faf\u3040-\u309f\u30a0-\u30ff]+)"),
+    re.compile(r"((?:㈱|㈲|[(（][株有][)）])[\s　]*[\u4e00-\u9faf\u3040-\u309f\u30a0-\u30ff]+)")
+]
+
+def extract_vendor_from_text(text: str, config_loader=None) -> Optional[str]:
+    """
+    テキストから直接ベンダー名を抽出する試み
     
-    for pattern in company_patterns:
-        match = re.search(pattern, text)
-        if match:
-            return match.group(1).strip()
+    config_loader を渡した場合は、本文中の社名候補をすべてベンダー名索引で照合し、
+    登録済みベンダーに解決できた最初の候補の正規名を返す。
+    解決できない場合（または索引を使わない場合）は最初に見つかった社名をそのまま返す。
+    """
+    candidates = []
+    for pattern in COMPANY_NAME_PATTERNS:
+        for match in pattern.finditer(text):
+            candidate = match.group(1).strip()
+            if candidate not in candidates:
+                candidates.append(candidate)
     
-    return None
+    if config_loader is not None and candidates:
+        index = get_vendor_index(config_loader)
+        for candidate in candidates:
+            resolved = index.resolve(candidate)
+            if resolved is not None:
+                logger.debug(f"Resolved vendor candidate '{candidate}' to '{resolved[0]}' (similarity={resolved[1]:.2f})")
+                return resolved[0]
+    
+    return candidates[0] if candidates else None
 
 def normalize_japanese_text(text: str) -> str:
     """日本語テキストの正規化"""
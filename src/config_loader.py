@@ -1,12 +1,18 @@
 import logging
 import os
 import json
+import hashlib
+import threading
 import yaml
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# 設定ファイルごとの内容ハッシュ（パス → (更新時刻, サイズ, ハッシュ)。更新時刻かサイズが変わるまで再利用）
+_file_digests: Dict[str, Tuple[int, int, str]] = {}
+_file_digests_lock = threading.Lock()
+
 class ConfigLoader:
     """設定ファイルのローダー"""
     
@@ -66,6 +72,28 @@ class ConfigLoader:
         
         return mapping_config
     
+    def get_extraction_config(self, doc_type: str, vendor_name: Optional[str] = None) -> Dict:
+        """Document Intelligence抽出設定（マッピング設定の extraction セクション）を取得"""
+        return self.get_mapping_config(doc_type, vendor_name).get("extraction") or {}
+    
+    def get_local_extraction_rules(self, doc_type: str, vendor_name: Optional[str]) -> Dict:
+        """ベンダーテンプレートのローカル抽出ルール（ベンダーマッピングの local_extraction セクション）を取得"""
+        if not vendor_name:
+            return {}
+        
+        cache_key = f"local_extraction_{vendor_name}_{doc_type}"
+        
+        if cache_key in self._cache:
+            return self._cache[cache_key]
+        
+        vendor_config = self._load_yaml(f"mapping/vendors/{vendor_name}/{doc_type}.yaml") or {}
+        rules = vendor_config.get("local_extraction") or {}
+        if rules.get("enabled") is False:
+            rules = {}
+        
+        self._cache[cache_key] = rules
+        return rules
+    
     def get_validation_rules(self) -> Dict:
         """検証ルールを取得"""
         cache_key = "validation_rules"
@@ -90,6 +118,18 @@ class ConfigLoader:
         self._cache[cache_key] = config
         return config
     
+    def get_classifier_settings(self) -> Dict:
+        """分類処理設定を取得"""
+        cache_key = "classifier_settings"
+        
+        if cache_key in self._cache:
+            return self._cache[cache_key]
+        
+        settings = self._load_yaml("classifier/settings.yaml") or {}
+        
+        self._cache[cache_key] = settings
+        return settings
+    
     def get_entity_dictionary(self) -> Dict:
         """エンティティ辞書を取得"""
         cache_key = "entity_dictionary"
@@ -102,6 +142,22 @@ class ConfigLoader:
         self._cache[cache_key] = dictionary
         return dictionary
     
+    def get_config_fingerprint(self, relative_paths: List[str]) -> str:
+        """
+        設定ファイル内容のフィンガープリントを取得（派生データのキャッシュ無効化用）
+        
+        ファイルごとの内容ハッシュは更新時刻とサイズが変わるまで再利用する（ページ単位で呼ばれても読み直さない）。
+        """
+        hasher = hashlib.sha256()
+        
+        for relative_path in relative_paths:
+            hasher.update(relative_path.encode("utf-8"))
+            digest = get_file_digest(self.config_dir / relative_path)
+            if digest is not None:
+                hasher.update(digest.encode("utf-8"))
+        
+        return hasher.hexdigest()[:16]
+    
     def _load_yaml(self, relative_path: str) -> Optional[Dict]:
         """YAMLファイルを読み込む"""
         file_path = self.config_dir / relative_path
@@ -196,4 +252,22 @@ class ConfigLoader:
             if not mapping_file.exists():
                 issues["warnings"].append(f"Default mapping for {doc_type} not found")
         
-        return issues
\ No newline at end of file
+        return issues
+
+def get_file_digest(file_path: Path) -> Optional[str]:
+    """ファイル内容のハッシュ（更新時刻とサイズが前回と同じなら読み直さない。無ければNone）"""
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
+        return None
+    
+    key = str(file_path)
+    with _file_digests_lock:
+        cached = _file_digests.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    
+    digest = hashlib.sha256(file_path.read_bytes()).hexdigest()
+    with _file_digests_lock:
+        _file_digests[key] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
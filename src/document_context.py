@@ -0,0 +1,88 @@
+import logging
+from typing import List, Optional
+from .classify import normalize_japanese_text
+
+logger = logging.getLogger(__name__)
+
+class DocumentContext:
+    """1文書分の処理コンテキスト（抽出テキストをパイプラインの各ステップで共有）"""
+    
+    def __init__(self, blob_name: str, pdf_bytes: bytes):
+        """
+        Args:
+            blob_name: 処理対象のBLOB名
+            pdf_bytes: PDFファイルのバイトデータ
+        """
+        self.blob_name = blob_name
+        self.pdf_bytes = pdf_bytes
+        self.page_texts: List[str] = []
+        self.page_count = 0
+        self._text: Optional[str] = None
+        self._text_lower: Optional[str] = None
+        self._text_normalized: Optional[str] = None
+        self.extraction_failure = None
+        self.text_layer: Optional[dict] = None
+        self.text_source = "pdfminer"
+        self.text_mode = "layout"
+    
+    def set_page_texts(self, page_texts: List[str], page_count: int):
+        """抽出済みのページテキストを設定"""
+        self.page_texts = list(page_texts)
+        self.page_count = page_count
+        self._text = None
+        self._text_lower = None
+        self._text_normalized = None
+        logger.debug(f"Context text set for {self.blob_name}: {len(self.page_texts)}/{page_count} pages")
+    
+    def extend_page_texts(self, page_texts: List[str], page_count: int):
+        """追加で抽出したページテキストを末尾に追加"""
+        self.set_page_texts(self.page_texts + list(page_texts), page_count)
+    
+    @property
+    def pages_read(self) -> int:
+        """テキスト抽出済みのページ数"""
+        return len(self.page_texts)
+    
+    @property
+    def is_complete(self) -> bool:
+        """全ページのテキストが抽出済みかどうか"""
+        return self.has_text and self.pages_read >= self.page_count
+    
+    @property
+    def needs_ocr(self) -> bool:
+        """テキスト層が無くOCRが必要と判定されたかどうか"""
+        return self.text_layer is not None and not self.text_layer.get("has_text_layer", True) and not self.has_text
+    
+    @property
+    def has_text(self) -> bool:
+        """テキストが抽出済みかどうか"""
+        return bool(self.page_texts)
+    
+    @property
+    def text(self) -> str:
+        """抽出テキスト全体"""
+        if self._text is None:
+            self._text = "".join(self.page_texts)
+        return self._text
+    
+    @property
+    def text_lower(self) -> str:
+        """小文字化したテキスト"""
+        if self._text_lower is None:
+            self._text_lower = self.text.lower()
+        return self._text_lower
+    
+    @property
+    def text_normalized(self) -> str:
+        """正規化したテキスト"""
+        if self._text_normalized is None:
+            self._text_normalized = normalize_japanese_text(self.text)
+        return self._text_normalized
+    
+    def summary(self) -> dict:
+        """レポート・成果物用の概要"""
+        return {
+            "page_count": self.page_count,
+            "pages_read": self.pages_read,
+            "text_length": len(self.text)
+        }
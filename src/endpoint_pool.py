@@ -0,0 +1,312 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+ROUTING_WEIGHTED = "weighted"
+ROUTING_LEAST_OUTSTANDING = "least_outstanding"
+
+DEFAULT_WINDOW_SIZE = 20
+DEFAULT_MIN_CALLS = 5
+DEFAULT_EJECT_THROTTLE_RATE = 0.5
+DEFAULT_EJECT_ERROR_RATE = 0.5
+DEFAULT_EJECT_SECONDS = 30.0
+DEFAULT_MAX_OPERATION_SECONDS = 120.0
+LATENCY_WINDOW = 200
+
+class Endpoint:
+    """Document Intelligenceのリソース1つ分（エンドポイント・APIキー・重みと直近の状態）"""
+    
+    def __init__(self, name: str, url: str, api_key: str, weight: float = 1.0, rate_scope: Optional[str] = None):
+        """
+        Args:
+            name: 統計・ログ用の名前
+            url: エンドポイントURL
+            api_key: APIキー
+            weight: 振り分けの重み
+            rate_scope: レート制限を分ける単位（Noneならプロセス共通のレート制限）
+        """
+        self.name = name
+        self.url = url.rstrip("/")
+        self.origin = url_origin(self.url)
+        self.path = urlparse(self.url).path
+        self.api_key = api_key
+        self.weight = max(float(weight), 0.01)
+        self.rate_scope = rate_scope
+        
+        self.leases = deque()
+        self.current_weight = 0.0
+        self.ejected_until = 0.0
+        self.responses = deque(maxlen=DEFAULT_WINDOW_SIZE)
+        self.request_latencies = deque(maxlen=LATENCY_WINDOW)
+        self.operation_latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counters = {"requests": 0, "throttled": 0, "errors": 0, "operations": 0, "failed_operations": 0, "ejections": 0}
+    
+    @property
+    def outstanding(self) -> int:
+        """実行中の解析操作数"""
+        return len(self.leases)
+
+class EndpointPool:
+    """
+    複数のDocument Intelligenceリソースへの振り分け
+    
+    weighted: 重み付きラウンドロビン（重みの比で順に振り分ける）
+    least_outstanding: 実行中の解析操作数 / 重み が最も小さいリソースに振り分ける
+    直近のレスポンスの429率・エラー率が閾値を超えたリソースは eject_seconds の間振り分けから外す。
+    max_operation_seconds 経っても release されない操作（別プロセスで完了した操作など）は実行中から外す。
+    """
+    
+    def __init__(
+        self,
+        endpoints: List[Endpoint],
+        routing: str = ROUTING_WEIGHTED,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        min_calls: int = DEFAULT_MIN_CALLS,
+        eject_throttle_rate: float = DEFAULT_EJECT_THROTTLE_RATE,
+        eject_error_rate: float = DEFAULT_EJECT_ERROR_RATE,
+        eject_seconds: float = DEFAULT_EJECT_SECONDS,
+        max_operation_seconds: float = DEFAULT_MAX_OPERATION_SECONDS
+    ):
+        """
+        Args:
+            endpoints: 振り分け先
+            routing: 振り分け方式（weighted / least_outstanding）
+            window_size: 429率・エラー率を計算する直近のレスポンス数
+            min_calls: 判定に必要な最小レスポンス数
+            eject_throttle_rate: この割合以上が429なら振り分けから外す
+            eject_error_rate: この割合以上が5xx・接続エラーなら振り分けから外す
+            eject_seconds: 振り分けから外す秒数
+            max_operation_seconds: 解析操作を実行中として数える最大秒数
+        """
+        self.endpoints = endpoints
+        self.routing = routing
+        self.min_calls = max(min_calls, 1)
+        self.eject_throttle_rate = eject_throttle_rate
+        self.eject_error_rate = eject_error_rate
+        self.eject_seconds = eject_seconds
+        self.max_operation_seconds = max_operation_seconds
+        
+        for endpoint in endpoints:
+            endpoint.responses = deque(maxlen=max(window_size, self.min_calls))
+        
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> Endpoint:
+        """
+        解析を送信するリソースを選び、実行中の操作数を増やす
+        
+        Returns:
+            リソース（送信後は必ず release を呼ぶこと）。全て外れている場合は復帰が最も早いもの
+        """
+        with self._lock:
+            now = time.time()
+            self._expire_leases(now)
+            healthy = [endpoint for endpoint in self.endpoints if endpoint.ejected_until <= now]
+            if not healthy:
+                healthy = [min(self.endpoints, key=lambda endpoint: endpoint.ejected_until)]
+            
+            if self.routing == ROUTING_LEAST_OUTSTANDING:
+                chosen = min(healthy, key=lambda endpoint: endpoint.outstanding / endpoint.weight)
+            else:
+                total = sum(endpoint.weight for endpoint in healthy)
+                for endpoint in healthy:
+                    endpoint.current_weight += endpoint.weight
+                chosen = max(healthy, key=lambda endpoint: endpoint.current_weight)
+                chosen.current_weight -= total
+            
+            chosen.leases.append(now)
+            return chosen
+    
+    def release(self, endpoint: Endpoint, success: bool, elapsed_seconds: float):
+        """解析操作の終了を記録（送信から結果取得までの時間）"""
+        with self._lock:
+            if endpoint.leases:
+                endpoint.leases.popleft()
+            endpoint.counters["operations"] += 1
+            if success:
+                endpoint.operation_latencies.append(elapsed_seconds * 1000)
+            else:
+                endpoint.counters["failed_operations"] += 1
+    
+    def get(self, name: Optional[str]) -> Optional[Endpoint]:
+        """名前（解析操作の記録に保存したもの）からリソースを取得"""
+        return next((endpoint for endpoint in self.endpoints if endpoint.name == name), None)
+    
+    def find(self, url: str) -> Optional[Endpoint]:
+        """URL（送信先やOperation-Location）が属するリソース（スキーム・ホスト・ポートとパスの先頭で比較）"""
+        origin = url_origin(url)
+        path = urlparse(url).path
+        for endpoint in self.endpoints:
+            if origin == endpoint.origin and (path == endpoint.path or path.startswith(endpoint.path + "/")):
+                return endpoint
+        return None
+    
+    def record_response(self, endpoint: Endpoint, status_code: Optional[int], elapsed_seconds: float):
+        """
+        HTTPレスポンス1件を記録し、429率・エラー率が閾値を超えたら振り分けから外す
+        
+        Args:
+            endpoint: リソース
+            status_code: ステータスコード（接続エラーの場合はNone）
+            elapsed_seconds: リクエストの所要時間
+        """
+        throttled = status_code == 429
+        error = status_code is None or status_code >= 500 and not throttled
+        
+        with self._lock:
+            endpoint.counters["requests"] += 1
+            endpoint.counters["throttled"] += int(throttled)
+            endpoint.counters["errors"] += int(error)
+            endpoint.request_latencies.append(elapsed_seconds * 1000)
+            endpoint.responses.append((throttled, error))
+            
+            if endpoint.ejected_until > time.time() or len(endpoint.responses) < self.min_calls:
+                return
+            
+            calls = len(endpoint.responses)
+            throttle_rate = sum(1 for is_throttled, _ in endpoint.responses if is_throttled) / calls
+            error_rate = sum(1 for _, is_error in endpoint.responses if is_error) / calls
+            
+            if throttle_rate >= self.eject_throttle_rate or error_rate >= self.eject_error_rate:
+                endpoint.ejected_until = time.time() + self.eject_seconds
+                endpoint.counters["ejections"] += 1
+                endpoint.responses.clear()
+                logger.warning(
+                    f"Ejecting Document Intelligence endpoint {endpoint.name} for {self.eject_seconds:.0f}s "
+                    f"(429 rate {throttle_rate:.2f}, error rate {error_rate:.2f})"
+                )
+    
+    def snapshot(self) -> List[Dict]:
+        """リソースごとの重み・実行中の操作数・429率・エラー率・所要時間（容量計画用）"""
+        with self._lock:
+            now = time.time()
+            self._expire_leases(now)
+            return [
+                {
+                    "name": endpoint.name,
+                    "weight": endpoint.weight,
+                    "outstanding": endpoint.outstanding,
+                    **endpoint.counters,
+                    "throttle_rate": round(endpoint.counters["throttled"] / endpoint.counters["requests"], 3)
+                    if endpoint.counters["requests"] else 0.0,
+                    "error_rate": round(endpoint.counters["errors"] / endpoint.counters["requests"], 3)
+                    if endpoint.counters["requests"] else 0.0,
+                    "request_p50_ms": percentile(endpoint.request_latencies, 0.5),
+                    "request_p95_ms": percentile(endpoint.request_latencies, 0.95),
+                    "operation_p50_ms": percentile(endpoint.operation_latencies, 0.5),
+                    "operation_p95_ms": percentile(endpoint.operation_latencies, 0.95),
+                    "ejected": endpoint.ejected_until > now,
+                    "ejected_for_seconds": round(max(endpoint.ejected_until - now, 0.0), 1)
+                }
+                for endpoint in self.endpoints
+            ]
+    
+    def _expire_leases(self, now: float):
+        for endpoint in self.endpoints:
+            while endpoint.leases and now - endpoint.leases[0] >= self.max_operation_seconds:
+                endpoint.leases.popleft()
+
+def percentile(values, ratio: float) -> Optional[float]:
+    """ratio（0〜1）の位置の値（最近傍法、値が無ければNone）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(int(len(ordered) * ratio), len(ordered) - 1)], 1)
+
+def url_origin(url: str) -> tuple:
+    """URLのスキーム・ホスト・ポート（大文字小文字と既定ポートの違いは無視する）"""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    default_port = {"http": 80, "https": 443}.get(scheme)
+    return scheme, (parsed.hostname or "").lower(), port if port is not None else default_port
+
+def parse_weight(value: str, url: str) -> float:
+    """重みの環境変数の値（0以上の数値でなければ警告して1）"""
+    try:
+        weight = float(value)
+    except ValueError:
+        weight = None
+    if weight is None or not math.isfinite(weight) or weight < 0:
+        logger.warning(f"Invalid weight {value!r} for Document Intelligence endpoint {url}, using 1")
+        return 1.0
+    return weight
+
+def split_setting(value: str) -> List[str]:
+    """カンマ区切りの環境変数を分割"""
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+_pool: Optional[EndpointPool] = None
+_pool_key: Optional[tuple] = None
+_pool_lock = threading.Lock()
+
+def get_endpoint_pool() -> Optional[EndpointPool]:
+    """
+    Document Intelligenceのリソースの振り分けを取得（プロセス内で共有）
+    
+    環境変数:
+        DOCUMENT_INTELLIGENCE_ENDPOINTS: カンマ区切りのエンドポイント（未設定なら DOCUMENT_INTELLIGENCE_ENDPOINT の1つ）
+        DOCUMENT_INTELLIGENCE_API_KEYS: エンドポイントと同じ順のAPIキー（1つだけなら全リソース共通）
+        DOCUMENT_INTELLIGENCE_ENDPOINT_WEIGHTS: エンドポイントと同じ順の重み（既定はすべて1）
+        DOCUMENT_INTELLIGENCE_ROUTING: weighted / least_outstanding（既定 weighted）
+        DOCUMENT_INTELLIGENCE_EJECT_THROTTLE_RATE / DOCUMENT_INTELLIGENCE_EJECT_ERROR_RATE: 振り分けから外す429率・エラー率
+        DOCUMENT_INTELLIGENCE_EJECT_SECONDS: 振り分けから外す秒数（既定 30）
+        DOCUMENT_INTELLIGENCE_TIMEOUT: 解析操作を実行中として数える最大秒数（解析の上限秒数と同じ）
+        
+    Returns:
+        振り分け（エンドポイントが設定されていない場合はNone）
+    """
+    global _pool, _pool_key
+    
+    urls = split_setting(os.environ.get("DOCUMENT_INTELLIGENCE_ENDPOINTS", ""))
+    api_keys = split_setting(os.environ.get("DOCUMENT_INTELLIGENCE_API_KEYS", ""))
+    if not urls:
+        urls = split_setting(os.environ.get("DOCUMENT_INTELLIGENCE_ENDPOINT", ""))
+        api_keys = [os.environ.get("DOCUMENT_INTELLIGENCE_API_KEY", "")]
+    
+    if not urls:
+        return None
+    
+    if len(api_keys) == 1:
+        api_keys = api_keys * len(urls)
+    if len(api_keys) != len(urls) or not all(api_keys):
+        logger.error("DOCUMENT_INTELLIGENCE_API_KEYS must list one key, or one key per endpoint")
+        return None
+    
+    weights = split_setting(os.environ.get("DOCUMENT_INTELLIGENCE_ENDPOINT_WEIGHTS", "")) or ["1"] * len(urls)
+    if len(weights) != len(urls):
+        logger.warning("DOCUMENT_INTELLIGENCE_ENDPOINT_WEIGHTS does not match the endpoints, using equal weights")
+        weights = ["1"] * len(urls)
+    
+    options = {
+        "routing": os.environ.get("DOCUMENT_INTELLIGENCE_ROUTING", ROUTING_WEIGHTED).lower(),
+        "eject_throttle_rate": float(os.environ.get("DOCUMENT_INTELLIGENCE_EJECT_THROTTLE_RATE", DEFAULT_EJECT_THROTTLE_RATE)),
+        "eject_error_rate": float(os.environ.get("DOCUMENT_INTELLIGENCE_EJECT_ERROR_RATE", DEFAULT_EJECT_ERROR_RATE)),
+        "eject_seconds": float(os.environ.get("DOCUMENT_INTELLIGENCE_EJECT_SECONDS", DEFAULT_EJECT_SECONDS)),
+        "max_operation_seconds": float(os.environ.get("DOCUMENT_INTELLIGENCE_TIMEOUT", DEFAULT_MAX_OPERATION_SECONDS))
+    }
+    key = (tuple(urls), tuple(api_keys), tuple(weights), tuple(sorted(options.items())))
+    
+    with _pool_lock:
+        if _pool is not None and _pool_key == key:
+            return _pool
+        
+        endpoints = []
+        for url, api_key, weight in zip(urls, api_keys, weights):
+            name = urlparse(url).netloc or url
+            endpoints.append(Endpoint(name, url, api_key, parse_weight(weight, url), rate_scope=name if len(urls) > 1 else None))
+        
+        _pool = EndpointPool(endpoints, **options)
+        _pool_key = key
+        logger.info(f"Endpoint pool initialized ({[endpoint.name for endpoint in endpoints]}, {options})")
+        return _pool
@@ -1,72 +1,792 @@
 import logging
 import os
+import random
+import re
+import threading
 import time
-from typing import Dict, Any, Optional
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, List, Tuple
 import requests
 from io import BytesIO
+from .analyze_result_stream import parse_operation_result
+from .circuit_breaker import get_circuit_breaker
+from .endpoint_pool import get_endpoint_pool
+from .http_session import count_requests, get_session
+from .extraction_cache import get_extraction_cache, make_cache_key
+from .rate_limiter import RateLimitTimeout, get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
-def extract_with_document_intelligence(pdf_bytes: bytes, doc_type: str) -> Optional[Dict[str, Any]]:
+class AnalysisRequestError(Exception):
+    """解析の送信が失敗レスポンスで終わった（status は失敗の分類）"""
+    
+    def __init__(self, status: str, message: str):
+        super().__init__(message)
+        self.status = status
+
+OCR_MODEL_ID = "prebuilt-read"
+API_VERSION = "2023-07-31"
+LOCALE = "ja-JP"
+
+DEFAULT_TIMEOUT_SECONDS = 120.0
+SUBMIT_TIMEOUT_SECONDS = 30.0
+POLL_INITIAL_INTERVAL = 0.25
+POLL_MAX_INTERVAL = 5.0
+POLL_BACKOFF_FACTOR = 1.6
+
+RETRYABLE_STATUS_CODES = (429, 503)
+RETRY_BASE_DELAY = 1.0
+DEFAULT_MAX_RETRIES = 5
+
+# サービス側の障害とみなす解析結果の status（サーキットブレーカーで失敗として数える）
+# client_error（4xx）・failed（文書自体の解析失敗）・error（想定外の例外）は数えない
+SERVICE_FAILURE_STATUSES = ("timeout", "throttled", "server_error", "transport_error")
+
+HEADER_CELL_KINDS = ("columnHeader", "stubHead")
+
+PAGES_ALL = "all"
+PAGES_AUTO = "auto"
+PAGE_RANGE_PATTERN = re.compile(r"^\d+(-\d+)?(,\d+(-\d+)?)*$")
+
+# このAPIバージョン以降は /documentintelligence パスを使う（それより前は /formrecognizer）
+DOCUMENT_INTELLIGENCE_PATH_VERSION = "2024-02-29-preview"
+
+# モデルごとに保持する直近の結果取得時間の件数
+MODEL_LATENCY_WINDOW = 200
+
+def extract_with_document_intelligence(
+    pdf_bytes: bytes,
+    doc_type: str,
+    timeout_seconds: Optional[float] = None,
+    metrics: Optional[Dict[str, Any]] = None,
+    force_refresh: bool = False,
+    pages: Optional[str] = None,
+    extraction_config: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
     """
     Azure AI Document Intelligenceを使用してPDFからデータを抽出
     
     Args:
         pdf_bytes: PDFファイルのバイトデータ
         doc_type: 文書種別（INVOICE or PURCHASE_ORDER）
+        timeout_seconds: 送信から結果取得までの上限秒数（省略時は環境変数 DOCUMENT_INTELLIGENCE_TIMEOUT）
+        metrics: 指定時はポーリング回数・結果取得までの時間などを書き込む
+        force_refresh: Trueなら抽出結果キャッシュを使わずに解析し直す
+        pages: 解析するページ範囲（例: "1-3"。省略時は全ページ）
+        extraction_config: マッピング設定の extraction セクション（model_id / api_version / features）
         
     Returns:
         抽出された生データ（辞書形式）
     """
-    endpoint = os.environ.get("DOCUMENT_INTELLIGENCE_ENDPOINT", "").rstrip("/")
-    api_key = os.environ.get("DOCUMENT_INTELLIGENCE_API_KEY", "")
+    model_id, api_version, features = resolve_model(doc_type, extraction_config)
+    analyze_result = analyze_document_cached(
+        pdf_bytes, model_id, timeout_seconds, metrics, force_refresh, pages, api_version, features
+    )
+    
+    if analyze_result is None:
+        return None
+    
+    return process_extraction_result(analyze_result, doc_type)
+
+def extract_text_with_ocr(pdf_bytes: bytes, force_refresh: bool = False) -> Optional[Tuple[List[str], int]]:
+    """
+    テキスト層の無いPDF（スキャン画像）を読み取りモデルでOCRし、ページ単位のテキストを取得
     
-    if not endpoint or not api_key:
+    Returns:
+        (ページごとのテキストリスト, 総ページ数)。失敗時はNone
+    """
+    analyze_result = analyze_document_cached(pdf_bytes, OCR_MODEL_ID, force_refresh=force_refresh)
+    
+    if analyze_result is None:
+        return None
+    
+    page_texts = []
+    for page in analyze_result.get("pages", []):
+        lines = [line.get("content", "") for line in page.get("lines", [])]
+        page_texts.append("\n".join(lines) + "\n\f")
+    
+    logger.info(f"OCR extracted text from {len(page_texts)} pages")
+    return page_texts, len(page_texts)
+
+def analyze_document_cached(
+    pdf_bytes: bytes,
+    model_id: str,
+    timeout_seconds: Optional[float] = None,
+    metrics: Optional[Dict[str, Any]] = None,
+    force_refresh: bool = False,
+    pages: Optional[str] = None,
+    api_version: str = API_VERSION,
+    features: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    抽出結果キャッシュを確認し、無ければ解析してanalyzeResultを保存
+    
+    キャッシュキーはPDF内容のハッシュ・モデルID・APIバージョン・ロケール・ページ範囲・追加機能の組み合わせ。
+    環境変数 EXTRACTION_CACHE_FORCE_REFRESH=true でも強制的に解析し直す。
+    """
+    cache = get_extraction_cache()
+    if cache is None:
+        return analyze_document(pdf_bytes, model_id, timeout_seconds, metrics, pages, api_version, features)
+    
+    force_refresh = is_force_refresh(force_refresh)
+    key = make_cache_key(pdf_bytes, model_id, api_version, LOCALE, pages, features)
+    
+    if not force_refresh:
+        cached = cache.get(key)
+        if cached is not None:
+            record_cache_hit(metrics, model_id, api_version)
+            return cached
+    
+    analyze_result = analyze_document(pdf_bytes, model_id, timeout_seconds, metrics, pages, api_version, features)
+    if metrics is not None:
+        metrics["cache"] = "refresh" if force_refresh else "miss"
+    
+    if analyze_result is not None:
+        cache.put(key, analyze_result, cache_metadata(model_id, api_version, pages, features))
+    
+    return analyze_result
+
+def is_force_refresh(force_refresh: bool) -> bool:
+    """抽出結果キャッシュを使わずに解析し直すか（引数か環境変数 EXTRACTION_CACHE_FORCE_REFRESH=true）"""
+    return force_refresh or os.environ.get("EXTRACTION_CACHE_FORCE_REFRESH", "false").lower() == "true"
+
+def cache_metadata(model_id: str, api_version: str, pages: Optional[str], features: Optional[str]) -> Dict[str, Any]:
+    """抽出結果キャッシュのエントリに添える解析条件"""
+    return {
+        "model_id": model_id,
+        "api_version": api_version,
+        "locale": LOCALE,
+        "pages": pages,
+        "features": features
+    }
+
+def record_cache_hit(metrics: Optional[Dict[str, Any]], model_id: str, api_version: str):
+    """抽出結果キャッシュのヒットをログとメトリクスに記録"""
+    logger.info(f"Extraction cache hit (model: {model_id})")
+    if metrics is not None:
+        metrics["model_id"] = model_id
+        metrics["api_version"] = api_version
+        metrics["cache"] = "hit"
+
+def analyze_document(
+    pdf_bytes: bytes,
+    model_id: str,
+    timeout_seconds: Optional[float] = None,
+    metrics: Optional[Dict[str, Any]] = None,
+    pages: Optional[str] = None,
+    api_version: str = API_VERSION,
+    features: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Document Intelligenceに解析を依頼し、完了まで待ってanalyzeResultを返す
+    
+    Args:
+        pdf_bytes: PDFファイルのバイトデータ
+        model_id: 使用するモデルID
+        timeout_seconds: 送信から結果取得までの上限秒数（省略時は環境変数 DOCUMENT_INTELLIGENCE_TIMEOUT）
+        metrics: 指定時はポーリング回数・結果取得までの時間などを書き込む
+        pages: 解析するページ範囲（省略時は全ページ）
+        api_version: APIバージョン
+        features: 追加機能（カンマ区切り、例: "keyValuePairs"）
+        
+    Returns:
+        analyzeResult（失敗時はNone）
+    """
+    pool = get_endpoint_pool()
+    
+    if pool is None:
         logger.error("Document Intelligence credentials not configured")
         return None
     
+    breaker = get_circuit_breaker()
+    permit = breaker.allow_request() if breaker is not None else None
+    if breaker is not None and permit is None:
+        logger.warning("Document Intelligence circuit breaker is open, failing fast")
+        if metrics is not None:
+            metrics["status"] = "circuit_open"
+        return None
+    
+    endpoint = pool.acquire()
+    if metrics is not None:
+        metrics["endpoint"] = endpoint.name
+    
+    started = time.monotonic()
+    analyze_result = None
+    status = "error"
     try:
-        model_id = get_model_id(doc_type)
+        analyze_result, status = submit_and_poll(
+            pdf_bytes, model_id, endpoint.url, endpoint.api_key, timeout_seconds, metrics, pages, api_version, features
+        )
+    finally:
+        elapsed = time.monotonic() - started
+        pool.release(endpoint, analyze_result is not None, elapsed)
+        if breaker is not None:
+            breaker.record(not is_service_failure(status), elapsed, permit)
+    
+    return analyze_result
+
+def submit_and_poll(
+    pdf_bytes: bytes,
+    model_id: str,
+    endpoint: str,
+    api_key: str,
+    timeout_seconds: Optional[float],
+    metrics: Optional[Dict[str, Any]],
+    pages: Optional[str],
+    api_version: str = API_VERSION,
+    features: Optional[str] = None
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    解析を送信して結果が出るまでポーリング
+    
+    Returns:
+        (analyzeResult（失敗時はNone）, status)。status は succeeded / failed / timeout / throttled /
+        client_error / server_error / transport_error / error
+    """
+    if timeout_seconds is None:
+        timeout_seconds = get_default_timeout()
+    
+    started = time.monotonic()
+    deadline = started + timeout_seconds
+    
+    if metrics is not None:
+        metrics.setdefault("throttle_wait_ms", 0.0)
+        metrics.setdefault("throttled_responses", 0)
+    
+    try:
+        operation_location, first_delay = submit_analysis(
+            pdf_bytes, model_id, endpoint, api_key, deadline, metrics, pages, api_version, features
+        )
         
-        analyze_url = f"{endpoint}/formrecognizer/documentModels/{model_id}:analyze"
-        params = {
-            "api-version": "2023-07-31",
-            "locale": "ja-JP"
-        }
-        headers = {
-            "Ocp-Apim-Subscription-Key": api_key,
-            "Content-Type": "application/pdf"
-        }
+        result, status = poll_for_result(
+            operation_location,
+            api_key,
+            deadline=deadline,
+            first_delay=first_delay,
+            metrics=metrics
+        )
+        return complete_analysis(result, status, model_id, api_version, started, metrics)
+    
+    except AnalysisRequestError as e:
+        logger.error(str(e))
+        status = e.status
+    
+    except RateLimitTimeout as e:
+        logger.error(f"Document Intelligence request throttled until deadline: {str(e)}")
+        status = "throttled"
+    
+    except requests.RequestException as e:
+        logger.error(f"Document Intelligence connection error: {str(e)}")
+        status = "transport_error"
+            
+    except Exception as e:
+        logger.error(f"Document Intelligence extraction error: {str(e)}", exc_info=True)
+        status = "error"
+    
+    if metrics is not None:
+        metrics["status"] = status
+    return None, status
+
+def submit_analysis(
+    pdf_bytes: bytes,
+    model_id: str,
+    endpoint: str,
+    api_key: str,
+    deadline: float,
+    metrics: Optional[Dict[str, Any]] = None,
+    pages: Optional[str] = None,
+    api_version: str = API_VERSION,
+    features: Optional[str] = None
+) -> Tuple[str, Optional[float]]:
+    """
+    解析を送信する（結果は待たない）
+    
+    Returns:
+        (Operation-Location, 最初のポーリングまでの秒数。Retry-After が無ければNone)
+    
+    Raises:
+        AnalysisRequestError: 送信が受け付けられなかった場合（status に失敗の分類）
+    """
+    analyze_url, params, headers = build_analyze_request(endpoint, api_key, model_id, pages, api_version, features)
+    
+    logger.info(
+        f"Sending document to Document Intelligence "
+        f"(model: {model_id}, api-version: {api_version}, pages: {pages or PAGES_ALL})"
+    )
+    response = send_request(
+        "POST",
+        analyze_url,
+        deadline,
+        metrics,
+        params=params,
+        headers=headers,
+        data=pdf_bytes,
+        timeout=SUBMIT_TIMEOUT_SECONDS
+    )
+    
+    return read_submit_response(
+        response.status_code, response.headers, response.text if response.status_code != 202 else ""
+    )
+
+def read_submit_response(status_code: int, headers, body: str = "") -> Tuple[str, Optional[float]]:
+    """
+    解析の送信レスポンスから Operation-Location と最初のポーリングまでの秒数を取り出す
+    
+    Args:
+        status_code: レスポンスのステータスコード
+        headers: レスポンスヘッダー
+        body: 失敗時のレスポンス本文（エラーメッセージ用）
+    
+    Raises:
+        AnalysisRequestError: 送信が受け付けられなかった場合（status に失敗の分類）
+    """
+    if status_code != 202:
+        raise AnalysisRequestError(
+            classify_failed_response(status_code),
+            f"Failed to start analysis: {status_code} - {body}"
+        )
+    
+    operation_location = headers.get("Operation-Location")
+    if not operation_location:
+        raise AnalysisRequestError("server_error", "No operation location returned")
+    
+    return operation_location, parse_retry_after(headers.get("Retry-After"))
+
+def complete_analysis(
+    result: Optional[Dict[str, Any]],
+    status: str,
+    model_id: str,
+    api_version: str,
+    started: float,
+    metrics: Optional[Dict[str, Any]]
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    ポーリングを終えた解析の所要時間を記録し、analyzeResult を取り出す
+    
+    Returns:
+        (analyzeResult（成功以外はNone）, status)
+    """
+    elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+    if metrics is not None:
+        metrics["model_id"] = model_id
+        metrics["api_version"] = api_version
+        metrics["time_to_result_ms"] = elapsed_ms
+    
+    if status == "succeeded":
+        record_model_latency(model_id, api_version, elapsed_ms)
+        return result.get("analyzeResult", {}), status
+    
+    logger.error(f"Analysis did not succeed: {status}")
+    return None, status
+
+def submit_document(
+    pdf_bytes: bytes,
+    doc_type: str,
+    metrics: Optional[Dict[str, Any]] = None,
+    force_refresh: bool = False,
+    pages: Optional[str] = None,
+    extraction_config: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    抽出結果キャッシュを確認し、無ければ解析を送信だけして戻る（ポーリングは operation_poller が行う）
+    
+    送信に成功した操作はリソースの実行中の枠とサーキットブレーカーの送信許可を持ったまま戻り、
+    ポーラーが finish_operation で結果を一度だけ記録して枠を返す。
+    
+    Args:
+        pdf_bytes: PDFファイルのバイトデータ
+        doc_type: 文書種別
+        metrics: 指定時は cache / status などを書き込む
+        force_refresh: Trueなら抽出結果キャッシュを使わずに解析し直す
+        pages: 解析するページ範囲（省略時は全ページ）
+        extraction_config: マッピング設定の extraction セクション（model_id / api_version / features）
         
-        logger.info(f"Sending document to Document Intelligence (model: {model_id})")
-        response = requests.post(
-            analyze_url,
-            params=params,
-            headers=headers,
-            data=pdf_bytes,
-            timeout=30
+    Returns:
+        status が cached（analyze_result あり）/ submitted（operation あり）/ failed の辞書
+    """
+    model_id, api_version, features = resolve_model(doc_type, extraction_config)
+    metrics = metrics if metrics is not None else {}
+    metrics["model_id"] = model_id
+    metrics["api_version"] = api_version
+    
+    cache = get_extraction_cache()
+    force_refresh = is_force_refresh(force_refresh)
+    cache_key = make_cache_key(pdf_bytes, model_id, api_version, LOCALE, pages, features) if cache else None
+    
+    if cache is not None and not force_refresh:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            record_cache_hit(metrics, model_id, api_version)
+            return {"status": "cached", "analyze_result": cached}
+        metrics["cache"] = "miss"
+    elif cache is not None:
+        metrics["cache"] = "refresh"
+    
+    pool = get_endpoint_pool()
+    if pool is None:
+        logger.error("Document Intelligence credentials not configured")
+        return {"status": "failed"}
+    
+    breaker = get_circuit_breaker()
+    permit = breaker.allow_request() if breaker is not None else None
+    if breaker is not None and permit is None:
+        logger.warning("Document Intelligence circuit breaker is open, failing fast")
+        metrics["status"] = "circuit_open"
+        return {"status": "failed"}
+    
+    endpoint = pool.acquire()
+    metrics["endpoint"] = endpoint.name
+    
+    started = time.monotonic()
+    submitted = None
+    status = "error"
+    try:
+        submitted = submit_analysis(
+            pdf_bytes, model_id, endpoint.url, endpoint.api_key, started + SUBMIT_TIMEOUT_SECONDS,
+            metrics, pages, api_version, features
         )
+        status = "submitted"
+    except AnalysisRequestError as e:
+        logger.error(str(e))
+        status = e.status
+    except RateLimitTimeout as e:
+        logger.error(f"Document Intelligence request throttled: {str(e)}")
+        status = "throttled"
+    except requests.RequestException as e:
+        logger.error(f"Document Intelligence connection error: {str(e)}")
+        status = "transport_error"
+    except Exception as e:
+        logger.error(f"Document Intelligence submit error: {str(e)}", exc_info=True)
+    
+    if submitted is None:
+        pool.release(endpoint, False, time.monotonic() - started)
+        if breaker is not None:
+            breaker.record(not is_service_failure(status), time.monotonic() - started, permit)
+        metrics["status"] = status
+        return {"status": "failed"}
+    
+    operation_location, first_delay = submitted
+    metrics["status"] = "submitted"
+    return {
+        "status": "submitted",
+        "operation": {
+            "operation_location": operation_location,
+            "endpoint": endpoint.name,
+            "breaker_permit": permit,
+            "first_delay": first_delay,
+            "model_id": model_id,
+            "api_version": api_version,
+            "features": features,
+            "pages": pages,
+            "cache_key": cache_key
+        }
+    }
+
+def check_operation(operation_location: str, metrics: Optional[Dict[str, Any]] = None) -> Tuple[str, Optional[Dict], Optional[float]]:
+    """
+    非同期操作の状態を1回だけ確認（待機しない）
+    
+    Returns:
+        (状態, analyzeResult（succeeded の場合）, Retry-After 秒数)
+        状態はサービスの notStarted / running / succeeded / failed か、
+        確認できなかった場合の throttled / server_error / client_error / transport_error
+    """
+    pool = get_endpoint_pool()
+    endpoint = pool.find(operation_location) if pool is not None else None
+    api_key = endpoint.api_key if endpoint is not None else get_credentials()[1]
+    headers = {"Ocp-Apim-Subscription-Key": api_key}
+    
+    try:
+        with send_request(
+            "GET", operation_location, time.monotonic() + 10, metrics, headers=headers, timeout=10, stream=True
+        ) as response:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            
+            if response.status_code != 200:
+                logger.warning(f"Operation status check failed: {response.status_code}")
+                return classify_failed_response(response.status_code), None, retry_after
+            
+            result = parse_operation_result(response)
+    except RateLimitTimeout as e:
+        logger.warning(f"Operation status check throttled: {str(e)}")
+        return "throttled", None, None
+    except requests.RequestException as e:
+        logger.warning(f"Operation status check connection error: {str(e)}")
+        return "transport_error", None, None
+    
+    status = result.get("status") or "error"
+    if status == "failed":
+        logger.error(f"Analysis failed: {result.get('error')}")
+    
+    return status, result.get("analyzeResult", {}) if status == "succeeded" else None, retry_after
+
+def finish_operation(operation: Dict[str, Any], status: str, elapsed_seconds: float):
+    """
+    送信した解析操作の結果を、送信時に確保したリソースの枠とサーキットブレーカーに一度だけ記録
+    
+    Args:
+        operation: submit_document が返した operation（endpoint にリソース名、breaker_permit にサーキットブレーカーの送信許可を持つ）
+        status: 操作の最終状態（succeeded / failed / timeout / client_error など）
+        elapsed_seconds: 送信から完了までの秒数
+    """
+    pool = get_endpoint_pool()
+    if pool is not None:
+        endpoint = pool.get(operation.get("endpoint")) or pool.find(operation["operation_location"])
+        if endpoint is not None:
+            pool.release(endpoint, status == "succeeded", elapsed_seconds)
+    
+    breaker = get_circuit_breaker()
+    if breaker is not None:
+        breaker.record(not is_service_failure(status), elapsed_seconds, operation.get("breaker_permit"))
+
+def store_operation_result(operation: Dict[str, Any], analyze_result: Dict[str, Any]):
+    """ポーラーが取得したanalyzeResultを抽出結果キャッシュに保存"""
+    cache = get_extraction_cache()
+    if cache is None or not operation.get("cache_key"):
+        return
+    
+    cache.put(
+        operation["cache_key"],
+        analyze_result,
+        cache_metadata(operation.get("model_id"), operation.get("api_version"), operation.get("pages"), operation.get("features"))
+    )
+
+def send_request(
+    method: str,
+    url: str,
+    deadline: float,
+    metrics: Optional[Dict[str, Any]] = None,
+    **kwargs
+) -> requests.Response:
+    """
+    レート制限の送信枠を確保してからリクエストを送り、429/503 は Retry-After に従って再送
+    
+    Args:
+        method: HTTPメソッド
+        url: 送信先URL
+        deadline: time.monotonic() 基準の打ち切り時刻（これを超える待ちはせず最後のレスポンスを返す）
+        metrics: 指定時は throttle_wait_ms / throttled_responses と http（リクエスト数・新規接続数）を加算する
         
-        if response.status_code != 202:
-            logger.error(f"Failed to start analysis: {response.status_code} - {response.text}")
-            return None
+    送信先のリソース（複数リソースに振り分けている場合）ごとにレート制限を分け、
+    レスポンスの状態をリソースの健全性として記録する。
+    
+    Raises:
+        RateLimitTimeout: 期限までに送信枠を確保できなかった場合
+    """
+    pool = get_endpoint_pool()
+    endpoint = pool.find(url) if pool is not None else None
+    limiter = get_rate_limiter(endpoint.rate_scope if endpoint is not None else None)
+    attempt = 0
+    
+    while True:
+        if limiter is not None:
+            record_throttle(metrics, wait_seconds=limiter.acquire(deadline))
         
-        operation_location = response.headers.get("Operation-Location")
-        if not operation_location:
-            logger.error("No operation location returned")
-            return None
+        sent_at = time.monotonic()
+        try:
+            with count_requests(metrics):
+                response = get_session().request(method, url, **kwargs)
+        except requests.RequestException:
+            if endpoint is not None:
+                pool.record_response(endpoint, None, time.monotonic() - sent_at)
+            raise
+        
+        if endpoint is not None:
+            pool.record_response(endpoint, response.status_code, time.monotonic() - sent_at)
         
-        result = poll_for_result(operation_location, api_key)
+        wait = next_retry_wait(response.status_code, response.headers, attempt, deadline, metrics)
+        if wait is None:
+            return response
         
-        if result and result.get("status") == "succeeded":
-            return process_extraction_result(result.get("analyzeResult", {}), doc_type)
+        attempt += 1
+        response.close()
+        
+        if limiter is not None:
+            limiter.block_for(wait)
         else:
-            logger.error(f"Analysis failed: {result}")
+            time.sleep(wait)
+            record_throttle(metrics, wait_seconds=wait)
+
+def next_retry_wait(
+    status_code: int,
+    headers,
+    attempt: int,
+    deadline: float,
+    metrics: Optional[Dict[str, Any]] = None
+) -> Optional[float]:
+    """
+    429/503 を再送するまでの待ち秒数（同期版・非同期版の送信で共有）
+    
+    再送する場合は警告と429/503の回数を記録する。
+    
+    Args:
+        status_code: レスポンスのステータスコード
+        headers: レスポンスヘッダー（Retry-After を参照）
+        attempt: これまでに再送した回数
+        deadline: time.monotonic() 基準の打ち切り時刻
+        metrics: 指定時は throttled_responses を加算する
+    
+    Returns:
+        待ち秒数（再送しない場合はNone）
+    """
+    max_retries = get_max_retries()
+    if status_code not in RETRYABLE_STATUS_CODES or attempt >= max_retries:
+        return None
+    
+    wait = retry_delay(headers.get("Retry-After"), attempt + 1)
+    if time.monotonic() + wait >= deadline:
+        return None
+    
+    logger.warning(
+        f"Document Intelligence returned {status_code}, retrying in {wait:.2f}s "
+        f"(attempt {attempt + 1}/{max_retries})"
+    )
+    record_throttle(metrics, responses=1)
+    return wait
+
+def retry_delay(retry_after: Optional[str], attempt: int) -> float:
+    """429/503 の再送までの待ち時間（Retry-After が無ければジッター付き指数バックオフ）"""
+    wait = parse_retry_after(retry_after)
+    if wait is not None:
+        return wait
+    return jittered(RETRY_BASE_DELAY * 2 ** attempt)
+
+def classify_failed_response(status_code: int) -> str:
+    """失敗レスポンスのステータスコードを失敗の分類に変換（再送しきれなかった429/503は throttled）"""
+    if status_code in RETRYABLE_STATUS_CODES:
+        return "throttled"
+    if status_code >= 500:
+        return "server_error"
+    return "client_error"
+
+def is_service_failure(status: Optional[str]) -> bool:
+    """サービス側の障害（通信エラー・5xx・429の再送切れ・タイムアウト）による失敗かどうか"""
+    return status in SERVICE_FAILURE_STATUSES
+
+def get_max_retries() -> int:
+    """429/503 を再送する最大回数"""
+    return int(os.environ.get("DOCUMENT_INTELLIGENCE_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+
+def record_throttle(metrics: Optional[Dict[str, Any]], wait_seconds: float = 0.0, responses: int = 0):
+    """レート制限による待ち時間と429/503の回数をメトリクスに加算"""
+    if metrics is None:
+        return
+    metrics["throttle_wait_ms"] = round(metrics.get("throttle_wait_ms", 0.0) + wait_seconds * 1000, 1)
+    metrics["throttled_responses"] = metrics.get("throttled_responses", 0) + responses
+
+def get_credentials() -> Tuple[str, str]:
+    """環境変数からエンドポイントとAPIキーを取得"""
+    endpoint = os.environ.get("DOCUMENT_INTELLIGENCE_ENDPOINT", "").rstrip("/")
+    api_key = os.environ.get("DOCUMENT_INTELLIGENCE_API_KEY", "")
+    return endpoint, api_key
+
+def get_default_timeout() -> float:
+    """送信から結果取得までの既定の上限秒数"""
+    return float(os.environ.get("DOCUMENT_INTELLIGENCE_TIMEOUT", DEFAULT_TIMEOUT_SECONDS))
+
+def get_poll_intervals() -> Tuple[float, float]:
+    """ポーリングの初期間隔と上限間隔"""
+    return (
+        float(os.environ.get("DOCUMENT_INTELLIGENCE_POLL_INTERVAL", POLL_INITIAL_INTERVAL)),
+        float(os.environ.get("DOCUMENT_INTELLIGENCE_POLL_MAX_INTERVAL", POLL_MAX_INTERVAL))
+    )
+
+def build_analyze_request(
+    endpoint: str,
+    api_key: str,
+    model_id: str,
+    pages: Optional[str] = None,
+    api_version: str = API_VERSION,
+    features: Optional[str] = None
+) -> Tuple[str, Dict[str, str], Dict[str, str]]:
+    """解析リクエストのURL・クエリパラメータ・ヘッダー"""
+    service = "documentintelligence" if api_version >= DOCUMENT_INTELLIGENCE_PATH_VERSION else "formrecognizer"
+    analyze_url = f"{endpoint}/{service}/documentModels/{model_id}:analyze"
+    params = {
+        "api-version": api_version,
+        "locale": LOCALE
+    }
+    if pages:
+        params["pages"] = pages
+    if features:
+        params["features"] = features
+    headers = {
+        "Ocp-Apim-Subscription-Key": api_key,
+        "Content-Type": "application/pdf"
+    }
+    return analyze_url, params, headers
+
+def select_pages(
+    extraction_config: Dict[str, Any],
+    page_count: int,
+    keyword_pages: Optional[List[int]] = None
+) -> Optional[str]:
+    """
+    抽出設定から解析するページ範囲（pages パラメータ）を決める
+    
+    Args:
+        extraction_config: マッピング設定の extraction セクション
+        page_count: 文書の総ページ数（不明なら0）
+        keyword_pages: 分類で文書種別のキーワードが出現したページ番号（auto 用）
+        
+    Returns:
+        "1-3" のようなページ範囲（全ページを解析する場合はNone）
+    """
+    pages = extraction_config.get("pages")
+    
+    if pages in (None, "", PAGES_ALL):
+        return None
+    
+    if pages == PAGES_AUTO:
+        pages = select_auto_last_page(extraction_config.get("auto") or {}, keyword_pages)
+        if pages is None:
             return None
-            
-    except Exception as e:
-        logger.error(f"Document Intelligence extraction error: {str(e)}", exc_info=True)
+    
+    if isinstance(pages, int):
+        pages = f"1-{pages}"
+    
+    pages = str(pages).replace(" ", "")
+    if not PAGE_RANGE_PATTERN.match(pages):
+        logger.warning(f"Invalid extraction page range: {pages}, analyzing all pages")
+        return None
+    
+    return clip_page_range(pages, page_count)
+
+def select_auto_last_page(auto_config: Dict[str, Any], keyword_pages: Optional[List[int]]) -> Optional[int]:
+    """キーワードが出現した最後のページに後続ページを足した、解析する最終ページ"""
+    if not keyword_pages:
+        return None
+    
+    last_page = max(keyword_pages) + int(auto_config.get("trailing_pages", 1))
+    last_page = max(last_page, int(auto_config.get("min_pages", 1)))
+    
+    max_pages = int(auto_config.get("max_pages", 0))
+    if max_pages > 0:
+        last_page = min(last_page, max_pages)
+    
+    return last_page
+
+def clip_page_range(pages: str, page_count: int) -> Optional[str]:
+    """総ページ数を超える部分を除いたページ範囲（全ページを含む場合はNone）"""
+    if page_count <= 0:
+        return pages
+    
+    parts = []
+    selected = set()
+    for part in pages.split(","):
+        start, _, end = part.partition("-")
+        start, end = int(start), min(int(end or start), page_count)
+        if start < 1 or start > end:
+            continue
+        parts.append(f"{start}-{end}" if end > start else str(start))
+        selected.update(range(start, end + 1))
+    
+    if not parts or len(selected) >= page_count:
         return None
+    
+    return ",".join(parts)
 
 def get_model_id(doc_type: str) -> str:
     """文書種別に応じたモデルIDを取得"""
@@ -76,34 +796,204 @@ def get_model_id(doc_type: str) -> str:
     }
     return model_map.get(doc_type, "prebuilt-document")
 
-def poll_for_result(operation_location: str, api_key: str, max_attempts: int = 30) -> Optional[Dict]:
+def resolve_model(doc_type: str, extraction_config: Optional[Dict[str, Any]] = None) -> Tuple[str, str, Optional[str]]:
+    """
+    抽出設定から解析に使うモデルを決める
+    
+    Args:
+        doc_type: 文書種別
+        extraction_config: マッピング設定の extraction セクション
+        
+    Returns:
+        (モデルID, APIバージョン, 追加機能のカンマ区切り文字列またはNone)
+    """
+    extraction_config = extraction_config or {}
+    model_id = extraction_config.get("model_id") or get_model_id(doc_type)
+    api_version = str(extraction_config.get("api_version") or API_VERSION)
+    
+    features = extraction_config.get("features") or []
+    if isinstance(features, str):
+        features = features.split(",")
+    features = list(dict.fromkeys(feature.strip() for feature in features if feature and feature.strip()))
+    
+    return model_id, api_version, ",".join(features) or None
+
+_model_latencies: Dict[str, deque] = {}
+_model_latencies_lock = threading.Lock()
+
+def record_model_latency(model_id: str, api_version: str, elapsed_ms: float):
+    """モデルごとの結果取得時間を記録（プロセス内で共有）"""
+    key = f"{model_id}@{api_version}"
+    with _model_latencies_lock:
+        latencies = _model_latencies.get(key)
+        if latencies is None:
+            latencies = _model_latencies[key] = deque(maxlen=MODEL_LATENCY_WINDOW)
+        latencies.append(elapsed_ms)
+
+def get_model_latency_stats() -> Dict[str, Dict[str, float]]:
+    """モデルごとの直近の結果取得時間（件数・平均・p50・p95、ミリ秒）"""
+    with _model_latencies_lock:
+        snapshot = {key: sorted(latencies) for key, latencies in _model_latencies.items()}
+    
+    stats = {}
+    for key, ordered in snapshot.items():
+        stats[key] = {
+            "count": len(ordered),
+            "mean_ms": round(sum(ordered) / len(ordered), 1),
+            "p50_ms": ordered[len(ordered) // 2],
+            "p95_ms": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+        }
+    return stats
+
+def poll_for_result(
+    operation_location: str,
+    api_key: str,
+    deadline: Optional[float] = None,
+    first_delay: Optional[float] = None,
+    metrics: Optional[Dict[str, Any]] = None
+) -> Tuple[Optional[Dict], str]:
     """
     非同期操作の結果をポーリング
+    
+    短い間隔から始めてジッター付きで間隔を広げ、サービスが Retry-After を返した場合はそれに従う。
+    4xx（429以外）が返った場合は回復しないためポーリングを打ち切る。
+    レスポンスはストリーミングで解析し、抽出に使うセクションだけを読み込む（単語・座標・スパンは読み飛ばす）。
+    
+    Args:
+        operation_location: 送信時に返された Operation-Location
+        api_key: APIキー
+        deadline: time.monotonic() 基準の打ち切り時刻（省略時は DOCUMENT_INTELLIGENCE_TIMEOUT 秒後）
+        first_delay: 最初のポーリングまでの待ち時間（送信レスポンスの Retry-After）
+        metrics: 指定時は poll_count / poll_wait_ms / status を書き込む
+        
+    Returns:
+        (操作結果（失敗・タイムアウト時はNone）, status: succeeded / failed / timeout / client_error)
     """
+    if deadline is None:
+        deadline = time.monotonic() + get_default_timeout()
+    
     headers = {"Ocp-Apim-Subscription-Key": api_key}
+    schedule = PollSchedule(deadline, first_delay)
     
-    for attempt in range(max_attempts):
-        time.sleep(2)
+    while True:
+        wait = schedule.next_wait()
+        if wait is None:
+            break
         
-        response = requests.get(operation_location, headers=headers, timeout=10)
-        if response.status_code != 200:
-            logger.warning(f"Polling attempt {attempt + 1} failed: {response.status_code}")
-            continue
+        time.sleep(wait)
+        with send_request(
+            "GET", operation_location, deadline, metrics, headers=headers, timeout=10, stream=True
+        ) as response:
+            if schedule.accept_response(response.status_code, response.headers):
+                schedule.accept_result(parse_operation_result(response))
+    
+    return schedule.finish(metrics)
+
+class PollSchedule:
+    """
+    ポーリングの待ち時間と結果の判定（同期版・非同期版の poll_for_result で共有）
+    
+    短い間隔から始めてジッター付きで間隔を広げ、サービスが Retry-After を返した場合はそれに従う。
+    4xx（429以外）が返った場合と、操作が成功・失敗した場合にポーリングを終える。
+    """
+    
+    def __init__(self, deadline: float, first_delay: Optional[float] = None):
+        """
+        Args:
+            deadline: time.monotonic() 基準の打ち切り時刻
+            first_delay: 最初のポーリングまでの待ち時間（送信レスポンスの Retry-After）
+        """
+        self.deadline = deadline
+        self.interval, self.max_interval = get_poll_intervals()
+        self.delay = first_delay if first_delay is not None else self.interval
+        self.poll_count = 0
+        self.waited = 0.0
+        self.status = "timeout"
+        self.result: Optional[Dict] = None
+        self.done = False
+    
+    def next_wait(self) -> Optional[float]:
+        """次のポーリングまでの待ち秒数（ポーリングを終える場合はNone）"""
+        remaining = self.deadline - time.monotonic()
+        if self.done or remaining <= 0:
+            return None
         
-        result = response.json()
+        wait = min(self.delay, remaining)
+        self.waited += wait
+        self.poll_count += 1
+        
+        self.interval = min(self.interval * POLL_BACKOFF_FACTOR, self.max_interval)
+        self.delay = jittered(self.interval)
+        return wait
+    
+    def accept_response(self, status_code: int, headers) -> bool:
+        """ポーリングのレスポンスの Retry-After とステータスを反映し、本文を読むべきか返す"""
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        if retry_after is not None:
+            self.delay = retry_after
+        
+        if status_code == 200:
+            return True
+        
+        logger.warning(f"Polling attempt {self.poll_count} failed: {status_code}")
+        if classify_failed_response(status_code) == "client_error":
+            self.status = "client_error"
+            self.done = True
+        return False
+    
+    def accept_result(self, result: Dict):
+        """操作の状態を反映（succeeded / failed ならポーリングを終える）"""
         status = result.get("status")
         
         if status == "succeeded":
-            logger.info("Document analysis completed successfully")
-            return result
+            logger.info(f"Document analysis completed successfully after {self.poll_count} polls")
+            self.status, self.result, self.done = status, result, True
         elif status == "failed":
             logger.error(f"Analysis failed: {result.get('error')}")
-            return None
+            self.status, self.done = status, True
+        else:
+            logger.debug(f"Analysis status: {status} (poll {self.poll_count}, next in {self.delay:.2f}s)")
+    
+    def finish(self, metrics: Optional[Dict[str, Any]] = None) -> Tuple[Optional[Dict], str]:
+        """
+        ポーリングの回数・待ち時間・最終状態をメトリクスに書き込む
         
-        logger.debug(f"Analysis status: {status} (attempt {attempt + 1}/{max_attempts})")
+        Returns:
+            (操作結果（失敗・タイムアウト時はNone）, status: succeeded / failed / timeout / client_error)
+        """
+        if not self.done:
+            self.status = "timeout"
+            logger.error(f"Analysis timed out after {self.poll_count} polls")
+        
+        if metrics is not None:
+            metrics["poll_count"] = self.poll_count
+            metrics["poll_wait_ms"] = round(self.waited * 1000, 1)
+            metrics["status"] = self.status
+        
+        return self.result, self.status
+
+def jittered(interval: float) -> float:
+    """ポーリング間隔にジッターを加える（間隔の半分〜全体）"""
+    return interval / 2 + random.uniform(0, interval / 2)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After ヘッダー（秒数またはHTTP日付）を待ち秒数に変換"""
+    if not value:
+        return None
     
-    logger.error("Analysis timed out")
-    return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
 
 def process_extraction_result(analyze_result: Dict, doc_type: str) -> Dict[str, Any]:
     """
@@ -173,32 +1063,83 @@ def extract_tables(tables: list) -> list:
     extracted_tables = []
     
     for table in tables:
-        rows = []
-        current_row = []
-        current_row_idx = 0
-        
-        for cell in table.get("cells", []):
-            row_idx = cell.get("rowIndex", 0)
-            
-            if row_idx != current_row_idx:
-                if current_row:
-                    rows.append(current_row)
-                current_row = []
-                current_row_idx = row_idx
-            
-            current_row.append(cell.get("content", ""))
+        grid = build_table_grid(table)
+        if grid:
+            extracted_tables.append(grid)
+    
+    return extracted_tables
+
+def build_table_grid(table: Dict) -> Optional[Dict[str, Any]]:
+    """
+    セルを行×列のグリッドに展開（セルの並び順に依存せず、1回の走査で配置する）
+    
+    結合セルは、見出しセル（columnHeader / stubHead）は結合範囲全体に、
+    それ以外は縦方向の結合範囲（各行の同じ列）にだけ内容を入れる。
+    グリッドは行ごとのリストを作らず、行優先の1次元リスト（cells[行 * 列数 + 列]）で保持する。
+    
+    見出し行は最初の見出しセルから連続する行まで（それより上の行も含む）とし、
+    改ページなどで途中に繰り返された見出し行は repeated_header_rows に行番号を記録する。
+    
+    Returns:
+        cells（全セル）・header（列ごとの見出し）・header_row_count（先頭の見出し行数）・
+        repeated_header_rows（途中の見出し行）などの辞書。セルが無ければNone
+    """
+    cells = table.get("cells") or []
+    if not cells:
+        return None
+    
+    row_count = table.get("rowCount", 0)
+    column_count = table.get("columnCount", 0)
+    header_rows = set()
+    
+    for cell in cells:
+        row_index = cell.get("rowIndex", 0)
+        row_end = row_index + cell.get("rowSpan", 1)
+        column_end = cell.get("columnIndex", 0) + cell.get("columnSpan", 1)
+        row_count = max(row_count, row_end)
+        column_count = max(column_count, column_end)
+        if cell.get("kind") in HEADER_CELL_KINDS:
+            header_rows.update(range(row_index, row_end))
+    
+    grid = [""] * (row_count * column_count)
+    
+    for cell in cells:
+        content = cell.get("content", "")
+        if not content:
+            continue
         
-        if current_row:
-            rows.append(current_row)
+        row_index = cell.get("rowIndex", 0)
+        column_index = cell.get("columnIndex", 0)
+        column_span = cell.get("columnSpan", 1) if cell.get("kind") in HEADER_CELL_KINDS else 1
         
-        if rows:
-            extracted_tables.append({
-                "rows": rows,
-                "row_count": table.get("rowCount", len(rows)),
-                "column_count": table.get("columnCount", max(len(row) for row in rows) if rows else 0)
-            })
+        for row in range(row_index, row_index + cell.get("rowSpan", 1)):
+            offset = row * column_count + column_index
+            for position in range(offset, offset + column_span):
+                grid[position] = content
     
-    return extracted_tables
+    # 見出しセルの指定が無い表は先頭行を見出しとみなす
+    header_row_count = min(header_rows) if header_rows else 0
+    while header_row_count in header_rows:
+        header_row_count += 1
+    header_row_count = max(header_row_count, 1)
+    
+    header = [
+        next(
+            (grid[row * column_count + column] for row in reversed(range(header_row_count))
+             if grid[row * column_count + column]),
+            ""
+        )
+        for column in range(column_count)
+    ]
+    
+    return {
+        "cells": grid,
+        "header": header,
+        "header_row_count": header_row_count,
+        "repeated_header_rows": sorted(row for row in header_rows if row >= header_row_count),
+        "row_count": row_count,
+        "column_count": column_count
+    }
 
 def extract_key_value_pairs(kv_pairs: list) -> Dict[str, str]:
     """キーバリューペアを抽出"""
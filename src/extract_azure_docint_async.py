@@ -0,0 +1,415 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import aiohttp
+from .analyze_result_stream import parse_operation_result_async
+from .circuit_breaker import get_circuit_breaker
+from .endpoint_pool import Endpoint, EndpointPool, get_endpoint_pool
+from .extract_azure_docint import (
+    API_VERSION,
+    LOCALE,
+    SUBMIT_TIMEOUT_SECONDS,
+    AnalysisRequestError,
+    PollSchedule,
+    build_analyze_request,
+    cache_metadata,
+    complete_analysis,
+    get_default_timeout,
+    is_force_refresh,
+    is_service_failure,
+    next_retry_wait,
+    process_extraction_result,
+    read_submit_response,
+    record_cache_hit,
+    record_throttle,
+    resolve_model
+)
+from .extraction_cache import get_extraction_cache, make_cache_key
+from .rate_limiter import RateLimitTimeout, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 50
+
+class AsyncDocumentIntelligenceClient:
+    """
+    1つのイベントループ上で多数の解析操作を同時に進める非同期クライアント
+    
+    同時に進行する解析操作（送信〜ポーリング完了）の数はセマフォで制限する。
+    セマフォとセッションは実行中のイベントループに結び付くため、async with で開いたときに作る。
+    抽出結果キャッシュ・レート制限の状態ファイルの読み書き（ブロッキングI/O）はスレッドで行い、イベントループを止めない。
+    """
+    
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        endpoint: Optional[str] = None,
+        api_key: Optional[str] = None
+    ):
+        """
+        Args:
+            max_concurrency: 同時に進行させる解析操作の上限（省略時は環境変数 DOCUMENT_INTELLIGENCE_MAX_CONCURRENCY）
+            endpoint: エンドポイント（省略時は環境変数のリソースに振り分ける）
+            api_key: APIキー（endpoint と一緒に指定）
+        """
+        if endpoint and api_key:
+            self.pool: Optional[EndpointPool] = EndpointPool([Endpoint("default", endpoint, api_key)])
+        else:
+            self.pool = get_endpoint_pool()
+        
+        if max_concurrency is None:
+            max_concurrency = int(os.environ.get("DOCUMENT_INTELLIGENCE_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+        self.max_concurrency = max_concurrency
+        
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+    
+    async def __aenter__(self) -> "AsyncDocumentIntelligenceClient":
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=120)
+        self._session = aiohttp.ClientSession(connector=connector)
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def close(self):
+        """セッションを閉じる"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def extract(
+        self,
+        pdf_bytes: bytes,
+        doc_type: str,
+        timeout_seconds: Optional[float] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+        pages: Optional[str] = None,
+        extraction_config: Optional[Dict[str, Any]] = None,
+        force_refresh: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        extract_with_document_intelligence の非同期版（同じ構造の抽出結果を返す）
+        
+        Args:
+            pdf_bytes: PDFファイルのバイトデータ
+            doc_type: 文書種別（INVOICE or PURCHASE_ORDER）
+            timeout_seconds: 送信から結果取得までの上限秒数
+            metrics: 指定時はポーリング回数・結果取得までの時間などを書き込む
+            pages: 解析するページ範囲（省略時は全ページ）
+            extraction_config: マッピング設定の extraction セクション（model_id / api_version / features）
+            force_refresh: Trueなら抽出結果キャッシュを使わずに解析し直す
+            
+        Returns:
+            抽出された生データ（辞書形式）
+        """
+        model_id, api_version, features = resolve_model(doc_type, extraction_config)
+        analyze_result = await self.analyze_document_cached(
+            pdf_bytes, model_id, timeout_seconds, metrics, force_refresh, pages, api_version, features
+        )
+        
+        if analyze_result is None:
+            return None
+        
+        return process_extraction_result(analyze_result, doc_type)
+    
+    async def analyze_document_cached(
+        self,
+        pdf_bytes: bytes,
+        model_id: str,
+        timeout_seconds: Optional[float] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+        force_refresh: bool = False,
+        pages: Optional[str] = None,
+        api_version: str = API_VERSION,
+        features: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """analyze_document_cached の非同期版（キャッシュの読み書きはスレッドで行う）"""
+        cache = get_extraction_cache()
+        if cache is None:
+            return await self.analyze_document(pdf_bytes, model_id, timeout_seconds, metrics, pages, api_version, features)
+        
+        force_refresh = is_force_refresh(force_refresh)
+        key = await asyncio.to_thread(make_cache_key, pdf_bytes, model_id, api_version, LOCALE, pages, features)
+        
+        if not force_refresh:
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                record_cache_hit(metrics, model_id, api_version)
+                return cached
+        
+        analyze_result = await self.analyze_document(
+            pdf_bytes, model_id, timeout_seconds, metrics, pages, api_version, features
+        )
+        if metrics is not None:
+            metrics["cache"] = "refresh" if force_refresh else "miss"
+        
+        if analyze_result is not None:
+            await asyncio.to_thread(cache.put, key, analyze_result, cache_metadata(model_id, api_version, pages, features))
+        
+        return analyze_result
+    
+    async def analyze_document(
+        self,
+        pdf_bytes: bytes,
+        model_id: str,
+        timeout_seconds: Optional[float] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+        pages: Optional[str] = None,
+        api_version: str = API_VERSION,
+        features: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """解析を依頼し、完了まで待ってanalyzeResultを返す（失敗時はNone）"""
+        if self.pool is None:
+            logger.error("Document Intelligence credentials not configured")
+            return None
+        
+        if self._session is None or self._semaphore is None:
+            raise RuntimeError("AsyncDocumentIntelligenceClient must be used with 'async with'")
+        
+        if timeout_seconds is None:
+            timeout_seconds = get_default_timeout()
+        
+        async with self._semaphore:
+            breaker = get_circuit_breaker()
+            permit = breaker.allow_request() if breaker is not None else None
+            if breaker is not None and permit is None:
+                logger.warning("Document Intelligence circuit breaker is open, failing fast")
+                if metrics is not None:
+                    metrics["status"] = "circuit_open"
+                return None
+            
+            endpoint = self.pool.acquire()
+            if metrics is not None:
+                metrics["endpoint"] = endpoint.name
+            
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            started = time.monotonic()
+            analyze_result = None
+            status = "error"
+            try:
+                analyze_result, status = await self._analyze(
+                    endpoint, pdf_bytes, model_id, timeout_seconds, metrics, pages, api_version, features
+                )
+                return analyze_result
+            except AnalysisRequestError as e:
+                logger.error(str(e))
+                status = e.status
+            except RateLimitTimeout as e:
+                logger.error(f"Document Intelligence request throttled until deadline: {str(e)}")
+                status = "throttled"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"Document Intelligence connection error: {str(e) or type(e).__name__}")
+                status = "transport_error"
+            except Exception as e:
+                logger.error(f"Document Intelligence extraction error: {str(e)}", exc_info=True)
+            finally:
+                self.in_flight -= 1
+                elapsed = time.monotonic() - started
+                self.pool.release(endpoint, analyze_result is not None, elapsed)
+                if breaker is not None:
+                    breaker.record(not is_service_failure(status), elapsed, permit)
+            
+            if metrics is not None:
+                metrics["status"] = status
+            return None
+    
+    async def _analyze(
+        self,
+        endpoint: Endpoint,
+        pdf_bytes: bytes,
+        model_id: str,
+        timeout_seconds: float,
+        metrics: Optional[Dict[str, Any]],
+        pages: Optional[str] = None,
+        api_version: str = API_VERSION,
+        features: Optional[str] = None
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        送信してポーリングする（セマフォ取得後に呼ぶ。ポーリングも送信したリソースに対して行う）
+        
+        Returns:
+            (analyzeResult（失敗時はNone）, status)
+            
+        Raises:
+            AnalysisRequestError: 送信が受け付けられなかった場合
+        """
+        started = time.monotonic()
+        deadline = started + timeout_seconds
+        analyze_url, params, headers = build_analyze_request(
+            endpoint.url, endpoint.api_key, model_id, pages, api_version, features
+        )
+        
+        if metrics is not None:
+            metrics.setdefault("throttle_wait_ms", 0.0)
+            metrics.setdefault("throttled_responses", 0)
+        
+        logger.info(f"Sending document to Document Intelligence (model: {model_id}, api-version: {api_version})")
+        async with await self._send(
+            "POST",
+            analyze_url,
+            deadline,
+            metrics,
+            params=params,
+            headers=headers,
+            data=pdf_bytes,
+            timeout=aiohttp.ClientTimeout(total=SUBMIT_TIMEOUT_SECONDS)
+        ) as response:
+            body = await response.text() if response.status != 202 else ""
+            operation_location, first_delay = read_submit_response(response.status, response.headers, body)
+        
+        result, status = await self.poll_for_result(
+            operation_location, endpoint.api_key, deadline, first_delay, metrics
+        )
+        return complete_analysis(result, status, model_id, api_version, started, metrics)
+    
+    async def poll_for_result(
+        self,
+        operation_location: str,
+        api_key: str,
+        deadline: float,
+        first_delay: Optional[float] = None,
+        metrics: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[Dict], str]:
+        """poll_for_result の非同期版（待機中はイベントループを他の文書に譲る）"""
+        headers = {"Ocp-Apim-Subscription-Key": api_key}
+        schedule = PollSchedule(deadline, first_delay)
+        
+        while True:
+            wait = schedule.next_wait()
+            if wait is None:
+                break
+            
+            await asyncio.sleep(wait)
+            async with await self._send(
+                "GET",
+                operation_location,
+                deadline,
+                metrics,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                if schedule.accept_response(response.status, response.headers):
+                    schedule.accept_result(await parse_operation_result_async(response))
+        
+        return schedule.finish(metrics)
+    
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        deadline: float,
+        metrics: Optional[Dict[str, Any]],
+        **kwargs
+    ) -> aiohttp.ClientResponse:
+        """send_request の非同期版（レート制限の待ちと429/503の再送でイベントループを止めない）"""
+        endpoint = self.pool.find(url)
+        limiter = get_rate_limiter(endpoint.rate_scope if endpoint is not None else None)
+        attempt = 0
+        
+        while True:
+            if limiter is not None:
+                await self._acquire(limiter, deadline, metrics)
+            
+            sent_at = time.monotonic()
+            try:
+                response = await self._session.request(method, url, **kwargs)
+            except aiohttp.ClientError:
+                if endpoint is not None:
+                    self.pool.record_response(endpoint, None, time.monotonic() - sent_at)
+                raise
+            
+            if endpoint is not None:
+                self.pool.record_response(endpoint, response.status, time.monotonic() - sent_at)
+            
+            wait = next_retry_wait(response.status, response.headers, attempt, deadline, metrics)
+            if wait is None:
+                return response
+            
+            attempt += 1
+            response.release()
+            
+            if limiter is not None:
+                await asyncio.to_thread(limiter.block_for, wait)
+            else:
+                await asyncio.sleep(wait)
+                record_throttle(metrics, wait_seconds=wait)
+    
+    async def _acquire(self, limiter, deadline: float, metrics: Optional[Dict[str, Any]]):
+        """レート制限の送信枠を確保できるまで非同期に待つ"""
+        while True:
+            wait = await asyncio.to_thread(limiter.try_acquire)
+            if wait <= 0:
+                return
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RateLimitTimeout("Rate limit wait exceeded deadline")
+            
+            wait = min(wait, remaining)
+            await asyncio.sleep(wait)
+            record_throttle(metrics, wait_seconds=wait)
+
+async def extract_with_document_intelligence_async(
+    pdf_bytes: bytes,
+    doc_type: str,
+    client: Optional[AsyncDocumentIntelligenceClient] = None,
+    timeout_seconds: Optional[float] = None,
+    metrics: Optional[Dict[str, Any]] = None,
+    pages: Optional[str] = None,
+    extraction_config: Optional[Dict[str, Any]] = None,
+    force_refresh: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Azure AI Document Intelligenceを使用してPDFからデータを抽出（非同期版）
+    
+    Args:
+        pdf_bytes: PDFファイルのバイトデータ
+        doc_type: 文書種別（INVOICE or PURCHASE_ORDER）
+        client: 共有するクライアント（省略時はこの呼び出し用に作成）
+        timeout_seconds: 送信から結果取得までの上限秒数
+        metrics: 指定時はポーリング回数・結果取得までの時間などを書き込む
+        pages: 解析するページ範囲（省略時は全ページ）
+        extraction_config: マッピング設定の extraction セクション（model_id / api_version / features）
+        force_refresh: Trueなら抽出結果キャッシュを使わずに解析し直す
+        
+    Returns:
+        抽出された生データ（extract_with_document_intelligence と同じ構造）
+    """
+    if client is not None:
+        return await client.extract(
+            pdf_bytes, doc_type, timeout_seconds, metrics, pages, extraction_config, force_refresh
+        )
+    
+    async with AsyncDocumentIntelligenceClient() as own_client:
+        return await own_client.extract(
+            pdf_bytes, doc_type, timeout_seconds, metrics, pages, extraction_config, force_refresh
+        )
+
+async def extract_many(
+    documents: Sequence[Tuple[bytes, str]],
+    max_concurrency: Optional[int] = None,
+    timeout_seconds: Optional[float] = None
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    複数文書を1つのイベントループで並行して抽出
+    
+    Args:
+        documents: (PDFバイトデータ, 文書種別) のリスト
+        max_concurrency: 同時に進行させる解析操作の上限
+        timeout_seconds: 1文書あたりの上限秒数
+        
+    Returns:
+        入力と同じ順序の抽出結果（失敗した文書はNone）
+    """
+    async with AsyncDocumentIntelligenceClient(max_concurrency=max_concurrency) as client:
+        return await asyncio.gather(*(
+            client.extract(pdf_bytes, doc_type, timeout_seconds)
+            for pdf_bytes, doc_type in documents
+        ))
@@ -0,0 +1,226 @@
+import logging
+import os
+import re
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+from .classify import load_page_lines, load_remaining_page_texts
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_LOCAL = "local"
+FALLBACK_NONE = "none"
+
+# 「ラベル: 値」「ラベル：値」形式の行
+KEY_VALUE_LINE_PATTERN = re.compile(r"^[ \t　]*(?P<key>[^\s:：][^:：\n]{0,30}?)[ \t　]*[:：][ \t　]*(?P<value>\S[^\n]*?)[ \t　]*$", re.M)
+
+# 同じ行とみなす上端y座標の差（pt）
+DEFAULT_ROW_TOLERANCE = 3.0
+
+# アンカーの後ろで値を探す文字数
+DEFAULT_ANCHOR_WINDOW = 200
+
+# 同じ行に並ぶテキスト行の区切り
+ROW_SEPARATOR = "  "
+
+def get_fallback_mode() -> str:
+    """Document Intelligenceが障害で使えない場合の代替方式（環境変数 DOCUMENT_INTELLIGENCE_FALLBACK: local / none）"""
+    return os.environ.get("DOCUMENT_INTELLIGENCE_FALLBACK", FALLBACK_NONE).lower()
+
+def extract_with_local_text(pdf_bytes: bytes, doc_type: str, config_loader, context) -> Optional[Dict[str, Any]]:
+    """
+    Document Intelligenceを使わず、pdfminerで抽出したテキストからデータを抽出
+    
+    Args:
+        pdf_bytes: PDFファイルのバイトデータ
+        doc_type: 文書種別
+        config_loader: 設定ローダー
+        context: 文書コンテキスト（分類で全ページ抽出済みならそのテキストを使う）
+        
+    Returns:
+        extract_with_document_intelligence と同じ構造の抽出データ（テキストが取れない場合はNone）
+    """
+    if not load_remaining_page_texts(pdf_bytes, config_loader.get_classifier_settings(), context):
+        logger.error("Local text extraction failed")
+        return None
+    
+    text = context.text
+    if not text.strip():
+        logger.warning("No text available for local extraction")
+        return None
+    
+    key_value_pairs = extract_key_value_lines(text)
+    logger.info(f"Local extraction found {len(key_value_pairs)} key-value pairs")
+    
+    return {
+        "doc_type": doc_type,
+        "fields": {},
+        "tables": [],
+        "key_value_pairs": key_value_pairs,
+        "raw_text": text,
+        "confidence_scores": {},
+        "source": "local"
+    }
+
+def extract_key_value_lines(text: str) -> Dict[str, str]:
+    """「ラベル: 値」形式の行をキーバリューペアとして抽出（同じラベルは最初の値を使う）"""
+    key_value_pairs = {}
+    
+    for match in KEY_VALUE_LINE_PATTERN.finditer(text):
+        key_value_pairs.setdefault(match.group("key"), match.group("value"))
+    
+    return key_value_pairs
+
+def extract_with_vendor_rules(pdf_bytes: bytes, doc_type: str, rules: Dict, settings: Dict) -> Optional[Dict[str, Any]]:
+    """
+    ベンダーテンプレートのルール（正規表現アンカー・ラベルと値・表の列境界）でローカル抽出
+    
+    Args:
+        pdf_bytes: PDFファイルのバイトデータ
+        doc_type: 文書種別
+        rules: ベンダーマッピングの local_extraction セクション
+        settings: 分類処理設定（レイアウト解析は isolated_extraction の設定で隔離ワーカーで行う）
+        
+    Returns:
+        extract_with_document_intelligence と同じ構造の抽出データ
+        （必須フィールドが取れない場合はNone。Document Intelligence で抽出する）
+    """
+    try:
+        page_lines, page_count = load_page_lines(pdf_bytes, settings)
+        rows = [
+            row
+            for lines in page_lines
+            for row in group_rows(lines, float(rules.get("row_tolerance", DEFAULT_ROW_TOLERANCE)))
+        ]
+        text = "\n".join(ROW_SEPARATOR.join(line[3] for line in row) for row in rows)
+        
+        key_value_pairs = extract_key_value_lines(text) if rules.get("label_values", True) else {}
+        fields = extract_rule_fields(text, rules.get("fields") or {})
+        tables = [
+            table
+            for table in (extract_rule_table(rows, table_rule) for table_rule in rules.get("tables") or [])
+            if table
+        ]
+    except Exception as e:
+        logger.warning(f"Vendor rule extraction failed: {str(e)}")
+        return None
+    
+    missing = [name for name in rules.get("required") or [] if name not in fields and name not in key_value_pairs]
+    if missing:
+        logger.info(f"Vendor rules missed required fields {missing}, using Document Intelligence")
+        return None
+    
+    logger.info(
+        f"Vendor rule extraction: {len(fields)} fields, {len(key_value_pairs)} key-value pairs, "
+        f"{len(tables)} tables from {page_count} pages"
+    )
+    
+    return {
+        "doc_type": doc_type,
+        "fields": fields,
+        "tables": tables,
+        "key_value_pairs": key_value_pairs,
+        "raw_text": text,
+        "confidence_scores": {},
+        "source": "local_rules"
+    }
+
+def group_rows(lines: List[Tuple[float, float, float, str]], tolerance: float) -> List[List[Tuple[float, float, float, str]]]:
+    """上端y座標が近いテキスト行を1行にまとめる（行内は左から順）"""
+    rows = []
+    
+    for line in lines:
+        if rows and line[0] - rows[-1][0][0] <= tolerance:
+            rows[-1].append(line)
+        else:
+            rows.append([line])
+    
+    return [sorted(row, key=lambda line: line[1]) for row in rows]
+
+def extract_rule_fields(text: str, field_rules: Dict[str, Any]) -> Dict[str, str]:
+    """
+    フィールドごとの正規表現で値を抽出
+    
+    ルールは正規表現の文字列か {pattern, anchor, window}。
+    anchor を指定した場合は、アンカーの直後 window 文字の範囲だけを探す。
+    値は最初のキャプチャグループ（無ければマッチ全体）。
+    """
+    fields = {}
+    
+    for name, rule in field_rules.items():
+        if isinstance(rule, str):
+            rule = {"pattern": rule}
+        
+        start, end = 0, len(text)
+        if rule.get("anchor"):
+            anchor = re.search(rule["anchor"], text)
+            if not anchor:
+                continue
+            start = anchor.end()
+            end = min(start + int(rule.get("window", DEFAULT_ANCHOR_WINDOW)), len(text))
+        
+        match = re.compile(rule["pattern"], re.M).search(text, start, end)
+        if not match:
+            continue
+        
+        value = (match.group(1) if match.re.groups else match.group(0)).strip()
+        if value:
+            fields[name] = value
+    
+    return fields
+
+def extract_rule_table(rows: List[List[Tuple[float, float, float, str]]], table_rule: Dict) -> Optional[Dict[str, Any]]:
+    """
+    開始・終了アンカーの間の行を列境界で分割して表を組み立てる
+    
+    開始アンカーに一致した行を見出し行とし、終了アンカーに一致した行の手前までを明細とする。
+    改ページで見出し行が繰り返された場合は読み飛ばす。
+    テキスト行は左端x座標が含まれる列に入れる（同じセルに入る行は空白で連結）。
+    
+    Returns:
+        build_table_grid と同じ構造の表（開始アンカーが見つからない場合はNone）
+    """
+    start = re.compile(table_rule["start"])
+    end = re.compile(table_rule["end"]) if table_rule.get("end") else None
+    boundaries = sorted(float(x) for x in table_rule["columns"])
+    
+    cells = []
+    row_count = 0
+    
+    for row in rows:
+        row_text = ROW_SEPARATOR.join(line[3] for line in row)
+        
+        if not row_count:
+            if start.search(row_text):
+                cells.extend(split_columns(row, boundaries))
+                row_count = 1
+            continue
+        
+        if end and end.search(row_text):
+            break
+        if start.search(row_text):
+            continue
+        
+        cells.extend(split_columns(row, boundaries))
+        row_count += 1
+    
+    if not row_count:
+        return None
+    
+    return {
+        "cells": cells,
+        "header": cells[:len(boundaries)],
+        "header_row_count": 1,
+        "repeated_header_rows": [],
+        "row_count": row_count,
+        "column_count": len(boundaries)
+    }
+
+def split_columns(row: List[Tuple[float, float, float, str]], boundaries: List[float]) -> List[str]:
+    """行内のテキストを列の左端x座標で振り分ける"""
+    cells = [""] * len(boundaries)
+    
+    for _, x0, _, text in row:
+        column = max(bisect_right(boundaries, x0) - 1, 0)
+        cells[column] = f"{cells[column]} {text}".strip()
+    
+    return cells
@@ -0,0 +1,303 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BACKEND_NONE = "none"
+BACKEND_LOCAL = "local"
+BACKEND_BLOB = "blob"
+
+DEFAULT_TTL_HOURS = 24 * 30
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_MB = 2048
+DEFAULT_EVICT_EVERY = 20
+
+class LocalDirectoryBackend:
+    """ローカルディレクトリに1エントリ1ファイルで保存するバックエンド"""
+    
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+    
+    def read(self, key: str) -> Optional[bytes]:
+        entry_file = self.directory / f"{key}.json"
+        if not entry_file.exists():
+            return None
+        return entry_file.read_bytes()
+    
+    def write(self, key: str, data: bytes):
+        """一時ファイル経由で置き換える（同時書き込みでも壊れたエントリを残さない）"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.directory / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_file.write_bytes(data)
+        os.replace(tmp_file, self.directory / f"{key}.json")
+    
+    def delete(self, key: str):
+        try:
+            (self.directory / f"{key}.json").unlink()
+        except FileNotFoundError:
+            pass
+    
+    def list_entries(self) -> Iterable[Tuple[str, int, float]]:
+        """(キー, バイト数, 更新時刻) の一覧"""
+        if not self.directory.exists():
+            return []
+        
+        entries = []
+        for entry_file in self.directory.glob("*.json"):
+            try:
+                stat = entry_file.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((entry_file.stem, stat.st_size, stat.st_mtime))
+        return entries
+
+class BlobContainerBackend:
+    """Blob Storageのコンテナに保存するバックエンド（複数インスタンスで共有できる）"""
+    
+    def __init__(self, container: str, prefix: str = "extraction-cache/"):
+        from .storage_io import get_blob_service_client
+        
+        self.container_client = get_blob_service_client().get_container_client(container)
+        self.prefix = prefix
+    
+    def read(self, key: str) -> Optional[bytes]:
+        from azure.core.exceptions import ResourceNotFoundError
+        
+        try:
+            return self.container_client.download_blob(f"{self.prefix}{key}.json").readall()
+        except ResourceNotFoundError:
+            return None
+    
+    def write(self, key: str, data: bytes):
+        self.container_client.upload_blob(f"{self.prefix}{key}.json", data, overwrite=True)
+    
+    def delete(self, key: str):
+        from azure.core.exceptions import ResourceNotFoundError
+        
+        try:
+            self.container_client.delete_blob(f"{self.prefix}{key}.json")
+        except ResourceNotFoundError:
+            pass
+    
+    def list_entries(self) -> Iterable[Tuple[str, int, float]]:
+        """(キー, バイト数, 更新時刻) の一覧"""
+        entries = []
+        for blob in self.container_client.list_blobs(name_starts_with=self.prefix):
+            key = blob.name[len(self.prefix):]
+            if key.endswith(".json"):
+                entries.append((key[:-len(".json")], blob.size, blob.last_modified.timestamp()))
+        return entries
+
+class ExtractionCache:
+    """Document Intelligenceの解析結果（analyzeResult）のキャッシュ"""
+    
+    def __init__(
+        self,
+        backend,
+        ttl_hours: float = DEFAULT_TTL_HOURS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_mb: float = DEFAULT_MAX_MB,
+        evict_every: int = DEFAULT_EVICT_EVERY
+    ):
+        """
+        Args:
+            backend: 保存先（LocalDirectoryBackend / BlobContainerBackend）
+            ttl_hours: エントリの有効期間（時間、0以下なら無期限）
+            max_entries: 保持する最大件数（超えたら古いものから削除）
+            max_mb: 保持する最大サイズ（MB、超えたら古いものから削除）
+            evict_every: この件数を保存するごとに件数・サイズ上限を確認する
+        """
+        self.backend = backend
+        self.ttl_seconds = ttl_hours * 3600 if ttl_hours and ttl_hours > 0 else None
+        self.max_entries = max_entries
+        self.max_bytes = max_mb * 1024 * 1024 if max_mb else None
+        self.evict_every = max(evict_every, 1)
+        
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evicted": 0}
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        キャッシュ済みのanalyzeResultを取得
+        
+        Returns:
+            analyzeResult（無い・期限切れ・読めない場合はNone）
+        """
+        try:
+            data = self.backend.read(key)
+        except Exception as e:
+            logger.warning(f"Failed to read extraction cache {key}: {str(e)}")
+            data = None
+        
+        if data is None:
+            self._count("misses")
+            return None
+        
+        try:
+            entry = json.loads(data)
+        except ValueError:
+            logger.warning(f"Corrupted extraction cache entry {key}, removing")
+            self._delete(key)
+            self._count("misses")
+            return None
+        
+        if self.ttl_seconds and time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            self._delete(key)
+            self._count("expired")
+            self._count("misses")
+            return None
+        
+        self._count("hits")
+        return entry.get("analyze_result")
+    
+    def put(self, key: str, analyze_result: Dict, metadata: Optional[Dict] = None):
+        """analyzeResultを保存（失敗しても処理は継続）"""
+        entry = {**(metadata or {}), "created_at": time.time(), "analyze_result": analyze_result}
+        
+        try:
+            self.backend.write(key, json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        except Exception as e:
+            logger.warning(f"Failed to write extraction cache {key}: {str(e)}")
+            return
+        
+        self._count("stores")
+        
+        with self._lock:
+            self._puts_since_evict += 1
+            due = self._puts_since_evict >= self.evict_every
+            if due:
+                self._puts_since_evict = 0
+        
+        if due:
+            self.evict()
+    
+    def evict(self) -> int:
+        """期限切れのエントリと、件数・サイズ上限を超えた古いエントリを削除"""
+        try:
+            entries = sorted(self.backend.list_entries(), key=lambda entry: entry[2])
+        except Exception as e:
+            logger.warning(f"Failed to list extraction cache entries: {str(e)}")
+            return 0
+        
+        now = time.time()
+        total_bytes = sum(size for _, size, _ in entries)
+        remaining = len(entries)
+        removed = 0
+        
+        for key, size, modified in entries:
+            expired = self.ttl_seconds is not None and now - modified > self.ttl_seconds
+            over_count = self.max_entries and remaining > self.max_entries
+            over_size = self.max_bytes and total_bytes > self.max_bytes
+            if not (expired or over_count or over_size):
+                break
+            
+            self._delete(key)
+            remaining -= 1
+            total_bytes -= size
+            removed += 1
+        
+        if removed:
+            with self._lock:
+                self._stats["evicted"] += removed
+            logger.info(f"Evicted {removed} extraction cache entries ({remaining} remaining)")
+        
+        return removed
+    
+    def stats(self) -> Dict:
+        """ヒット・ミスなどのカウンタ"""
+        with self._lock:
+            return dict(self._stats)
+    
+    def _delete(self, key: str):
+        try:
+            self.backend.delete(key)
+        except Exception as e:
+            logger.warning(f"Failed to delete extraction cache {key}: {str(e)}")
+    
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+def make_cache_key(
+    pdf_bytes: bytes,
+    model_id: str,
+    api_version: str,
+    locale: str,
+    pages: Optional[str] = None,
+    features: Optional[str] = None
+) -> str:
+    """PDF内容・モデルID・APIバージョン・ロケール・ページ範囲・追加機能から決まるキャッシュキー"""
+    content_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    request = f"{model_id}|{api_version}|{locale}"
+    if pages:
+        request += f"|{pages}"
+    if features:
+        request += f"|features={features}"
+    request_hash = hashlib.sha256(request.encode("utf-8")).hexdigest()[:16]
+    return f"{content_hash}-{request_hash}"
+
+_cache: Optional[ExtractionCache] = None
+_cache_key: Optional[tuple] = None
+_cache_lock = threading.Lock()
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """
+    プロセス共有の抽出結果キャッシュを取得
+    
+    環境変数:
+        EXTRACTION_CACHE_BACKEND: none / local / blob（既定 none）
+        EXTRACTION_CACHE_DIR: local の保存先ディレクトリ
+        EXTRACTION_CACHE_CONTAINER: blob の保存先コンテナ（既定 artifacts）
+        EXTRACTION_CACHE_TTL_HOURS / EXTRACTION_CACHE_MAX_ENTRIES / EXTRACTION_CACHE_MAX_MB: 有効期間と上限
+        
+    Returns:
+        キャッシュ（無効設定の場合はNone）
+    """
+    global _cache, _cache_key
+    
+    backend_name = os.environ.get("EXTRACTION_CACHE_BACKEND", BACKEND_NONE).lower()
+    if backend_name == BACKEND_NONE:
+        return None
+    
+    location = (
+        os.environ.get("EXTRACTION_CACHE_DIR", "")
+        if backend_name == BACKEND_LOCAL
+        else os.environ.get("EXTRACTION_CACHE_CONTAINER", "artifacts")
+    )
+    options = {
+        "ttl_hours": float(os.environ.get("EXTRACTION_CACHE_TTL_HOURS", DEFAULT_TTL_HOURS)),
+        "max_entries": int(os.environ.get("EXTRACTION_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+        "max_mb": float(os.environ.get("EXTRACTION_CACHE_MAX_MB", DEFAULT_MAX_MB))
+    }
+    key = (backend_name, location, tuple(sorted(options.items())))
+    
+    with _cache_lock:
+        if _cache is not None and _cache_key == key:
+            return _cache
+        
+        try:
+            if backend_name == BACKEND_LOCAL:
+                if not location:
+                    logger.warning("EXTRACTION_CACHE_DIR is not set, extraction cache disabled")
+                    return None
+                backend = LocalDirectoryBackend(location)
+            elif backend_name == BACKEND_BLOB:
+                backend = BlobContainerBackend(location)
+            else:
+                logger.warning(f"Unknown extraction cache backend: {backend_name}")
+                return None
+        except Exception as e:
+            logger.error(f"Failed to initialize extraction cache backend {backend_name}: {str(e)}")
+            return None
+        
+        _cache = ExtractionCache(backend, **options)
+        _cache_key = key
+        logger.info(f"Extraction cache initialized (backend={backend_name}, location={location}, {options})")
+        return _cache
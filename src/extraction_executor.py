@@ -0,0 +1,389 @@
+import ast
+import atexit
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = "ok"
+STATUS_TIMEOUT = "timeout"
+STATUS_OVERSIZE = "oversize"
+STATUS_ERROR = "error"
+
+# ワーカーで実行する処理（texts: ページテキスト / lines: 位置付きのテキスト行）
+TASK_TEXTS = "texts"
+TASK_LINES = "lines"
+
+@dataclass
+class ExtractionResult:
+    """ワーカープロセスでのテキスト抽出結果"""
+    status: str
+    page_texts: List[str] = field(default_factory=list)
+    page_count: int = 0
+    page_lines: List[List[tuple]] = field(default_factory=list)
+    text_layer: Optional[Dict] = None
+    elapsed_seconds: float = 0.0
+    detail: Optional[str] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+    
+    def to_report(self) -> Dict:
+        """検証レポート用の辞書"""
+        return {
+            "status": self.status,
+            "page_count": self.page_count,
+            "pages_extracted": len(self.page_texts),
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "detail": self.detail
+        }
+
+class ExtractionError(Exception):
+    """テキスト抽出がタイムアウト・サイズ超過・異常終了した場合の例外"""
+    
+    def __init__(self, result: ExtractionResult):
+        super().__init__(f"Text extraction {result.status}: {result.detail}")
+        self.result = result
+
+def _worker_main(conn):
+    """ワーカープロセスのメインループ（ジョブを受け取りpdfminerで抽出）"""
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        
+        if job is None:
+            break
+        
+        task, pdf_bytes, options = job
+        try:
+            conn.send((STATUS_OK, _run_task(task, pdf_bytes, options), None))
+        except Exception as e:
+            conn.send((STATUS_ERROR, {}, f"{type(e).__name__}: {str(e)}"))
+
+def _run_task(task: str, pdf_bytes: bytes, options: Dict) -> Dict:
+    """ワーカー内で処理を実行し、ExtractionResult のフィールドを返す"""
+    from .pdf_text import extract_page_lines, extract_page_texts, inspect_text_layer
+    from .classify import stream_page_texts
+    
+    if task == TASK_LINES:
+        page_lines, page_count = extract_page_lines(pdf_bytes)
+        return {"page_lines": page_lines, "page_count": page_count}
+    
+    text_layer = None
+    if options["text_layer_pages"] is not None:
+        text_layer = inspect_text_layer(pdf_bytes, options["text_layer_pages"])
+        if not text_layer["has_text_layer"]:
+            return {"text_layer": text_layer}
+    
+    if options["stream_options"] is not None:
+        page_texts, page_count = stream_page_texts(pdf_bytes, options["stream_options"])
+    else:
+        page_texts, page_count = extract_page_texts(
+            pdf_bytes, page_numbers=options["page_numbers"], text_mode=options["text_mode"]
+        )
+    return {"page_texts": page_texts, "page_count": page_count, "text_layer": text_layer}
+
+def _main_guard_lines(main_path: str) -> Optional[set]:
+    """スクリプトの if __name__ == "__main__": ブロックの行番号（ソースを読めない場合はNone）"""
+    try:
+        with open(main_path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), main_path)
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return None
+    
+    lines = set()
+    for node in tree.body:
+        if not isinstance(node, ast.If) or not isinstance(node.test, ast.Compare):
+            continue
+        operands = [node.test.left] + node.test.comparators
+        names = {operand.id for operand in operands if isinstance(operand, ast.Name)}
+        values = {operand.value for operand in operands if isinstance(operand, ast.Constant)}
+        if names == {"__name__"} and values == {"__main__"}:
+            lines.update(range(node.lineno, node.end_lineno + 1))
+    return lines
+
+def is_called_from_unguarded_main() -> bool:
+    """
+    起動スクリプトのトップレベル（if __name__ == "__main__": の外）から呼ばれているか
+    
+    spawn で起動したワーカーは起動スクリプトを読み込み直すため、
+    ガードの外で抽出を呼ぶとスクリプトの処理がワーカーごとに再実行される。
+    """
+    main_module = sys.modules.get("__main__")
+    main_path = getattr(main_module, "__file__", None)
+    if main_path is None:
+        return False
+    
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_globals is vars(main_module) and frame.f_code.co_name == "<module>":
+            guard_lines = _main_guard_lines(main_path)
+            return guard_lines is not None and frame.f_lineno not in guard_lines
+        frame = frame.f_back
+    return False
+
+def _read_rss_bytes(pid: int) -> Optional[int]:
+    """プロセスの常駐メモリ量を取得（/procが無い環境ではNone）"""
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class _Worker:
+    """抽出ワーカープロセスとその通信路"""
+    
+    def __init__(self, mp_context):
+        self.conn, child_conn = mp_context.Pipe()
+        self.process = mp_context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks_done = 0
+    
+    def stop(self):
+        """ワーカーを正常終了させる"""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+    
+    def kill(self):
+        """ワーカーを強制終了する"""
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+class ExtractionExecutor:
+    """pdfminerによるテキスト抽出を隔離したワーカープロセスで実行するプール"""
+    
+    def __init__(
+        self,
+        max_workers: int = 2,
+        timeout_seconds: float = 60.0,
+        max_rss_mb: int = 1024,
+        max_tasks_per_worker: int = 50,
+        max_pdf_mb: int = 100,
+        start_method: str = "spawn"
+    ):
+        """
+        Args:
+            max_workers: 同時に動かすワーカープロセス数
+            timeout_seconds: 1文書あたりの抽出タイムアウト（秒）
+            max_rss_mb: ワーカーの常駐メモリ上限（MB）。超えたら強制終了する
+            max_tasks_per_worker: この件数を処理したワーカーは作り直す
+            max_pdf_mb: これより大きいPDFはワーカーに渡さずサイズ超過とする
+            start_method: multiprocessingの起動方式
+        """
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_pdf_bytes = max_pdf_mb * 1024 * 1024 if max_pdf_mb else None
+        
+        self._start_method = start_method
+        self._mp_context = multiprocessing.get_context(start_method)
+        self._idle: List[_Worker] = []
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._lock = threading.Lock()
+        self._closed = False
+    
+    def extract(
+        self,
+        pdf_bytes: bytes,
+        page_numbers: Optional[Iterable[int]] = None,
+        stream_options: Optional[Dict] = None,
+        text_mode: str = "layout",
+        text_layer_pages: Optional[int] = None
+    ) -> ExtractionResult:
+        """
+        ワーカープロセスでページテキストを抽出
+        
+        Args:
+            pdf_bytes: PDFファイルのバイトデータ
+            page_numbers: 抽出するページ番号（0始まり、省略時は全ページ）
+            stream_options: 指定時はワーカー内でページを逐次抽出し、分類が確定した時点で打ち切る
+            text_mode: 抽出方式（layout / fast）
+            text_layer_pages: 指定時は抽出の前に先頭ページのテキスト層を確認し、無ければ抽出せずに返す（text_layer に入る）
+            
+        Returns:
+            抽出結果（タイムアウト・サイズ超過時もブロックせず結果として返す）
+        """
+        return self._submit(TASK_TEXTS, pdf_bytes, {
+            "page_numbers": list(page_numbers) if page_numbers is not None else None,
+            "stream_options": stream_options,
+            "text_mode": text_mode,
+            "text_layer_pages": text_layer_pages
+        })
+    
+    def extract_lines(self, pdf_bytes: bytes) -> ExtractionResult:
+        """ワーカープロセスで位置付きのテキスト行を抽出（page_lines に入る）"""
+        return self._submit(TASK_LINES, pdf_bytes, {})
+    
+    def _submit(self, task: str, pdf_bytes: bytes, options: Dict) -> ExtractionResult:
+        """サイズを確認してからワーカーに処理を渡し、結果を待つ"""
+        if self.max_pdf_bytes and len(pdf_bytes) > self.max_pdf_bytes:
+            return ExtractionResult(
+                status=STATUS_OVERSIZE,
+                detail=f"PDF size {len(pdf_bytes)} bytes exceeds {self.max_pdf_bytes} bytes"
+            )
+        
+        started = time.monotonic()
+        
+        with self._slots:
+            worker = self._checkout()
+            result = self._run(worker, (task, pdf_bytes, options))
+        
+        result.elapsed_seconds = time.monotonic() - started
+        if not result.ok:
+            logger.warning(f"Isolated extraction {result.status} after {result.elapsed_seconds:.2f}s: {result.detail}")
+        return result
+    
+    def _run(self, worker: _Worker, job: tuple) -> ExtractionResult:
+        """ジョブを送り、タイムアウトとメモリ上限を監視しながら結果を待つ"""
+        try:
+            worker.conn.send(job)
+        except (OSError, ValueError) as e:
+            worker.kill()
+            return ExtractionResult(status=STATUS_ERROR, detail=f"Failed to submit job: {str(e)}")
+        
+        deadline = time.monotonic() + self.timeout_seconds
+        
+        while True:
+            if worker.conn.poll(0.05):
+                try:
+                    status, fields, detail = worker.conn.recv()
+                except (EOFError, OSError) as e:
+                    worker.kill()
+                    return ExtractionResult(status=STATUS_ERROR, detail=f"Worker connection lost: {str(e)}")
+                
+                worker.tasks_done += 1
+                self._checkin(worker)
+                return ExtractionResult(status=status, detail=detail, **fields)
+            
+            if not worker.process.is_alive():
+                worker.kill()
+                return ExtractionResult(
+                    status=STATUS_ERROR,
+                    detail=f"Worker exited with code {worker.process.exitcode}"
+                )
+            
+            if time.monotonic() > deadline:
+                worker.kill()
+                return ExtractionResult(
+                    status=STATUS_TIMEOUT,
+                    detail=f"Extraction exceeded {self.timeout_seconds}s"
+                )
+            
+            if self.max_rss_bytes:
+                rss = _read_rss_bytes(worker.process.pid)
+                if rss is not None and rss > self.max_rss_bytes:
+                    worker.kill()
+                    return ExtractionResult(
+                        status=STATUS_OVERSIZE,
+                        detail=f"Worker RSS {rss // (1024 * 1024)}MB exceeded {self.max_rss_bytes // (1024 * 1024)}MB"
+                    )
+    
+    def _checkout(self) -> _Worker:
+        """
+        待機中のワーカーを取り出す（無ければ起動）
+        
+        Raises:
+            RuntimeError: fork 以外の起動方式で、起動スクリプトのガードの外から呼ばれた場合
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ExtractionExecutor is shut down")
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                worker.kill()
+        
+        if self._start_method != "fork" and is_called_from_unguarded_main():
+            raise RuntimeError(
+                f"Isolated extraction with the '{self._start_method}' start method must be called "
+                f"inside an 'if __name__ == \"__main__\":' block of the main script"
+            )
+        
+        return _Worker(self._mp_context)
+    
+    def _checkin(self, worker: _Worker):
+        """ワーカーを待機リストに戻す（処理件数が上限に達したら作り直し対象として終了）"""
+        if self.max_tasks_per_worker and worker.tasks_done >= self.max_tasks_per_worker:
+            logger.debug(f"Recycling extraction worker {worker.process.pid} after {worker.tasks_done} documents")
+            worker.stop()
+            return
+        
+        with self._lock:
+            if self._closed:
+                worker.stop()
+            else:
+                self._idle.append(worker)
+    
+    def shutdown(self):
+        """全ワーカーを終了"""
+        with self._lock:
+            self._closed = True
+            workers, self._idle = self._idle, []
+        
+        for worker in workers:
+            worker.stop()
+
+_executor: Optional[ExtractionExecutor] = None
+_executor_key: Optional[tuple] = None
+_executor_lock = threading.Lock()
+
+def get_extraction_executor(settings: Dict) -> ExtractionExecutor:
+    """
+    プロセス共有の抽出エグゼキュータを取得
+    
+    Args:
+        settings: classifier/settings.yaml の isolated_extraction 設定
+    """
+    global _executor, _executor_key
+    
+    options = {
+        "max_workers": int(settings.get("workers", 2)),
+        "timeout_seconds": float(settings.get("timeout_seconds", 60)),
+        "max_rss_mb": int(settings.get("max_rss_mb", 1024)),
+        "max_tasks_per_worker": int(settings.get("max_tasks_per_worker", 50)),
+        "max_pdf_mb": int(settings.get("max_pdf_mb", 100)),
+        "start_method": settings.get("start_method", "spawn")
+    }
+    key = tuple(sorted(options.items()))
+    
+    with _executor_lock:
+        if _executor is None or _executor_key != key:
+            if _executor is not None:
+                _executor.shutdown()
+            _executor = ExtractionExecutor(**options)
+            _executor_key = key
+            logger.info(f"Extraction executor started: {options}")
+        
+        return _executor
+
+def shutdown_extraction_executor():
+    """共有エグゼキュータを終了"""
+    global _executor, _executor_key
+    
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = None
+        _executor_key = None
+
+atexit.register(shutdown_extraction_executor)
@@ -0,0 +1,191 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_IDLE_TIMEOUT_SECONDS = 120.0
+
+class SessionMetrics:
+    """プール済みセッションの接続再利用カウンタ"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.connections_opened = 0
+            self.sessions_created = 0
+    
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+    
+    def record_connection(self):
+        with self._lock:
+            self.connections_opened += 1
+    
+    def record_session(self):
+        with self._lock:
+            self.sessions_created += 1
+    
+    def snapshot(self) -> Dict:
+        """現在の値（再利用された接続数・再利用率を含む）"""
+        with self._lock:
+            reused = max(self.requests - self.connections_opened, 0)
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "connections_reused": reused,
+                "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+                "sessions_created": self.sessions_created
+            }
+
+_metrics = SessionMetrics()
+
+# このスレッドで送信中のリクエストを数える文書ごとのカウンタ（count_requests で設定）
+_document_counts = threading.local()
+
+@contextmanager
+def count_requests(metrics: Optional[Dict]) -> Iterator[None]:
+    """
+    このスレッドで送る1件のリクエストをプロセス共有のカウンタに数え、
+    新規接続数とあわせて文書のメトリクスの http にも加算する
+    
+    プロセス共有のカウンタは他の文書の送信も含むため、文書ごとの値はこちらで数える。
+    接続エラーなどで例外になったリクエストも1件として数える（新規接続数との比較がずれないように）。
+    """
+    counts = metrics.setdefault("http", {"requests": 0, "connections_opened": 0}) if metrics is not None else None
+    previous = getattr(_document_counts, "counts", None)
+    _document_counts.counts = counts
+    try:
+        yield
+    finally:
+        _document_counts.counts = previous
+        _metrics.record_request()
+        if counts is not None:
+            counts["requests"] += 1
+
+def record_connection():
+    """新規接続をプロセス共有のカウンタと送信中の文書のカウンタに記録"""
+    _metrics.record_connection()
+    counts = getattr(_document_counts, "counts", None)
+    if counts is not None:
+        counts["connections_opened"] += 1
+
+def summarize_requests(counts: Optional[Dict]) -> Dict:
+    """文書ごとのリクエスト数・新規接続数から再利用数・再利用率を求める"""
+    counts = counts or {"requests": 0, "connections_opened": 0}
+    reused = max(counts["requests"] - counts["connections_opened"], 0)
+    return {
+        "requests": counts["requests"],
+        "connections_opened": counts["connections_opened"],
+        "connections_reused": reused,
+        "reuse_ratio": round(reused / counts["requests"], 3) if counts["requests"] else 0.0
+    }
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    """新規接続（TCPハンドシェイク）の回数を数える接続プール"""
+    
+    def _new_conn(self):
+        record_connection()
+        return super()._new_conn()
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    """新規接続（TCP+TLSハンドシェイク）の回数を数える接続プール"""
+    
+    def _new_conn(self):
+        record_connection()
+        return super()._new_conn()
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """接続数を計測するプールを使うアダプター"""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool
+        }
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE, keep_alive: bool = True) -> requests.Session:
+    """
+    接続プール付きのセッションを作成
+    
+    Args:
+        pool_size: ホストごとに保持する接続数
+        keep_alive: Falseなら毎回接続を閉じる（Connection: close）
+        
+    Returns:
+        セッション
+    """
+    session = requests.Session()
+    adapter = PooledHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    
+    _metrics.record_session()
+    return session
+
+_session: Optional[requests.Session] = None
+_session_key: Optional[tuple] = None
+_last_used = 0.0
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """
+    プロセス共有のHTTPセッションを取得（Document Intelligenceの送信とポーリングで共用）
+    
+    環境変数:
+        DOCUMENT_INTELLIGENCE_POOL_SIZE: ホストごとの接続プールサイズ（既定 10）
+        DOCUMENT_INTELLIGENCE_KEEP_ALIVE: false で接続を再利用しない（既定 true）
+        DOCUMENT_INTELLIGENCE_IDLE_TIMEOUT: この秒数使われなかったプールは破棄して作り直す（既定 120）
+        
+    作り直す前のセッションは他のスレッドが送信中の可能性があるため閉じずに手放し、
+    使い終わったものからガベージコレクションで接続を閉じる。
+    """
+    global _session, _session_key, _last_used
+    
+    pool_size = int(os.environ.get("DOCUMENT_INTELLIGENCE_POOL_SIZE", DEFAULT_POOL_SIZE))
+    keep_alive = os.environ.get("DOCUMENT_INTELLIGENCE_KEEP_ALIVE", "true").lower() != "false"
+    idle_timeout = float(os.environ.get("DOCUMENT_INTELLIGENCE_IDLE_TIMEOUT", DEFAULT_IDLE_TIMEOUT_SECONDS))
+    key = (pool_size, keep_alive)
+    now = time.monotonic()
+    
+    with _session_lock:
+        idle_expired = _session is not None and idle_timeout > 0 and now - _last_used > idle_timeout
+        
+        if _session is None or _session_key != key or idle_expired:
+            # サーバー側で切断されている可能性があるアイドル接続は新しいセッションに持ち越さない
+            _session = create_session(pool_size=pool_size, keep_alive=keep_alive)
+            _session_key = key
+            logger.debug(f"HTTP session created (pool_size={pool_size}, keep_alive={keep_alive})")
+        
+        _last_used = now
+        return _session
+
+def get_session_metrics() -> Dict:
+    """接続再利用のメトリクスを取得（プロセス起動からの累計）"""
+    return _metrics.snapshot()
+
+def close_session():
+    """共有セッションを閉じる"""
+    global _session, _session_key
+    
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _session_key = None
@@ -1,65 +1,48 @@
 import logging
-import os
 import sys
-import json
 from pathlib import Path
 
 import azure.functions as func
 
-# プロジェクトのsrcディレクトリをPythonパスに追加
-current_dir = Path(__file__).parent
-src_dir = current_dir.parent
-sys.path.insert(0, str(src_dir))
+# プロジェクトのルートディレクトリ（srcパッケージを含むディレクトリ）をPythonパスに追加
+# （ルート直下・src配下のどちらに置いた関数からも同じ import で読み込む）
+current_dir = Path(__file__).resolve().parent
+project_root = next(path for path in current_dir.parents if (path / "src" / "pipeline.py").exists())
+sys.path.insert(0, str(project_root))
 
-# モック関数を定義（Azureリソース未設定時用）
-def run_pipeline(blob_name, pdf_bytes):
-    """簡易パイプライン実行（モック版）"""
-    try:
-        validation_report = {
-            "blob_name": blob_name,
-            "errors": [],
-            "warnings": ["This is a mock execution - Azure services not configured"],
-            "info": [{"step": "mock_processing", "message": "Successfully processed in mock mode"}]
-        }
-        
-        # 簡単なパターンマッチングで請求書を判定
-        pdf_text = pdf_bytes.decode('utf-8', errors='ignore')
-        
-        cdm_data = {
-            "doc": {
-                "type": "INVOICE",
-                "schema_version": "1.0", 
-                "document_no": "MOCK-001",
-                "issue_date": "2024-01-15",
-                "currency": "JPY",
-                "extraction_timestamp": "2024-01-15T10:00:00Z"
-            },
-            "lines": [],
-            "totals": {},
-            "metadata": {
-                "confidence_scores": {},
-                "unmapped_fields": []
-            }
-        }
-        
-        return True, cdm_data, validation_report, {"mock": True}
-        
-    except Exception as e:
-        validation_report = {
-            "blob_name": blob_name,
-            "errors": [f"Mock pipeline error: {str(e)}"],
-            "warnings": [],
-            "info": []
-        }
-        return False, None, validation_report, {}
+from src.document_context import DocumentContext
+from src.operation_store import get_operation_store
+from src.pipeline import run_pipeline, submit_pipeline
+from src.storage_io import save_artifacts, save_to_cosmos
 
-def save_artifacts(blob_name, raw_data, cdm_data, validation_report, container="artifacts"):
-    """成果物保存（モック版）"""
-    logging.info(f"[MOCK] Would save artifacts for {blob_name} to {container}")
+def save_result(blob_name, result, context):
+    """パイプラインの結果（成果物・CDMデータ）を保存"""
+    success, cdm_data, validation_report, raw_extraction = result
+    save_artifacts(
+        blob_name=blob_name,
+        raw_data=raw_extraction,
+        cdm_data=cdm_data,
+        validation_report=validation_report,
+        container="artifacts",
+        context=context
+    )
+    
+    if success and cdm_data:
+        save_to_cosmos(cdm_data)
+        logging.info(f"Successfully processed {blob_name}")
+    else:
+        logging.warning(f"Validation failed for {blob_name}: {validation_report}")
 
-def save_to_cosmos(cdm_data):
-    """Cosmos DB保存（モック版）"""
-    logging.info(f"[MOCK] Would save CDM data to Cosmos DB")
+def submit_to_operation_store(blob_name, pdf_bytes, store):
+    """分類と解析の送信だけを行い、結果の取得は operation_poller に任せる（解析操作ストア設定時）"""
+    context = DocumentContext(blob_name, pdf_bytes)
+    operation_id, result = submit_pipeline(blob_name, pdf_bytes, store, context=context)
+    if operation_id is not None:
+        logging.info(f"Submitted {blob_name} as operation {operation_id}")
+        return
+    
+    # ローカル抽出・キャッシュヒット・送信失敗などでその場で完了した場合
+    save_result(blob_name, result, context)
 
 def main(inputBlob: func.InputStream) -> None:
     """Azure Functions Blob Trigger エントリポイント"""
@@ -69,22 +52,14 @@ def main(inputBlob: func.InputStream) -> None:
     logging.info(f"Processing {blob_name} ({len(pdf_bytes)} bytes)")
     
     try:
-        success, cdm_data, validation_report, raw_extraction = run_pipeline(blob_name, pdf_bytes)
+        store = get_operation_store()
+        if store is not None:
+            submit_to_operation_store(blob_name, pdf_bytes, store)
+            return
         
-        save_artifacts(
-            blob_name=blob_name,
-            raw_data=raw_extraction,
-            cdm_data=cdm_data,
-            validation_report=validation_report,
-            container="artifacts"
-        )
-        
-        if success and cdm_data:
-            save_to_cosmos(cdm_data)
-            logging.info(f"Successfully processed {blob_name}")
-        else:
-            logging.warning(f"Validation failed for {blob_name}: {validation_report}")
-            
+        context = DocumentContext(blob_name, pdf_bytes)
+        save_result(blob_name, run_pipeline(blob_name, pdf_bytes, context=context), context)
+    
     except Exception as e:
         logging.error(f"Failed to process {blob_name}: {str(e)}", exc_info=True)
-        raise
\ No newline at end of file
+        raise
@@ -10,7 +10,8 @@ def map_to_cdm(
     raw_data: Dict[str, Any],
     doc_type: str,
     vendor_name: Optional[str],
-    config_loader
+    config_loader,
+    context=None
 ) -> Optional[Dict[str, Any]]:
     """
     抽出データをCDMスキーマにマッピング
@@ -20,6 +21,7 @@ def map_to_cdm(
         doc_type: 文書種別
         vendor_name: ベンダー名
         config_loader: 設定ローダー
+        context: 文書コンテキスト（分類時の抽出テキスト・ページ数）
         
     Returns:
         CDM形式のデータ
@@ -46,6 +48,9 @@ def map_to_cdm(
             }
         }
         
+        if context is not None:
+            cdm_data["metadata"]["page_count"] = context.page_count
+        
         cdm_data["doc"].update(map_document_fields(raw_data, mapping_config))
         
         cdm_data["lines"] = extract_line_items(raw_data, mapping_config)
@@ -127,16 +132,24 @@ def extract_line_items(raw_data: Dict, mapping_config: Dict) -> List[Dict]:
     defaults = table_config.get("defaults", {})
     
     for table in tables:
-        rows = table.get("rows", [])
-        if len(rows) < 2:
+        cells = table.get("cells", [])
+        column_count = table.get("column_count", 0)
+        row_count = table.get("row_count", 0)
+        header_row_count = table.get("header_row_count", 1)
+        if not column_count or row_count <= header_row_count:
             continue
         
-        header_row = rows[0]
+        header_row = table.get("header") or cells[:column_count]
         header_map = map_headers(header_row, headers_mapping)
+        repeated_header_rows = set(table.get("repeated_header_rows", []))
         
-        for row in rows[1:]:
-            if is_data_row(row):
-                line_item = extract_line_item(row, header_map, defaults)
+        for row in range(header_row_count, row_count):
+            if row in repeated_header_rows:
+                continue
+            
+            offset = row * column_count
+            if is_data_row(cells, offset, column_count):
+                line_item = extract_line_item(cells, offset, header_map, defaults)
                 if line_item:
                     line_items.append(line_item)
     
@@ -157,19 +170,18 @@ def map_headers(header_row: List[str], headers_mapping: Dict) -> Dict[int, str]:
     
     return header_map
 
-def is_data_row(row: List[str]) -> bool:
-    """データ行かどうか判定"""
-    non_empty = [cell for cell in row if cell and cell.strip()]
-    return len(non_empty) >= 2
+def is_data_row(cells: List[str], offset: int, column_count: int) -> bool:
+    """データ行かどうか判定（cells[offset:offset + column_count] が1行分）"""
+    non_empty = sum(1 for position in range(offset, offset + column_count) if cells[position] and cells[position].strip())
+    return non_empty >= 2
 
-def extract_line_item(row: List[str], header_map: Dict[int, str], defaults: Dict) -> Optional[Dict]:
-    """1行分のデータを抽出"""
+def extract_line_item(cells: List[str], offset: int, header_map: Dict[int, str], defaults: Dict) -> Optional[Dict]:
+    """1行分のデータを抽出（cells[offset + 列] が行の各セル）"""
     line_item = {}
     
-    for idx, value in enumerate(row):
-        if idx in header_map and value:
-            field_name = header_map[idx]
-            
+    for idx, field_name in header_map.items():
+        value = cells[offset + idx]
+        if value:
             if field_name in ["qty", "unit_price", "amount"]:
                 try:
                     cleaned_value = re.sub(r"[,￥¥$]", "", value)
@@ -0,0 +1,248 @@
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NUM_FEATURES = 1 << 18
+DEFAULT_NGRAM_RANGE = (1, 3)
+
+_HASH_PRIME = np.uint64(1099511628211)
+_HASH_SEED = np.uint64(14695981039346656037)
+_HASH_SHIFT = np.uint64(29)
+
+class NgramClassifier:
+    """文字n-gramのハッシュ特徴量と線形モデルによる文書種別分類器"""
+    
+    def __init__(
+        self,
+        labels: Sequence[str],
+        weights: np.ndarray,
+        bias: np.ndarray,
+        ngram_range: Tuple[int, int] = DEFAULT_NGRAM_RANGE
+    ):
+        """
+        Args:
+            labels: 文書種別ラベル
+            weights: 重み行列（特徴量次元 × ラベル数）
+            bias: バイアス（ラベル数）
+            ngram_range: n-gramの最小・最大長
+        """
+        self.labels = list(labels)
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+        self.ngram_range = (int(ngram_range[0]), int(ngram_range[1]))
+        self.num_features = self.weights.shape[0]
+    
+    @classmethod
+    def load(cls, path: Path) -> "NgramClassifier":
+        """npzファイルからモデルを読み込む"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                labels=[str(label) for label in data["labels"]],
+                weights=data["weights"],
+                bias=data["bias"],
+                ngram_range=tuple(data["ngram_range"])
+            )
+    
+    def save(self, path: Path):
+        """モデルをnpzファイルに保存"""
+        np.savez_compressed(
+            path,
+            labels=np.array(self.labels),
+            weights=self.weights,
+            bias=self.bias,
+            ngram_range=np.array(self.ngram_range)
+        )
+    
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        複数テキストの所属確率を一括計算
+        
+        Args:
+            texts: 正規化済みテキストのリスト
+            
+        Returns:
+            確率行列（テキスト数 × ラベル数）
+        """
+        doc_ids, feature_ids, values = hash_features(
+            texts, self.num_features, self.ngram_range
+        )
+        logits = sparse_dot(doc_ids, feature_ids, values, self.weights, len(texts)) + self.bias
+        return softmax(logits)
+    
+    def classify_texts(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """
+        複数テキストを一括分類
+        
+        Returns:
+            (ラベル, 確率) のリスト
+        """
+        if not texts:
+            return []
+        
+        probabilities = self.predict_proba(texts)
+        best = probabilities.argmax(axis=1)
+        return [
+            (self.labels[label_idx], float(probabilities[row, label_idx]))
+            for row, label_idx in enumerate(best)
+        ]
+
+def hash_features(
+    texts: Sequence[str],
+    num_features: int,
+    ngram_range: Tuple[int, int]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    テキスト群を文字n-gramのハッシュ特徴量（L2正規化済みの疎表現）に変換
+    
+    全テキストを連結した符号点配列の上でn-gramハッシュをまとめて計算し、
+    文書境界をまたぐn-gramだけを除外する。
+    
+    Returns:
+        (文書インデックス, 特徴量インデックス, 値) の3配列
+    """
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    doc_of_char = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+    
+    doc_parts = []
+    feature_parts = []
+    
+    with np.errstate(over="ignore"):
+        for n in range(ngram_range[0], ngram_range[1] + 1):
+            count = len(codes) - n + 1
+            if count <= 0:
+                continue
+            
+            hashes = np.full(count, _HASH_SEED ^ np.uint64(n), dtype=np.uint64)
+            for offset in range(n):
+                hashes = (hashes ^ codes[offset:offset + count]) * _HASH_PRIME
+            hashes ^= hashes >> _HASH_SHIFT
+            
+            same_doc = doc_of_char[:count] == doc_of_char[n - 1:n - 1 + count]
+            doc_parts.append(doc_of_char[:count][same_doc])
+            feature_parts.append((hashes[same_doc] % np.uint64(num_features)).astype(np.int64))
+    
+    if not doc_parts:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+    
+    keys = np.concatenate(doc_parts) * num_features + np.concatenate(feature_parts)
+    unique_keys, counts = np.unique(keys, return_counts=True)
+    doc_ids = unique_keys // num_features
+    feature_ids = unique_keys % num_features
+    
+    values = counts.astype(np.float32)
+    norms = np.sqrt(np.bincount(doc_ids, weights=values ** 2, minlength=len(texts)))
+    values /= norms[doc_ids].astype(np.float32)
+    
+    return doc_ids, feature_ids, values
+
+def sparse_dot(
+    doc_ids: np.ndarray,
+    feature_ids: np.ndarray,
+    values: np.ndarray,
+    weights: np.ndarray,
+    num_docs: int
+) -> np.ndarray:
+    """疎特徴量と重み行列の積（文書数 × ラベル数）"""
+    contributions = weights[feature_ids] * values[:, None]
+    return np.stack(
+        [np.bincount(doc_ids, weights=contributions[:, col], minlength=num_docs) for col in range(weights.shape[1])],
+        axis=1
+    ).astype(np.float32)
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """行ごとのソフトマックス"""
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+def train_ngram_classifier(
+    texts: Sequence[str],
+    labels: Sequence[str],
+    num_features: int = DEFAULT_NUM_FEATURES,
+    ngram_range: Tuple[int, int] = DEFAULT_NGRAM_RANGE,
+    epochs: int = 200,
+    learning_rate: float = 1.0,
+    l2: float = 1e-4
+) -> NgramClassifier:
+    """
+    ラベル付きテキストから多クラスロジスティック回帰を学習
+    
+    Args:
+        texts: 正規化済みテキストのリスト
+        labels: 各テキストの文書種別ラベル
+        num_features: ハッシュ特徴量の次元数
+        ngram_range: n-gramの最小・最大長
+        epochs: 全件勾配降下の反復回数
+        learning_rate: 学習率
+        l2: L2正則化係数
+        
+    Returns:
+        学習済みモデル
+    """
+    label_names = sorted(set(labels))
+    label_index = {label: idx for idx, label in enumerate(label_names)}
+    targets = np.zeros((len(texts), len(label_names)), dtype=np.float32)
+    targets[np.arange(len(texts)), [label_index[label] for label in labels]] = 1.0
+    
+    doc_ids, feature_ids, values = hash_features(texts, num_features, ngram_range)
+    
+    weights = np.zeros((num_features, len(label_names)), dtype=np.float32)
+    bias = np.zeros(len(label_names), dtype=np.float32)
+    
+    for epoch in range(epochs):
+        logits = sparse_dot(doc_ids, feature_ids, values, weights, len(texts)) + bias
+        delta = (softmax(logits) - targets) / len(texts)
+        
+        gradient = np.zeros_like(weights)
+        np.add.at(gradient, feature_ids, delta[doc_ids] * values[:, None])
+        gradient += l2 * weights
+        
+        weights -= learning_rate * gradient
+        bias -= learning_rate * delta.sum(axis=0)
+        
+        if (epoch + 1) % 50 == 0:
+            loss = -np.mean(np.log(softmax(logits)[targets > 0] + 1e-9))
+            logger.info(f"Epoch {epoch + 1}/{epochs}: loss={loss:.4f}")
+    
+    return NgramClassifier(label_names, weights, bias, ngram_range)
+
+_models: Dict[str, NgramClassifier] = {}
+_models_lock = threading.Lock()
+
+def get_ngram_classifier(config_loader, model_path: str) -> Optional[NgramClassifier]:
+    """
+    設定ディレクトリのモデルを読み込む（ファイル内容が変わるまで再利用）
+    
+    Args:
+        config_loader: 設定ローダー
+        model_path: 設定ディレクトリからの相対パス
+        
+    Returns:
+        モデル（ファイルが無い・読めない場合はNone）
+    """
+    full_path = config_loader.config_dir / model_path
+    if not full_path.exists():
+        logger.warning(f"N-gram model not found: {full_path}")
+        return None
+    
+    fingerprint = config_loader.get_config_fingerprint([model_path])
+    
+    with _models_lock:
+        model = _models.get(fingerprint)
+        if model is None:
+            try:
+                model = NgramClassifier.load(full_path)
+            except Exception as e:
+                logger.error(f"Failed to load n-gram model {full_path}: {str(e)}")
+                return None
+            _models.clear()
+            _models[fingerprint] = model
+            logger.info(f"Loaded n-gram model: labels={model.labels}, features={model.num_features}")
+        
+        return model
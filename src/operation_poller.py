@@ -0,0 +1,143 @@
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from .document_context import DocumentContext
+from .extract_azure_docint import (
+    POLL_BACKOFF_FACTOR,
+    check_operation,
+    finish_operation,
+    get_poll_intervals,
+    jittered,
+    record_model_latency,
+    store_operation_result
+)
+from .operation_store import OperationStore
+from .pipeline import resume_pipeline
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET_SECONDS = 45.0
+
+# 確認時・成果物の保存時にエラーになった操作を次に確認するまでの秒数
+ERROR_RETRY_SECONDS = 30.0
+
+# 確認を打ち切る状態（これ以外は期限まで確認を続ける）
+FINAL_STATUSES = ("succeeded", "failed", "client_error")
+
+def poll_operations(
+    store: OperationStore,
+    on_complete: Callable[[str, bool, Optional[Dict], Dict, Dict, DocumentContext], None],
+    pdf_loader: Optional[Callable[[str], bytes]] = None,
+    budget_seconds: float = DEFAULT_BUDGET_SECONDS,
+    max_operations: int = 0
+) -> Dict[str, int]:
+    """
+    確認時刻を過ぎた解析操作の状態を1回ずつ確認し、完了した文書のマッピング・検証を再開
+    
+    待機はせず、実行中の操作は次の確認時刻を記録して次回に回す。
+    タイマートリガーから定期的に呼ぶことで、少数のワーカーで多数の文書の解析操作を追跡できる。
+    on_complete が失敗した操作は記録を残して ERROR_RETRY_SECONDS 後にやり直し、残りの操作の確認は続ける。
+    
+    Args:
+        store: 解析操作ストア
+        on_complete: 完了した文書ごとに (BLOB名, 成功フラグ, CDMデータ, 検証レポート, 生抽出データ, 文書コンテキスト) で呼ぶ
+        pdf_loader: BLOB名からPDFを読む関数（解析失敗時のローカル抽出で使う）
+        budget_seconds: この秒数を過ぎたら残りの操作は次回に回す
+        max_operations: 1回に確認する最大件数（0なら制限なし）
+        
+    Returns:
+        件数（checked / running / completed / failed / errors）
+    """
+    started = time.monotonic()
+    counts = {"checked": 0, "running": 0, "completed": 0, "failed": 0, "errors": 0}
+    
+    for record in store.list_due(limit=max_operations):
+        if time.monotonic() - started >= budget_seconds:
+            logger.info("Operation polling budget exhausted, continuing next run")
+            break
+        
+        record = store.claim(record)
+        if record is None:
+            continue
+        
+        counts["checked"] += 1
+        context = DocumentContext(record["blob_name"], b"")
+        try:
+            outcome = advance_operation(record, pdf_loader, context)
+        except Exception as e:
+            logger.error(f"Failed to check operation {record['id']}: {str(e)}", exc_info=True)
+            counts["errors"] += 1
+            record["next_poll_at"] = time.time() + ERROR_RETRY_SECONDS
+            store.release(record)
+            continue
+        
+        if outcome is None:
+            counts["running"] += 1
+            store.release(record)
+            continue
+        
+        success, cdm_data, validation_report, raw_extraction = outcome
+        try:
+            on_complete(record["blob_name"], success, cdm_data, validation_report, raw_extraction, context)
+        except Exception as e:
+            logger.error(f"Failed to save results for operation {record['id']}: {str(e)}", exc_info=True)
+            counts["errors"] += 1
+            record["next_poll_at"] = time.time() + ERROR_RETRY_SECONDS
+            store.release(record)
+            continue
+        
+        counts["completed" if success else "failed"] += 1
+        store.delete(record["id"])
+    
+    logger.info(f"Polled operations: {counts}")
+    return counts
+
+def advance_operation(
+    record: Dict[str, Any],
+    pdf_loader: Optional[Callable[[str], bytes]] = None,
+    context: Optional[DocumentContext] = None
+) -> Optional[Tuple[bool, Optional[Dict], Dict, Dict]]:
+    """
+    解析操作の状態を1回確認し、終わっていればパイプラインを再開
+    
+    操作が終わったら、送信時に確保したリソースの枠とサーキットブレーカーの送信許可に結果を一度だけ記録する
+    （record の finished_status に残し、成果物の保存をやり直すときは記録し直さない）。
+    
+    Returns:
+        run_pipeline と同じ結果（まだ実行中ならNone。record の次の確認時刻を更新する）
+    """
+    operation = record["operation"]
+    metrics = record["extraction_metrics"]
+    metrics["poll_count"] = metrics.get("poll_count", 0) + 1
+    
+    status, analyze_result, retry_after = check_operation(operation["operation_location"], metrics)
+    now = time.time()
+    elapsed_seconds = now - record["submitted_at"]
+    
+    if status == "succeeded":
+        metrics["status"] = status
+        if not record.get("finished_status"):
+            metrics["time_to_result_ms"] = round(elapsed_seconds * 1000, 1)
+            record_model_latency(operation["model_id"], operation["api_version"], metrics["time_to_result_ms"])
+            finish(record, status, elapsed_seconds)
+        store_operation_result(operation, analyze_result)
+        return resume_pipeline(record, analyze_result, pdf_loader, context)
+    
+    if status in FINAL_STATUSES or now >= record["expires_at"]:
+        metrics["status"] = status if status in FINAL_STATUSES else "timeout"
+        logger.error(f"Operation {record['id']} for {record['blob_name']} ended with {metrics['status']}")
+        finish(record, metrics["status"], elapsed_seconds)
+        return resume_pipeline(record, None, pdf_loader, context)
+    
+    _, max_interval = get_poll_intervals()
+    record["poll_interval"] = min(record["poll_interval"] * POLL_BACKOFF_FACTOR, max_interval)
+    record["next_poll_at"] = now + (retry_after if retry_after is not None else jittered(record["poll_interval"]))
+    logger.debug(f"Operation {record['id']} status: {status} (poll {metrics['poll_count']})")
+    return None
+
+def finish(record: Dict[str, Any], status: str, elapsed_seconds: float):
+    """操作の最終状態をリソースとサーキットブレーカーに記録（記録済みなら何もしない）"""
+    if record.get("finished_status"):
+        return
+    finish_operation(record["operation"], status, elapsed_seconds)
+    record["finished_status"] = status
@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+from .extraction_cache import BACKEND_BLOB, BACKEND_LOCAL, BACKEND_NONE, BlobContainerBackend, LocalDirectoryBackend
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_SECONDS = 60.0
+
+class LocalOperationBackend(LocalDirectoryBackend):
+    """ローカルディレクトリのバックエンド（確認できる時刻をファイルの更新時刻に持たせる）"""
+    
+    def write(self, key: str, data: bytes, available_at: float = 0.0):
+        super().write(key, data)
+        os.utime(self.directory / f"{key}.json", (available_at, available_at))
+    
+    def list_available(self) -> Iterable[Tuple[str, float]]:
+        """(キー, 確認できる時刻) の一覧（記録の中身は読まない）"""
+        return [(key, modified) for key, _, modified in self.list_entries()]
+
+class BlobOperationBackend(BlobContainerBackend):
+    """Blob Storageのバックエンド（確認できる時刻をBLOBのメタデータに持たせる）"""
+    
+    def write(self, key: str, data: bytes, available_at: float = 0.0):
+        self.container_client.upload_blob(
+            f"{self.prefix}{key}.json", data, overwrite=True, metadata={"available_at": f"{available_at:.3f}"}
+        )
+    
+    def list_available(self) -> Iterable[Tuple[str, float]]:
+        """(キー, 確認できる時刻) の一覧（一覧のメタデータだけを使い、記録はダウンロードしない）"""
+        entries = []
+        for blob in self.container_client.list_blobs(name_starts_with=self.prefix, include=["metadata"]):
+            key = blob.name[len(self.prefix):]
+            if key.endswith(".json"):
+                entries.append((key[:-len(".json")], float((blob.metadata or {}).get("available_at", 0))))
+        return entries
+
+class OperationStore:
+    """
+    送信済みでまだ結果を取得していない解析操作の記録（1操作1エントリ）
+    
+    記録には Operation-Location と、マッピング・検証を再開するための文書情報（分類結果・ページテキスト）を保存する。
+    プロセスやホストが再起動しても、どのポーラーからでも続きを処理できる。
+    次に確認できる時刻（次の確認時刻と確保期限の遅い方）はバックエンドの索引に持たせ、
+    list_due は確認時刻を過ぎた記録だけを読む。
+    """
+    
+    def __init__(self, backend, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        """
+        Args:
+            backend: 保存先（LocalOperationBackend / BlobOperationBackend）
+            lease_seconds: ポーラーが操作を確保してから他のポーラーに渡さない秒数
+        """
+        self.backend = backend
+        self.lease_seconds = lease_seconds
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    
+    def create(self, record: Dict) -> str:
+        """新しい操作を保存してIDを返す"""
+        operation_id = uuid.uuid4().hex
+        self.save({**record, "id": operation_id, "created_at": time.time()})
+        return operation_id
+    
+    def save(self, record: Dict):
+        """操作の記録を保存（上書き）"""
+        self.backend.write(
+            record["id"], json.dumps(record, ensure_ascii=False).encode("utf-8"), available_at(record)
+        )
+    
+    def load(self, operation_id: str) -> Optional[Dict]:
+        """操作の記録を取得（無い・読めない場合はNone）"""
+        try:
+            data = self.backend.read(operation_id)
+        except Exception as e:
+            logger.warning(f"Failed to read operation {operation_id}: {str(e)}")
+            return None
+        
+        if data is None:
+            return None
+        
+        try:
+            return json.loads(data)
+        except ValueError:
+            logger.warning(f"Corrupted operation record {operation_id}")
+            return None
+    
+    def delete(self, operation_id: str):
+        """操作の記録を削除"""
+        self.backend.delete(operation_id)
+    
+    def list_due(self, now: Optional[float] = None, limit: int = 0) -> List[Dict]:
+        """
+        次の確認時刻を過ぎ、他のポーラーが確保していない操作（確認時刻の早い順）
+        
+        Args:
+            now: 基準時刻（省略時は現在時刻）
+            limit: 返す最大件数（0なら制限なし）
+        """
+        now = time.time() if now is None else now
+        due_ids = sorted(
+            (available, operation_id)
+            for operation_id, available in self.backend.list_available()
+            if available <= now
+        )
+        due = []
+        
+        for _, operation_id in due_ids:
+            if limit > 0 and len(due) >= limit:
+                break
+            record = self.load(operation_id)
+            if record is None or available_at(record) > now:
+                continue
+            due.append(record)
+        
+        return due
+    
+    def claim(self, record: Dict) -> Optional[Dict]:
+        """
+        操作を確保する（確保できなければNone）
+        
+        ストレージに条件付き書き込みが無いため、書き込み後に読み直して確認する。
+        まれに2つのポーラーが同じ操作を確認しても、結果の取得と成果物の保存は同じ内容の上書きになる。
+        """
+        current = self.load(record["id"])
+        now = time.time()
+        if current is None or available_at(current) > now:
+            return None
+        
+        current["lease_owner"] = self.owner
+        current["lease_until"] = now + self.lease_seconds
+        self.save(current)
+        
+        confirmed = self.load(record["id"])
+        if confirmed is None or confirmed.get("lease_owner") != self.owner:
+            return None
+        return confirmed
+    
+    def release(self, record: Dict):
+        """確保を解除して保存（次の確認時刻などを更新した記録を渡す）"""
+        record["lease_owner"] = None
+        record["lease_until"] = 0
+        self.save(record)
+    
+    def count(self) -> int:
+        """未完了の操作数"""
+        return sum(1 for _ in self.backend.list_entries())
+
+def available_at(record: Dict) -> float:
+    """操作を次に確認できる時刻（次の確認時刻と確保期限の遅い方）"""
+    return max(record.get("next_poll_at", 0), record.get("lease_until", 0) or 0)
+
+_store: Optional[OperationStore] = None
+_store_key: Optional[tuple] = None
+_store_lock = threading.Lock()
+
+def get_operation_store() -> Optional[OperationStore]:
+    """
+    プロセス共有の解析操作ストアを取得
+    
+    環境変数:
+        OPERATION_STORE_BACKEND: none / local / blob（既定 none。none なら送信した関数内で結果を待つ）
+        OPERATION_STORE_DIR: local の保存先ディレクトリ
+        OPERATION_STORE_CONTAINER: blob の保存先コンテナ（既定 artifacts）
+        OPERATION_LEASE_SECONDS: ポーラーが操作を確保する秒数（既定 60）
+        
+    Returns:
+        ストア（無効設定の場合はNone）
+    """
+    global _store, _store_key
+    
+    backend_name = os.environ.get("OPERATION_STORE_BACKEND", BACKEND_NONE).lower()
+    if backend_name == BACKEND_NONE:
+        return None
+    
+    location = (
+        os.environ.get("OPERATION_STORE_DIR", "")
+        if backend_name == BACKEND_LOCAL
+        else os.environ.get("OPERATION_STORE_CONTAINER", "artifacts")
+    )
+    lease_seconds = float(os.environ.get("OPERATION_LEASE_SECONDS", DEFAULT_LEASE_SECONDS))
+    key = (backend_name, location, lease_seconds)
+    
+    with _store_lock:
+        if _store is not None and _store_key == key:
+            return _store
+        
+        try:
+            if backend_name == BACKEND_LOCAL:
+                if not location:
+                    logger.warning("OPERATION_STORE_DIR is not set, operation store disabled")
+                    return None
+                backend = LocalOperationBackend(location)
+            elif backend_name == BACKEND_BLOB:
+                backend = BlobOperationBackend(location, prefix="operations/")
+            else:
+                logger.warning(f"Unknown operation store backend: {backend_name}")
+                return None
+        except Exception as e:
+            logger.error(f"Failed to initialize operation store backend {backend_name}: {str(e)}")
+            return None
+        
+        _store = OperationStore(backend, lease_seconds)
+        _store_key = key
+        logger.info(f"Operation store initialized (backend={backend_name}, location={location})")
+        return _store
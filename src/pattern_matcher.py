@@ -0,0 +1,96 @@
+import logging
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class AhoCorasickMatcher:
+    """複数パターンをテキスト1回の走査で検出するAho–Corasickオートマトン"""
+    
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Any]] = [[]]
+        self._built = False
+        self.pattern_count = 0
+    
+    def add(self, pattern: str, payload: Any):
+        """
+        パターンを登録
+        
+        Args:
+            pattern: 検出する文字列
+            payload: 一致時に返す値
+        """
+        if not pattern:
+            return
+        
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        
+        self._outputs[state].append(payload)
+        self.pattern_count += 1
+        self._built = False
+    
+    def build(self):
+        """失敗遷移を構築（パターン登録後に1回呼ぶ）"""
+        queue = []
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                
+                # 失敗遷移先の出力を取り込み、走査時に遷移を辿らなくて済むようにする
+                if self._outputs[self._fail[next_state]]:
+                    self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+        
+        self._built = True
+        logger.debug(f"Built Aho-Corasick automaton: {self.pattern_count} patterns, {len(self._goto)} states")
+    
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, Any]]:
+        """
+        テキストを走査して一致を列挙
+        
+        Returns:
+            (一致終了位置, payload) のイテレータ
+        """
+        if not self._built:
+            self.build()
+        
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        state = 0
+        
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            
+            if outputs[state]:
+                for payload in outputs[state]:
+                    yield position, payload
+    
+    def find_all(self, text: str) -> Set[Any]:
+        """テキスト中に出現したパターンのpayload集合を返す"""
+        return {payload for _, payload in self.iter_matches(text)}
@@ -0,0 +1,340 @@
+import logging
+import re
+import time
+from io import BytesIO, StringIO
+from typing import Dict, List, Optional, Tuple, Iterable, Iterator
+from pdfminer.converter import PDFPageAggregator, TextConverter
+from pdfminer.layout import LAParams, LTContainer, LTItem, LTText, LTTextBox, LTTextLine
+from pdfminer.pdfdevice import PDFDevice
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdffont import PDFUnicodeNotDefined
+from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import PDFStream, resolve1
+
+logger = logging.getLogger(__name__)
+
+# 文字列オペランドの直後に置かれたテキスト描画演算子（Tj / TJ / ' / "）
+TEXT_SHOW_OPERATOR = re.compile(rb"[)>\]]\s*(?:Tj|TJ|'|\")")
+
+# テキスト抽出方式（layout: レイアウト解析あり / fast: テキスト描画演算子の文字列のみ）
+TEXT_MODE_LAYOUT = "layout"
+TEXT_MODE_FAST = "fast"
+
+# TJ配列の字間調整（1/1000 em）がこれ以上空いていたら単語区切りとみなす
+FAST_WORD_GAP = 250
+
+def default_laparams() -> LAParams:
+    """分類用のレイアウト解析パラメータ（縦書き対応）"""
+    return LAParams(detect_vertical=True)
+
+class FastTextDevice(PDFDevice):
+    """
+    レイアウト解析を行わずにテキスト描画演算子の文字列だけを集める軽量デバイス
+    
+    文字ボックスや行グループを作らず、描画順に文字を連結する。
+    テキスト行列の位置が変わったら改行を入れるため、キーワード照合に十分なテキストになる。
+    """
+    
+    def __init__(self, rsrcmgr: PDFResourceManager):
+        super().__init__(rsrcmgr)
+        self._chunks: List[str] = []
+        self._line_origin = None
+    
+    def begin_page(self, page, ctm):
+        super().begin_page(page, ctm)
+        self._chunks = []
+        self._line_origin = None
+    
+    def render_string(self, textstate, seq, ncs, graphicstate):
+        font = textstate.font
+        if font is None:
+            return
+        
+        line_origin = (textstate.matrix[4], textstate.matrix[5], textstate.linematrix[1])
+        if self._line_origin is not None and line_origin != self._line_origin:
+            self._chunks.append("\n")
+        self._line_origin = line_origin
+        
+        for obj in seq:
+            if isinstance(obj, bytes):
+                for cid in font.decode(obj):
+                    try:
+                        self._chunks.append(font.to_unichr(cid))
+                    except PDFUnicodeNotDefined:
+                        continue
+            elif isinstance(obj, (int, float)) and obj <= -FAST_WORD_GAP:
+                self._chunks.append(" ")
+    
+    def get_text(self) -> str:
+        """現在のページのテキスト（ページ区切りの改ページ文字付き）"""
+        return "".join(self._chunks) + "\n\f"
+
+def create_text_device(resource_manager: PDFResourceManager, text_mode: str, laparams: Optional[LAParams]):
+    """抽出方式に応じたデバイスを作成"""
+    if text_mode == TEXT_MODE_FAST:
+        return FastTextDevice(resource_manager)
+    return PDFPageAggregator(resource_manager, laparams=laparams or default_laparams())
+
+def extract_page_texts(
+    pdf_bytes: bytes,
+    laparams: Optional[LAParams] = None,
+    page_numbers: Optional[Iterable[int]] = None,
+    text_mode: str = TEXT_MODE_LAYOUT
+) -> Tuple[List[str], int]:
+    """
+    PDFからページ単位でテキストを抽出
+    
+    layout モードでは pdfminerの extract_text と同じ TextConverter を使うため、
+    ページテキストを連結した結果は extract_text の出力と一致する。
+    
+    Args:
+        pdf_bytes: PDFファイルのバイトデータ
+        laparams: レイアウト解析パラメータ（省略時は縦書き対応）
+        page_numbers: 抽出するページ番号（0始まり、省略時は全ページ）
+        text_mode: 抽出方式（layout / fast）
+        
+    Returns:
+        (ページごとのテキストリスト, 総ページ数)
+    """
+    if laparams is None:
+        laparams = default_laparams()
+    
+    wanted = set(page_numbers) if page_numbers is not None else None
+    
+    parser = PDFParser(BytesIO(pdf_bytes))
+    document = PDFDocument(parser)
+    
+    resource_manager = PDFResourceManager()
+    output = StringIO()
+    if text_mode == TEXT_MODE_FAST:
+        device = FastTextDevice(resource_manager)
+    else:
+        device = TextConverter(resource_manager, output, laparams=laparams)
+    interpreter = PDFPageInterpreter(resource_manager, device)
+    
+    page_texts = []
+    page_count = 0
+    
+    try:
+        for page_idx, page in enumerate(PDFPage.create_pages(document)):
+            page_count += 1
+            if wanted is not None and page_idx not in wanted:
+                continue
+            
+            interpreter.process_page(page)
+            if text_mode == TEXT_MODE_FAST:
+                page_texts.append(device.get_text())
+                continue
+            
+            page_texts.append(output.getvalue())
+            output.seek(0)
+            output.truncate(0)
+    finally:
+        device.close()
+    
+    logger.debug(f"Extracted text from {len(page_texts)}/{page_count} pages")
+    return page_texts, page_count
+
+def iter_page_texts(
+    pdf_bytes: bytes,
+    laparams: Optional[LAParams] = None,
+    text_mode: str = TEXT_MODE_LAYOUT
+) -> Iterator[Tuple[str, int]]:
+    """
+    ページ単位でテキストを逐次生成（ストリーミング抽出用）
+    
+    extract_pages と同じ PDFPageAggregator によるページジェネレータで、
+    保持するレイアウトオブジェクトは常に1ページ分だけになる。
+    テキストは TextConverter と同じ規則で組み立てるため extract_page_texts の結果と一致する。
+    
+    Args:
+        pdf_bytes: PDFファイルのバイトデータ
+        laparams: レイアウト解析パラメータ（省略時は縦書き対応）
+        text_mode: 抽出方式（layout / fast）
+        
+    Yields:
+        (ページテキスト, 総ページ数)
+    """
+    parser = PDFParser(BytesIO(pdf_bytes))
+    document = PDFDocument(parser)
+    page_count = count_pages(document)
+    
+    resource_manager = PDFResourceManager()
+    device = create_text_device(resource_manager, text_mode, laparams)
+    interpreter = PDFPageInterpreter(resource_manager, device)
+    
+    for page in PDFPage.create_pages(document):
+        interpreter.process_page(page)
+        if text_mode == TEXT_MODE_FAST:
+            yield device.get_text(), page_count
+        else:
+            yield render_layout_text(device.get_result()), page_count
+
+def extract_page_lines(
+    pdf_bytes: bytes,
+    laparams: Optional[LAParams] = None
+) -> Tuple[List[List[Tuple[float, float, float, str]]], int]:
+    """
+    PDFからページ単位で位置付きのテキスト行を抽出（テンプレートによるローカル抽出用）
+    
+    座標はページ左上を原点とするポイント単位で、行は上から順に並ぶ。
+    
+    Args:
+        pdf_bytes: PDFファイルのバイトデータ
+        laparams: レイアウト解析パラメータ（省略時は縦書き対応）
+        
+    Returns:
+        (ページごとの (上端y, 左端x, 右端x, テキスト) のリスト, 総ページ数)
+    """
+    if laparams is None:
+        laparams = default_laparams()
+    
+    parser = PDFParser(BytesIO(pdf_bytes))
+    document = PDFDocument(parser)
+    
+    resource_manager = PDFResourceManager()
+    device = PDFPageAggregator(resource_manager, laparams=laparams)
+    interpreter = PDFPageInterpreter(resource_manager, device)
+    
+    page_lines = []
+    
+    for page in PDFPage.create_pages(document):
+        interpreter.process_page(page)
+        layout = device.get_result()
+        lines = []
+        
+        def collect(item: LTItem):
+            if isinstance(item, LTTextLine):
+                text = item.get_text().strip()
+                if text:
+                    lines.append((round(layout.height - item.y1, 1), round(item.x0, 1), round(item.x1, 1), text))
+            elif isinstance(item, LTContainer):
+                for child in item:
+                    collect(child)
+        
+        collect(layout)
+        lines.sort()
+        page_lines.append(lines)
+    
+    logger.debug(f"Extracted positioned lines from {len(page_lines)} pages")
+    return page_lines, len(page_lines)
+
+def render_layout_text(layout: LTItem) -> str:
+    """レイアウト解析結果をテキスト化（TextConverter と同じ規則）"""
+    chunks = []
+    
+    def render(item: LTItem):
+        if isinstance(item, LTContainer):
+            for child in item:
+                render(child)
+        elif isinstance(item, LTText):
+            chunks.append(item.get_text())
+        if isinstance(item, LTTextBox):
+            chunks.append("\n")
+    
+    render(layout)
+    chunks.append("\f")
+    return "".join(chunks)
+
+def count_pages(document: PDFDocument) -> int:
+    """ページツリーの /Count から総ページ数を取得（取得できなければページを数える）"""
+    try:
+        count = resolve1(resolve1(document.catalog["Pages"])["Count"])
+        if isinstance(count, int) and count >= 0:
+            return count
+    except (KeyError, TypeError):
+        pass
+    
+    return sum(1 for _ in PDFPage.create_pages(document))
+
+def inspect_text_layer(pdf_bytes: bytes, max_pages: int = 3) -> Dict:
+    """
+    レイアウト解析を行わずにテキスト層の有無を判定（スキャンPDFの早期検出用）
+    
+    ページリソースのフォント定義とコンテンツストリーム内のテキスト描画演算子を調べる。
+    Form XObject 内のテキストも1階層まで確認する。
+    
+    Args:
+        pdf_bytes: PDFファイルのバイトデータ
+        max_pages: 調べるページ数（総ページ数がこれを超える場合は先頭から末尾まで等間隔に選ぶ。0以下なら全ページ）
+        
+    Returns:
+        判定結果（has_text_layer, pages_checked, elapsed_ms など）
+    """
+    started = time.perf_counter()
+    result = {
+        "has_text_layer": False,
+        "pages_checked": 0,
+        "pages_with_fonts": 0,
+        "pages_with_text_operators": 0
+    }
+    
+    parser = PDFParser(BytesIO(pdf_bytes))
+    document = PDFDocument(parser)
+    sampled = sample_page_indexes(count_pages(document), max_pages)
+    
+    for page_idx, page in enumerate(PDFPage.create_pages(document)):
+        if sampled is not None:
+            if page_idx > sampled[-1]:
+                break
+            if page_idx not in sampled:
+                continue
+        
+        result["pages_checked"] += 1
+        has_fonts, has_text_operators = _inspect_content(page.resources, page.contents, depth=0)
+        
+        if has_fonts:
+            result["pages_with_fonts"] += 1
+        if has_text_operators:
+            result["pages_with_text_operators"] += 1
+        if has_fonts and has_text_operators:
+            result["has_text_layer"] = True
+            break
+    
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+def sample_page_indexes(page_count: int, max_pages: int) -> Optional[List[int]]:
+    """
+    テキスト層の確認に使うページ番号（0始まり）を先頭から末尾まで等間隔に選ぶ
+    
+    Returns:
+        ページ番号のリスト（全ページを調べる場合はNone）
+    """
+    if max_pages <= 0 or page_count <= max_pages:
+        return None
+    if max_pages == 1:
+        return [0]
+    return sorted({round(i * (page_count - 1) / (max_pages - 1)) for i in range(max_pages)})
+
+def _inspect_content(resources, contents, depth: int) -> Tuple[bool, bool]:
+    """リソースとコンテンツストリームからフォント定義とテキスト描画演算子の有無を調べる"""
+    resources = resolve1(resources) or {}
+    has_fonts = bool(resolve1(resources.get("Font")))
+    has_text_operators = False
+    
+    for content in contents or []:
+        stream = resolve1(content)
+        if isinstance(stream, PDFStream) and TEXT_SHOW_OPERATOR.search(stream.get_data()):
+            has_text_operators = True
+            break
+    
+    if (has_fonts and has_text_operators) or depth > 0:
+        return has_fonts, has_text_operators
+    
+    xobjects = resolve1(resources.get("XObject")) or {}
+    for xobject_ref in xobjects.values():
+        xobject = resolve1(xobject_ref)
+        subtype = resolve1(xobject.get("Subtype")) if isinstance(xobject, PDFStream) else None
+        if getattr(subtype, "name", None) != "Form":
+            continue
+        
+        form_fonts, form_text = _inspect_content(xobject.get("Resources"), [xobject], depth + 1)
+        has_fonts = has_fonts or form_fonts
+        has_text_operators = has_text_operators or form_text
+        if has_fonts and has_text_operators:
+            break
+    
+    return has_fonts, has_text_operators
@@ -1,91 +1,468 @@
+import copy
 import logging
-from typing import Tuple, Dict, Any, Optional
-from .classify import classify_document
-from .extract_azure_docint import extract_with_document_intelligence
+import time
+from typing import Tuple, Dict, Any, Callable, Optional
+from .classify import classify_document, find_keyword_pages, load_remaining_page_texts
+from .extract_azure_docint import (
+    PAGES_AUTO,
+    extract_with_document_intelligence,
+    extract_text_with_ocr,
+    get_default_timeout,
+    get_model_latency_stats,
+    get_poll_intervals,
+    is_service_failure,
+    process_extraction_result,
+    select_pages,
+    submit_document
+)
+from .extract_local import FALLBACK_LOCAL, extract_with_local_text, extract_with_vendor_rules, get_fallback_mode
 from .map_to_cdm import map_to_cdm
 from .validate_er import validate_and_resolve
 from .config_loader import ConfigLoader
+from .document_context import DocumentContext
+from .classification_cache import get_classification_cache, get_classifier_fingerprint
+from .http_session import get_session_metrics, summarize_requests
+from .circuit_breaker import get_circuit_breaker
+from .endpoint_pool import get_endpoint_pool
+from .operation_store import OperationStore
 
 logger = logging.getLogger(__name__)
 
-def run_pipeline(blob_name: str, pdf_bytes: bytes) -> Tuple[bool, Optional[Dict], Dict, Dict]:
+def classify_with_cache(
+    pdf_bytes: bytes,
+    config_loader: ConfigLoader,
+    context: DocumentContext,
+    validation_report: Dict,
+    force_refresh: bool = False
+) -> Dict[str, Any]:
+    """
+    分類キャッシュを確認し、無ければ分類（テキスト層が無い場合はOCR後に分類）
+    
+    キャッシュには分類時に抽出したページテキストも保存し、ヒット時はミス時と同じテキストを context に戻す
+    （後続のテキストを使う処理の結果がキャッシュの状態で変わらないようにする）。
+    
+    Returns:
+        分類結果（検証レポートの classification エントリ用）
+    """
+    settings = config_loader.get_classifier_settings()
+    cache = get_classification_cache(settings.get("cache", {}))
+    fingerprint = get_classifier_fingerprint(config_loader) if cache else None
+    
+    cached = cache.get(pdf_bytes, fingerprint) if cache else None
+    if cached is not None and "page_texts" in cached:
+        logger.info(f"Classification cache hit for {context.blob_name}")
+        cached = dict(cached)
+        context.set_page_texts(cached.pop("page_texts"), cached.get("page_count", 0))
+        context.text_source = cached.get("text_source", context.text_source)
+        context.text_mode = cached.get("text_mode", context.text_mode)
+        context.text_layer = cached.get("text_layer", context.text_layer)
+        return {**cached, "cache": "hit", "cache_stats": cache.stats()}
+    
+    doc_type, vendor_name, confidence = classify_document(pdf_bytes, config_loader, context)
+    
+    if context.needs_ocr:
+        logger.info("No text layer found, extracting text with OCR")
+        ocr_result = extract_text_with_ocr(pdf_bytes, force_refresh=force_refresh)
+        if ocr_result:
+            context.set_page_texts(*ocr_result)
+            context.text_source = "ocr"
+            doc_type, vendor_name, confidence = classify_document(pdf_bytes, config_loader, context)
+        else:
+            validation_report["errors"].append("OCR extraction failed for document without text layer")
+    
+    classification = {
+        "doc_type": doc_type,
+        "vendor": vendor_name,
+        "confidence": confidence,
+        "page_count": context.page_count,
+        "pages_read": context.pages_read,
+        "text_source": context.text_source,
+        "text_mode": context.text_mode,
+        "text_layer": context.text_layer,
+        "keyword_pages": find_keyword_pages(context.page_texts, doc_type, config_loader) if context.is_complete else None
+    }
+    
+    if cache is None:
+        return classification
+    
+    if context.extraction_failure is None and not context.needs_ocr:
+        cache.put(pdf_bytes, fingerprint, {**classification, "page_texts": context.page_texts})
+    
+    return {**classification, "cache": "miss", "cache_stats": cache.stats()}
+
+def run_pipeline(
+    blob_name: str,
+    pdf_bytes: bytes,
+    context: Optional[DocumentContext] = None,
+    force_refresh: bool = False
+) -> Tuple[bool, Optional[Dict], Dict, Dict]:
     """
     PDF処理パイプライン
     
     Args:
         blob_name: 処理対象のBLOB名
         pdf_bytes: PDFファイルのバイトデータ
+        context: 文書コンテキスト（省略時は新規作成。成果物保存で再利用する場合に指定）
+        force_refresh: Trueなら抽出結果キャッシュを使わずにDocument Intelligenceで解析し直す
         
     Returns:
         (成功フラグ, CDMデータ, 検証レポート, 生抽出データ)
     """
     logger.info(f"Starting pipeline for {blob_name}")
     
-    validation_report = {
-        "blob_name": blob_name,
-        "errors": [],
-        "warnings": [],
-        "info": []
-    }
+    validation_report = new_validation_report(blob_name)
+    
+    if context is None:
+        context = DocumentContext(blob_name, pdf_bytes)
     
     try:
         config_loader = ConfigLoader()
         
-        logger.info("Step 1: Classifying document")
-        doc_type, vendor_name, confidence = classify_document(pdf_bytes, config_loader)
-        validation_report["info"].append({
-            "step": "classification",
-            "doc_type": doc_type,
-            "vendor": vendor_name,
-            "confidence": confidence
-        })
-        
-        if not doc_type:
-            validation_report["errors"].append("Failed to classify document type")
+        classification = classify_step(pdf_bytes, config_loader, context, validation_report, force_refresh)
+        if classification is None:
             return False, None, validation_report, {}
         
-        logger.info(f"Document classified as {doc_type} from {vendor_name or 'unknown vendor'}")
+        doc_type = classification["doc_type"]
+        vendor_name = classification["vendor"]
         
-        logger.info("Step 2: Extracting with Document Intelligence")
-        raw_extraction = extract_with_document_intelligence(
-            pdf_bytes=pdf_bytes,
-            doc_type=doc_type
-        )
+        extraction_metrics = {}
+        pages = None
+        raw_extraction, source = extract_with_local_rules(pdf_bytes, doc_type, vendor_name, config_loader)
         
         if not raw_extraction:
-            validation_report["errors"].append("Failed to extract data from document")
-            return False, None, validation_report, {}
+            logger.info("Step 2: Extracting with Document Intelligence")
+            extraction_config = config_loader.get_extraction_config(doc_type, vendor_name)
+            pages = select_extraction_pages(pdf_bytes, extraction_config, classification, config_loader, context)
+            raw_extraction = extract_with_document_intelligence(
+                pdf_bytes=pdf_bytes,
+                doc_type=doc_type,
+                metrics=extraction_metrics,
+                force_refresh=force_refresh,
+                pages=pages,
+                extraction_config=extraction_config
+            )
+            source = "document_intelligence"
         
-        logger.info("Step 3: Mapping to CDM")
-        cdm_data = map_to_cdm(
-            raw_data=raw_extraction,
-            doc_type=doc_type,
-            vendor_name=vendor_name,
-            config_loader=config_loader
+        return complete_pipeline(
+            pdf_bytes, raw_extraction, source, pages, extraction_metrics,
+            classification, config_loader, context, validation_report
         )
+            
+    except Exception as e:
+        logger.error(f"Pipeline error: {str(e)}", exc_info=True)
+        validation_report["errors"].append(f"Pipeline error: {str(e)}")
+        return False, None, validation_report, {}
+
+def submit_pipeline(
+    blob_name: str,
+    pdf_bytes: bytes,
+    store: OperationStore,
+    context: Optional[DocumentContext] = None,
+    force_refresh: bool = False
+) -> Tuple[Optional[str], Optional[Tuple[bool, Optional[Dict], Dict, Dict]]]:
+    """
+    分類してDocument Intelligenceに解析を送信し、結果を待たずに戻る
+    
+    送信した場合は Operation-Location と再開に必要な文書情報を解析操作ストアに保存し、
+    結果の取得とマッピング・検証は operation_poller が行う。
+    ローカル抽出・キャッシュヒット・送信失敗の場合はこの呼び出しで完了する。
+    
+    Args:
+        blob_name: 処理対象のBLOB名
+        pdf_bytes: PDFファイルのバイトデータ
+        store: 解析操作ストア
+        context: 文書コンテキスト
+        force_refresh: Trueなら抽出結果キャッシュを使わずに解析し直す
         
-        if not cdm_data:
-            validation_report["errors"].append("Failed to map data to CDM schema")
-            return False, None, validation_report, raw_extraction
+    Returns:
+        (解析操作ID, None)。この呼び出しで完了した場合は (None, run_pipeline と同じ結果)
+    """
+    logger.info(f"Starting pipeline for {blob_name} (submit only)")
+    
+    validation_report = new_validation_report(blob_name)
+    
+    if context is None:
+        context = DocumentContext(blob_name, pdf_bytes)
+    
+    try:
+        config_loader = ConfigLoader()
         
-        logger.info("Step 4: Validating and resolving entities")
-        is_valid, resolved_data, validation_errors = validate_and_resolve(
-            cdm_data=cdm_data,
-            doc_type=doc_type,
-            config_loader=config_loader
-        )
+        classification = classify_step(pdf_bytes, config_loader, context, validation_report, force_refresh)
+        if classification is None:
+            return None, (False, None, validation_report, {})
         
-        if validation_errors:
-            validation_report["errors"].extend(validation_errors)
+        doc_type = classification["doc_type"]
+        vendor_name = classification["vendor"]
         
-        if is_valid:
-            logger.info("Pipeline completed successfully")
-            return True, resolved_data, validation_report, raw_extraction
-        else:
-            logger.warning("Document validation failed")
-            return False, cdm_data, validation_report, raw_extraction
+        extraction_metrics = {}
+        pages = None
+        raw_extraction, source = extract_with_local_rules(pdf_bytes, doc_type, vendor_name, config_loader)
+        
+        if not raw_extraction:
+            logger.info("Step 2: Submitting to Document Intelligence")
+            extraction_config = config_loader.get_extraction_config(doc_type, vendor_name)
+            pages = select_extraction_pages(pdf_bytes, extraction_config, classification, config_loader, context)
+            submission = submit_document(
+                pdf_bytes, doc_type, extraction_metrics, force_refresh, pages, extraction_config
+            )
+            source = "document_intelligence"
             
+            if submission["status"] == "cached":
+                raw_extraction = process_extraction_result(submission["analyze_result"], doc_type)
+            elif submission["status"] == "submitted":
+                operation_id = save_pending_operation(
+                    store, submission["operation"], pages, extraction_metrics,
+                    classification, context, validation_report
+                )
+                logger.info(f"Submitted {blob_name} as operation {operation_id}")
+                return operation_id, None
+        
+        return None, complete_pipeline(
+            pdf_bytes, raw_extraction, source, pages, extraction_metrics,
+            classification, config_loader, context, validation_report
+        )
+    
     except Exception as e:
         logger.error(f"Pipeline error: {str(e)}", exc_info=True)
         validation_report["errors"].append(f"Pipeline error: {str(e)}")
-        return False, None, validation_report, {}
\ No newline at end of file
+        return None, (False, None, validation_report, {})
+
+def resume_pipeline(
+    record: Dict[str, Any],
+    analyze_result: Optional[Dict[str, Any]],
+    pdf_loader: Optional[Callable[[str], bytes]] = None,
+    context: Optional[DocumentContext] = None
+) -> Tuple[bool, Optional[Dict], Dict, Dict]:
+    """
+    解析操作ストアの記録と取得したanalyzeResultから、マッピング・検証を再開
+    
+    Args:
+        record: submit_pipeline が保存した解析操作の記録
+        analyze_result: 取得したanalyzeResult（解析失敗・期限切れの場合はNone）
+        pdf_loader: BLOB名からPDFを読む関数（解析失敗時にページテキストが揃っていなければ使う）
+        context: 文書コンテキスト（省略時は新規作成。記録のページテキストを戻し、成果物保存で再利用する場合に指定）
+        
+    Returns:
+        (成功フラグ, CDMデータ, 検証レポート, 生抽出データ)
+    """
+    blob_name = record["blob_name"]
+    validation_report = copy.deepcopy(record["validation_report"])
+    classification = record["classification"]
+    doc_type = classification["doc_type"]
+    
+    logger.info(f"Resuming pipeline for {blob_name} (operation {record['id']})")
+    
+    try:
+        if context is None:
+            context = DocumentContext(blob_name, b"")
+        if record.get("page_texts"):
+            context.set_page_texts(record["page_texts"], record.get("page_count", 0))
+        context.page_count = record.get("page_count", context.page_count)
+        context.text_source = record.get("text_source", context.text_source)
+        context.text_mode = record.get("text_mode", context.text_mode)
+        
+        if analyze_result is None and not context.is_complete and pdf_loader is not None:
+            context.pdf_bytes = pdf_loader(blob_name)
+        
+        raw_extraction = process_extraction_result(analyze_result, doc_type) if analyze_result is not None else None
+        
+        return complete_pipeline(
+            context.pdf_bytes, raw_extraction, "document_intelligence", record.get("pages"),
+            record["extraction_metrics"], classification, ConfigLoader(), context, validation_report
+        )
+    
+    except Exception as e:
+        logger.error(f"Pipeline error: {str(e)}", exc_info=True)
+        validation_report["errors"].append(f"Pipeline error: {str(e)}")
+        return False, None, validation_report, {}
+
+def new_validation_report(blob_name: str) -> Dict[str, Any]:
+    """空の検証レポート"""
+    return {
+        "blob_name": blob_name,
+        "errors": [],
+        "warnings": [],
+        "info": []
+    }
+
+def classify_step(
+    pdf_bytes: bytes,
+    config_loader: ConfigLoader,
+    context: DocumentContext,
+    validation_report: Dict,
+    force_refresh: bool
+) -> Optional[Dict[str, Any]]:
+    """分類して検証レポートに記録（文書種別が判定できなければNone）"""
+    logger.info("Step 1: Classifying document")
+    classification = classify_with_cache(pdf_bytes, config_loader, context, validation_report, force_refresh)
+    validation_report["info"].append({"step": "classification", **classification})
+    
+    if context.extraction_failure is not None:
+        failure = context.extraction_failure
+        validation_report["info"].append({"step": "text_extraction", **failure.to_report()})
+        validation_report["errors"].append(f"Text extraction {failure.status}: {failure.detail}")
+    
+    if not classification["doc_type"]:
+        validation_report["errors"].append("Failed to classify document type")
+        return None
+    
+    logger.info(f"Document classified as {classification['doc_type']} from {classification['vendor'] or 'unknown vendor'}")
+    return classification
+
+def extract_with_local_rules(
+    pdf_bytes: bytes,
+    doc_type: str,
+    vendor_name: Optional[str],
+    config_loader: ConfigLoader
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """ベンダーテンプレートのルールがあればローカル抽出（(抽出データまたはNone, 抽出元)）"""
+    local_rules = config_loader.get_local_extraction_rules(doc_type, vendor_name)
+    if not local_rules:
+        return None, "document_intelligence"
+    
+    logger.info(f"Step 2: Extracting with local template rules for {vendor_name}")
+    return extract_with_vendor_rules(
+        pdf_bytes, doc_type, local_rules, config_loader.get_classifier_settings()
+    ), "local_rules"
+
+def select_extraction_pages(
+    pdf_bytes: bytes,
+    extraction_config: Dict[str, Any],
+    classification: Dict[str, Any],
+    config_loader: ConfigLoader,
+    context: DocumentContext
+) -> Optional[str]:
+    """
+    解析するページ範囲を決める
+    
+    auto の場合、キーワードの出現ページは全ページのテキストから求める
+    （分類が先頭ページだけで終わっていれば残りのページを抽出する。抽出できなければ全ページを解析）。
+    """
+    keyword_pages = classification.get("keyword_pages")
+    if classification.get("pages_read", 0) < classification.get("page_count", 0):
+        keyword_pages = None
+    
+    if extraction_config.get("pages") == PAGES_AUTO and keyword_pages is None:
+        if load_remaining_page_texts(pdf_bytes, config_loader.get_classifier_settings(), context):
+            keyword_pages = find_keyword_pages(context.page_texts, classification["doc_type"], config_loader)
+            classification["keyword_pages"] = keyword_pages
+        else:
+            logger.warning("Page texts incomplete, analyzing all pages instead of auto page range")
+    
+    return select_pages(extraction_config, context.page_count, keyword_pages)
+
+def save_pending_operation(
+    store: OperationStore,
+    operation: Dict[str, Any],
+    pages: Optional[str],
+    extraction_metrics: Dict[str, Any],
+    classification: Dict[str, Any],
+    context: DocumentContext,
+    validation_report: Dict
+) -> str:
+    """送信した解析操作と再開に必要な文書情報を保存"""
+    submitted_at = time.time()
+    first_delay = operation.pop("first_delay", None)
+    poll_interval, _ = get_poll_intervals()
+    
+    return store.create({
+        "blob_name": context.blob_name,
+        "operation": operation,
+        "pages": pages,
+        "classification": classification,
+        "validation_report": validation_report,
+        "extraction_metrics": {**extraction_metrics, "poll_count": 0},
+        "page_texts": context.page_texts,
+        "page_count": context.page_count,
+        "text_source": context.text_source,
+        "text_mode": context.text_mode,
+        "submitted_at": submitted_at,
+        "expires_at": submitted_at + get_default_timeout(),
+        "poll_interval": poll_interval,
+        "next_poll_at": submitted_at + (first_delay if first_delay is not None else poll_interval)
+    })
+
+def should_fall_back(status: str) -> bool:
+    """
+    Document Intelligenceで抽出できなかった文書をローカル抽出で完了させるか
+    
+    送信を止めている（circuit_open）かサービス側の障害の場合だけフォールバックする。
+    認証情報の未設定・4xx・文書自体の解析失敗はサービスが使えても結果が変わらないため失敗とする。
+    """
+    if get_fallback_mode() != FALLBACK_LOCAL:
+        return False
+    return status == "circuit_open" or is_service_failure(status)
+
+def complete_pipeline(
+    pdf_bytes: bytes,
+    raw_extraction: Optional[Dict[str, Any]],
+    source: str,
+    pages: Optional[str],
+    extraction_metrics: Dict[str, Any],
+    classification: Dict[str, Any],
+    config_loader: ConfigLoader,
+    context: DocumentContext,
+    validation_report: Dict
+) -> Tuple[bool, Optional[Dict], Dict, Dict]:
+    """抽出結果（サービス障害で取得できなかった場合はローカル抽出にフォールバック）をCDMにマッピングして検証"""
+    doc_type = classification["doc_type"]
+    vendor_name = classification["vendor"]
+    status = extraction_metrics.get("status", "error")
+    
+    if not raw_extraction and should_fall_back(status):
+        logger.warning(f"Document Intelligence unavailable ({status}), falling back to local text extraction")
+        raw_extraction = extract_with_local_text(pdf_bytes, doc_type, config_loader, context)
+        if raw_extraction:
+            source = "local"
+            validation_report["warnings"].append(
+                f"Extracted with local text fallback (Document Intelligence status: {status})"
+            )
+    
+    breaker = get_circuit_breaker()
+    pool = get_endpoint_pool()
+    validation_report["info"].append({
+        "step": "extraction",
+        "source": source,
+        "pages": pages or "all",
+        **extraction_metrics,
+        "http": summarize_requests(extraction_metrics.get("http")),
+        "http_process": get_session_metrics(),
+        "model_latency": get_model_latency_stats(),
+        "circuit_breaker": breaker.snapshot() if breaker else None,
+        "endpoints": pool.snapshot() if pool else None
+    })
+    
+    if not raw_extraction:
+        validation_report["errors"].append("Failed to extract data from document")
+        return False, None, validation_report, {}
+    
+    logger.info("Step 3: Mapping to CDM")
+    cdm_data = map_to_cdm(
+        raw_data=raw_extraction,
+        doc_type=doc_type,
+        vendor_name=vendor_name,
+        config_loader=config_loader,
+        context=context
+    )
+    
+    if not cdm_data:
+        validation_report["errors"].append("Failed to map data to CDM schema")
+        return False, None, validation_report, raw_extraction
+    
+    logger.info("Step 4: Validating and resolving entities")
+    is_valid, resolved_data, validation_errors = validate_and_resolve(
+        cdm_data=cdm_data,
+        doc_type=doc_type,
+        config_loader=config_loader,
+        context=context
+    )
+    
+    if validation_errors:
+        validation_report["errors"].extend(validation_errors)
+    
+    if is_valid:
+        logger.info("Pipeline completed successfully")
+        return True, resolved_data, validation_report, raw_extraction
+    else:
+        logger.warning("Document validation failed")
+        return False, cdm_data, validation_report, raw_extraction
@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TPS = 15.0
+DEFAULT_STATE_FILE = os.path.join(tempfile.gettempdir(), "document_normalizer_docint_rate.json")
+
+class RateLimitTimeout(Exception):
+    """期限までに送信枠を確保できなかった場合の例外"""
+
+class TokenBucketRateLimiter:
+    """
+    トークンバケット方式のレート制限
+    
+    state_file を指定すると、同じホスト上のプロセス間でファイルロック（flock）により
+    バケットの状態を共有する。429 で通知された待ち時間（block_for）も共有される。
+    """
+    
+    def __init__(self, rate_per_second: float, burst: Optional[float] = None, state_file: Optional[str] = None):
+        """
+        Args:
+            rate_per_second: 1秒あたりの送信数
+            burst: バケットの容量（省略時は rate_per_second と同じ）
+            state_file: プロセス間で共有する状態ファイル（省略時はプロセス内のみ）
+        """
+        self.rate = rate_per_second
+        self.capacity = burst if burst else max(rate_per_second, 1.0)
+        self.state_file = state_file if state_file and fcntl is not None else None
+        
+        self._lock = threading.Lock()
+        self._state = {"tokens": self.capacity, "updated": time.time(), "blocked_until": 0.0}
+    
+    def acquire(self, deadline: Optional[float] = None) -> float:
+        """
+        送信枠を1つ確保（確保できるまで待つ）
+        
+        Args:
+            deadline: time.monotonic() 基準の待ち期限
+            
+        Returns:
+            待った秒数
+            
+        Raises:
+            RateLimitTimeout: 期限までに確保できなかった場合
+        """
+        waited = 0.0
+        
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return waited
+            
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RateLimitTimeout(f"Rate limit wait exceeded deadline after {waited:.2f}s")
+                wait = min(wait, remaining)
+            
+            time.sleep(wait)
+            waited += wait
+    
+    def try_acquire(self) -> float:
+        """
+        待たずに送信枠の確保を試みる
+        
+        Returns:
+            確保できた場合は0、できなかった場合は次に試すまでの秒数
+        """
+        with self._locked_state() as state:
+            now = time.time()
+            
+            if state["blocked_until"] > now:
+                return state["blocked_until"] - now
+            
+            elapsed = max(now - state["updated"], 0.0)
+            state["tokens"] = min(self.capacity, state["tokens"] + elapsed * self.rate)
+            state["updated"] = now
+            
+            if state["tokens"] >= 1.0:
+                state["tokens"] -= 1.0
+                return 0.0
+            
+            return (1.0 - state["tokens"]) / self.rate
+    
+    def block_for(self, seconds: float):
+        """サービスから待機を指示された（429など）場合に、全プロセスの送信をその間止める"""
+        with self._locked_state() as state:
+            state["blocked_until"] = max(state["blocked_until"], time.time() + seconds)
+            state["tokens"] = 0.0
+    
+    def _locked_state(self):
+        return _LockedState(self)
+
+class _LockedState:
+    """バケット状態の読み書きを排他制御するコンテキスト（状態ファイルがあればflockで共有）"""
+    
+    def __init__(self, limiter: TokenBucketRateLimiter):
+        self.limiter = limiter
+        self.file = None
+    
+    def __enter__(self) -> Dict:
+        self.limiter._lock.acquire()
+        
+        if self.limiter.state_file is None:
+            return self.limiter._state
+        
+        try:
+            self.file = open(self.limiter.state_file, "a+")
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+            self.file.seek(0)
+            content = self.file.read()
+            if content:
+                self.limiter._state.update(json.loads(content))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Rate limit state file unavailable, using process-local state: {str(e)}")
+            self._close()
+        
+        return self.limiter._state
+    
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self.file is not None:
+                self.file.seek(0)
+                self.file.truncate()
+                json.dump(self.limiter._state, self.file)
+                self.file.flush()
+        except OSError as e:
+            logger.warning(f"Failed to write rate limit state: {str(e)}")
+        finally:
+            self._close()
+            self.limiter._lock.release()
+    
+    def _close(self):
+        if self.file is not None:
+            try:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            finally:
+                self.file.close()
+                self.file = None
+
+_limiters: Dict[Optional[str], Tuple[tuple, TokenBucketRateLimiter]] = {}
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter(scope: Optional[str] = None) -> Optional[TokenBucketRateLimiter]:
+    """
+    Document Intelligence呼び出し用のレート制限を取得
+    
+    環境変数:
+        DOCUMENT_INTELLIGENCE_TPS: 1秒あたりの送信数（ホスト全体・リソースごと、0で無効。既定 15）
+        DOCUMENT_INTELLIGENCE_TPS_BURST: バケット容量（既定はTPSと同じ）
+        DOCUMENT_INTELLIGENCE_RATE_STATE_FILE: プロセス間で共有する状態ファイル（空ならプロセス内のみ）
+        
+    Args:
+        scope: 制限を分ける単位（複数リソースに振り分ける場合のリソース名。Noneなら共通）
+        
+    Returns:
+        レート制限（無効設定の場合はNone）
+    """
+    rate = float(os.environ.get("DOCUMENT_INTELLIGENCE_TPS", DEFAULT_TPS))
+    if rate <= 0:
+        return None
+    
+    burst = float(os.environ.get("DOCUMENT_INTELLIGENCE_TPS_BURST", 0)) or None
+    state_file = os.environ.get("DOCUMENT_INTELLIGENCE_RATE_STATE_FILE", DEFAULT_STATE_FILE) or None
+    if state_file and scope:
+        root, ext = os.path.splitext(state_file)
+        state_file = f"{root}.{re.sub(r'[^A-Za-z0-9_.-]', '_', scope)}{ext}"
+    key = (rate, burst, state_file)
+    
+    with _limiter_lock:
+        entry = _limiters.get(scope)
+        if entry is None or entry[0] != key:
+            limiter = TokenBucketRateLimiter(rate, burst, state_file)
+            _limiters[scope] = (key, limiter)
+            logger.info(
+                f"Rate limiter initialized ({rate} TPS, burst={limiter.capacity}, state_file={limiter.state_file}"
+                f"{f', scope={scope}' if scope else ''})"
+            )
+            return limiter
+        
+        return entry[1]
@@ -13,7 +13,8 @@ def save_artifacts(
     raw_data: Dict,
     cdm_data: Optional[Dict],
     validation_report: Dict,
-    container: str = "artifacts"
+    container: str = "artifacts",
+    context=None
 ) -> None:
     """
     処理結果をBlob Storageに保存
@@ -24,6 +25,7 @@ def save_artifacts(
         cdm_data: CDM形式データ
         validation_report: 検証レポート
         container: 保存先コンテナ名
+        context: 文書コンテキスト（指定時は分類で抽出したテキストも保存）
     """
     try:
         blob_service_client = get_blob_service_client()
@@ -56,6 +58,18 @@ def save_artifacts(
         )
         logger.info(f"Saved validation report for {blob_name}")
         
+        if context is not None and context.has_text:
+            save_json_to_blob(
+                blob_service_client,
+                container,
+                f"{base_name}/text_{timestamp}.json",
+                {
+                    "page_count": context.page_count,
+                    "pages": context.page_texts
+                }
+            )
+            logger.info(f"Saved extracted text for {blob_name}")
+        
         audit_log = {
             "blob_name": blob_name,
             "processed_at": datetime.utcnow().isoformat(),
@@ -63,6 +77,8 @@ def save_artifacts(
             "error_count": len(validation_report.get("errors", [])),
             "warning_count": len(validation_report.get("warnings", []))
         }
+        if context is not None:
+            audit_log.update(context.summary())
         save_json_to_blob(
             blob_service_client,
             container,
@@ -49,7 +49,7 @@ def apply_single_transform(value: Any, transform_name: str, param: Any = None) -
         "remove_spaces": lambda v, p: re.sub(r"\s+", "", str(v)),
         "zenkaku_to_hankaku": zenkaku_to_hankaku,
         "hankaku_to_zenkaku": hankaku_to_zenkaku,
-        "parse_japanese_date": parse_japanese_date,
+        "parse_japanese_date": lambda v, p: parse_japanese_date(v),
         "normalize_phone": normalize_phone,
         "normalize_postal_code": normalize_postal_code,
         "split": lambda v, p: str(v).split(p if p else ","),
@@ -9,7 +9,8 @@ logger = logging.getLogger(__name__)
 def validate_and_resolve(
     cdm_data: Dict[str, Any],
     doc_type: str,
-    config_loader
+    config_loader,
+    context=None
 ) -> Tuple[bool, Dict[str, Any], List[str]]:
     """
     CDMデータの検証とエンティティ解決
@@ -18,6 +19,7 @@ def validate_and_resolve(
         cdm_data: CDM形式のデータ
         doc_type: 文書種別
         config_loader: 設定ローダー
+        context: 文書コンテキスト（分類時の抽出テキスト）
         
     Returns:
         (検証成功フラグ, 解決済みデータ, エラーリスト)
@@ -36,7 +38,7 @@ def validate_and_resolve(
         business_errors = validate_business_rules(resolved_data, validation_rules)
         errors.extend(business_errors)
         
-        resolved_data = resolve_entities(resolved_data, config_loader)
+        resolved_data = resolve_entities(resolved_data, config_loader, context)
         
         duplicate_check = check_duplicates(resolved_data, config_loader)
         if duplicate_check:
@@ -195,7 +197,7 @@ def validate_field_constraints(data: Dict, constraints: Dict) -> List[str]:
     
     return errors
 
-def resolve_entities(data: Dict, config_loader) -> Dict[str, Any]:
+def resolve_entities(data: Dict, config_loader, context=None) -> Dict[str, Any]:
     """エンティティ解決（取引先マスタとの照合）"""
     resolved = data.copy()
     
@@ -206,6 +208,11 @@ def resolve_entities(data: Dict, config_loader) -> Dict[str, Any]:
     doc = resolved.get("doc", {})
     vendor_name = doc.get("vendor")
     
+    if not vendor_name and context is not None and context.has_text:
+        vendor_name = find_vendor_in_text(context.text_normalized, entity_dict.get("vendors", {}))
+        if vendor_name:
+            doc["vendor"] = vendor_name
+    
     if vendor_name and vendor_name in entity_dict.get("vendors", {}):
         vendor_info = entity_dict["vendors"][vendor_name]
         doc["vendor_id"] = vendor_info.get("id")
@@ -222,6 +229,14 @@ def resolve_entities(data: Dict, config_loader) -> Dict[str, Any]:
     
     return resolved
 
+def find_vendor_in_text(text: str, vendors: Dict) -> Optional[str]:
+    """取引先マスタに登録されたベンダー名を本文から探す"""
+    for vendor_name in vendors:
+        if vendor_name in text:
+            return vendor_name
+    
+    return None
+
 def find_customer_reference(data: Dict) -> Optional[str]:
     """顧客参照を探す"""
     doc = data.get("doc", {})
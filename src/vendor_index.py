@@ -0,0 +1,216 @@
+import logging
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+VENDOR_INDEX_CONFIG_FILES = [
+    "classifier/vendors.yaml",
+    "classifier/settings.yaml",
+    "entity/dictionary.yaml"
+]
+
+# 社名の前後に付く法人格の略記（NFKC正規化後の表記）
+ABBREVIATED_SUFFIXES = ["(株)", "(有)", "(同)", "(資)", "(名)"]
+
+# 照合キーから除く区切り文字
+KEY_SEPARATORS = re.compile(r"[\s・,.、。\-‐ー―_/()（）「」]")
+
+class VendorNameIndex:
+    """ベンダー名・別名の文字n-gram索引（本文から拾った社名候補を正規ベンダー名に解決）"""
+    
+    def __init__(
+        self,
+        legal_suffixes: Iterable[str] = (),
+        ngram_size: int = 2,
+        min_similarity: float = 0.75,
+        max_postings: int = 2000
+    ):
+        """
+        Args:
+            legal_suffixes: 照合前に取り除く法人格（株式会社など）
+            ngram_size: 索引に使う文字n-gramの長さ
+            min_similarity: 候補と別名のDice係数がこれ以上なら一致とみなす
+            max_postings: これより多くの別名に現れるn-gramは候補探索に使わない
+        """
+        self.ngram_size = ngram_size
+        self.min_similarity = min_similarity
+        self.max_postings = max_postings
+        self.legal_suffixes = sorted(
+            {unicodedata.normalize("NFKC", suffix).lower() for suffix in legal_suffixes} | set(ABBREVIATED_SUFFIXES),
+            key=len,
+            reverse=True
+        )
+        
+        self.vendor_names: List[str] = []
+        self._vendor_ids: Dict[str, int] = {}
+        self._exact: Dict[str, int] = {}
+        self._alias_vendor: List[int] = []
+        self._alias_gram_counts: List[int] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+    
+    def add(self, vendor_name: str, aliases: Iterable[str] = ()):
+        """
+        ベンダーと別名を登録（同じ照合キーは先に登録したベンダーを優先）
+        
+        Args:
+            vendor_name: 正規ベンダー名
+            aliases: 別名（社名表記ゆれ・英語名など）
+        """
+        vendor_id = self._vendor_ids.get(vendor_name)
+        if vendor_id is None:
+            vendor_id = len(self.vendor_names)
+            self._vendor_ids[vendor_name] = vendor_id
+            self.vendor_names.append(vendor_name)
+        
+        for alias in [vendor_name, *aliases]:
+            key = self.normalize_key(str(alias))
+            if not key or key in self._exact:
+                continue
+            
+            self._exact[key] = vendor_id
+            alias_id = len(self._alias_vendor)
+            grams = self.ngrams(key)
+            self._alias_vendor.append(vendor_id)
+            self._alias_gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(alias_id)
+    
+    def resolve(self, candidate: str) -> Optional[Tuple[str, float]]:
+        """
+        社名候補を正規ベンダー名に解決
+        
+        Args:
+            candidate: 本文から抽出した社名候補
+            
+        Returns:
+            (正規ベンダー名, 類似度)（一致するベンダーが無ければNone）
+        """
+        key = self.normalize_key(candidate)
+        if not key:
+            return None
+        
+        vendor_id = self._exact.get(key)
+        if vendor_id is not None:
+            return self.vendor_names[vendor_id], 1.0
+        
+        grams = self.ngrams(key)
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+        selective = [alias_ids for alias_ids in postings if len(alias_ids) <= self.max_postings]
+        if not selective:
+            return None
+        
+        overlaps: Dict[int, int] = defaultdict(int)
+        for alias_ids in selective:
+            for alias_id in alias_ids:
+                overlaps[alias_id] += 1
+        
+        # 頻出n-gramは候補探索には使わないが、類似度の計算には含める
+        frequent = [alias_ids for alias_ids in postings if len(alias_ids) > self.max_postings]
+        best_alias, best_score = None, 0.0
+        for alias_id, overlap in overlaps.items():
+            overlap += sum(1 for alias_ids in frequent if _contains(alias_ids, alias_id))
+            score = 2.0 * overlap / (len(grams) + self._alias_gram_counts[alias_id])
+            if score > best_score or (score == best_score and alias_id < best_alias):
+                best_alias, best_score = alias_id, score
+        
+        if best_alias is None or best_score < self.min_similarity:
+            return None
+        
+        return self.vendor_names[self._alias_vendor[best_alias]], best_score
+    
+    def normalize_key(self, name: str) -> str:
+        """照合キー（NFKC・小文字化し、法人格と区切り文字を除いたもの）"""
+        key = unicodedata.normalize("NFKC", name).lower().strip()
+        
+        for suffix in self.legal_suffixes:
+            if key.startswith(suffix):
+                key = key[len(suffix):]
+            elif key.endswith(suffix):
+                key = key[:-len(suffix)]
+        
+        return KEY_SEPARATORS.sub("", key)
+    
+    def ngrams(self, key: str) -> set:
+        """照合キーの文字n-gram（n文字未満のキーはキー全体）"""
+        if len(key) <= self.ngram_size:
+            return {key}
+        return {key[i:i + self.ngram_size] for i in range(len(key) - self.ngram_size + 1)}
+    
+    @property
+    def alias_count(self) -> int:
+        return len(self._alias_vendor)
+
+def _contains(sorted_ids: List[int], value: int) -> bool:
+    """昇順リストに値が含まれるか（二分探索）"""
+    lo, hi = 0, len(sorted_ids)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if sorted_ids[mid] < value:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo < len(sorted_ids) and sorted_ids[lo] == value
+
+def build_vendor_index(vendor_config: Dict, entity_dictionary: Dict, settings: Dict) -> VendorNameIndex:
+    """
+    ベンダー分類設定と取引先マスタからベンダー名索引を構築
+    
+    Args:
+        vendor_config: classifier/vendors.yaml
+        entity_dictionary: entity/dictionary.yaml
+        settings: classifier/settings.yaml の vendor_index 設定
+        
+    Returns:
+        ベンダー名索引
+    """
+    default_patterns = (vendor_config or {}).get("default_patterns") or {}
+    
+    index = VendorNameIndex(
+        legal_suffixes=default_patterns.get("company_suffixes") or [],
+        ngram_size=int(settings.get("ngram_size", 2)),
+        min_similarity=float(settings.get("min_similarity", 0.75)),
+        max_postings=int(settings.get("max_postings", 2000))
+    )
+    
+    for vendor_name, patterns in (vendor_config or {}).items():
+        if vendor_name in ("description", "default_patterns") or not isinstance(patterns, dict):
+            continue
+        index.add(vendor_name, patterns.get("company_names") or [])
+    
+    for vendor_name, vendor_info in ((entity_dictionary or {}).get("vendors") or {}).items():
+        vendor_info = vendor_info if isinstance(vendor_info, dict) else {}
+        aliases = list(vendor_info.get("aliases") or [])
+        if vendor_info.get("normalized_name"):
+            aliases.append(vendor_info["normalized_name"])
+        index.add(vendor_name, aliases)
+    
+    logger.info(f"Built vendor name index: {len(index.vendor_names)} vendors, {index.alias_count} names")
+    return index
+
+_index_cache: Dict[str, VendorNameIndex] = {}
+_index_lock = threading.Lock()
+
+def get_vendor_index(config_loader) -> VendorNameIndex:
+    """ベンダー名索引を取得（ベンダー設定・取引先マスタが変わるまで再利用）"""
+    fingerprint = config_loader.get_config_fingerprint(VENDOR_INDEX_CONFIG_FILES)
+    
+    index = _index_cache.get(fingerprint)
+    if index is not None:
+        return index
+    
+    with _index_lock:
+        index = _index_cache.get(fingerprint)
+        if index is None:
+            index = build_vendor_index(
+                config_loader.get_vendor_config(),
+                config_loader.get_entity_dictionary(),
+                config_loader.get_classifier_settings().get("vendor_index", {})
+            )
+            _index_cache.clear()
+            _index_cache[fingerprint] = index
+    
+    return index
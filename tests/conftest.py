@@ -0,0 +1,79 @@
+import os
+import pytest
+from scripts.docint_standin_server import LatencyDistribution, RecordingStore, StandinState, start_server
+from src import circuit_breaker, endpoint_pool, extraction_cache, rate_limiter
+
+def build_pdf(pages):
+    """ASCIIの行を並べた最小限のPDF（pages: ページごとの行のリスト）"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    
+    for lines in pages:
+        commands = [
+            f"BT /F1 12 Tf 72 {750 - index * 20} Td ({line}) Tj ET".encode("latin-1")
+            for index, line in enumerate(lines)
+        ]
+        stream = b"\n".join(commands)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(output)
+
+@pytest.fixture
+def make_pdf():
+    return build_pdf
+
+@pytest.fixture
+def docint_env(monkeypatch):
+    """Document Intelligence 関連の環境変数とプロセス共有の状態を初期化（ポーリング間隔は短くする）"""
+    for name in list(os.environ):
+        if name.startswith(("DOCUMENT_INTELLIGENCE_", "EXTRACTION_CACHE_", "OPERATION_")):
+            monkeypatch.delenv(name)
+    
+    monkeypatch.setenv("DOCUMENT_INTELLIGENCE_TPS", "0")
+    monkeypatch.setenv("DOCUMENT_INTELLIGENCE_POLL_INTERVAL", "0.02")
+    monkeypatch.setenv("DOCUMENT_INTELLIGENCE_POLL_MAX_INTERVAL", "0.05")
+    monkeypatch.setattr(circuit_breaker, "_breaker", None)
+    monkeypatch.setattr(endpoint_pool, "_pool", None)
+    monkeypatch.setattr(extraction_cache, "_cache", None)
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    return monkeypatch
+
+@pytest.fixture
+def standin(docint_env):
+    """プロセス内でスタンドインサーバーを起動し、DOCUMENT_INTELLIGENCE_ENDPOINT をそこに向ける関数"""
+    servers = []
+    
+    def start(latency="fixed:0.05", recordings=None, **options):
+        state = StandinState(RecordingStore(recordings), LatencyDistribution(latency), **options)
+        server = start_server(state)
+        servers.append(server)
+        url = f"http://127.0.0.1:{server.server_port}"
+        docint_env.setenv("DOCUMENT_INTELLIGENCE_ENDPOINT", url)
+        docint_env.setenv("DOCUMENT_INTELLIGENCE_API_KEY", "standin")
+        return state, url
+    
+    yield start
+    
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,64 @@
+import io
+import json
+import ijson
+from src.analyze_result_stream import PrunedResultBuilder, parse_operation_result
+
+PAYLOAD = {
+    "status": "succeeded",
+    "analyzeResult": {
+        "content": "請求書",
+        "pages": [{"pageNumber": 1, "words": [{"content": "請求書"}], "lines": [{"content": "請求書", "polygon": [1, 2]}]}],
+        "paragraphs": [{"content": "請求書"}],
+        "documents": [{"fields": {"InvoiceTotal": {"valueNumber": 1100.5, "spans": [{"offset": 0}]}}}],
+        "tables": []
+    }
+}
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.raw = io.BytesIO(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+def test_skips_unused_sections_and_keys():
+    result = parse_operation_result(FakeResponse(PAYLOAD))
+    analyze_result = result["analyzeResult"]
+    
+    assert result["status"] == "succeeded"
+    assert "paragraphs" not in analyze_result
+    assert analyze_result["pages"] == [{"pageNumber": 1, "lines": [{"content": "請求書"}]}]
+    assert analyze_result["documents"][0]["fields"]["InvoiceTotal"] == {"valueNumber": 1100.5}
+    assert analyze_result["tables"] == []
+
+def test_consume_accepts_events_in_chunks():
+    events = list(ijson.parse(io.BytesIO(json.dumps(PAYLOAD).encode("utf-8")), use_float=True))
+    builder = PrunedResultBuilder()
+    for start in range(0, len(events), 3):
+        builder.consume(events[start:start + 3])
+    
+    assert builder.result == parse_operation_result(FakeResponse(PAYLOAD))
+
+def test_custom_fields_named_like_skipped_keys_are_kept():
+    payload = {
+        "status": "succeeded",
+        "analyzeResult": {
+            "pages": [{"pageNumber": 1, "spans": [{"offset": 0}], "selectionMarks": [{"state": "selected"}]}],
+            "documents": [{
+                "spans": [{"offset": 0}],
+                "fields": {
+                    "words": {"valueString": "株式会社", "spans": [{"offset": 3}], "boundingRegions": [{"pageNumber": 1}]},
+                    "spans": {"valueNumber": 2},
+                    "Items": {"valueArray": [{"valueObject": {"polygon": {"valueString": "A"}}, "spans": [{"offset": 5}]}]}
+                }
+            }]
+        }
+    }
+    
+    analyze_result = parse_operation_result(FakeResponse(payload))["analyzeResult"]
+    
+    assert analyze_result["pages"] == [{"pageNumber": 1}]
+    assert analyze_result["documents"] == [{
+        "fields": {
+            "words": {"valueString": "株式会社"},
+            "spans": {"valueNumber": 2},
+            "Items": {"valueArray": [{"valueObject": {"polygon": {"valueString": "A"}}}]}
+        }
+    }]
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from src.extract_azure_docint import extract_with_document_intelligence
+from src.extract_azure_docint_async import AsyncDocumentIntelligenceClient, extract_with_document_intelligence_async
+from src.rate_limiter import TokenBucketRateLimiter
+
+def test_async_extraction_uses_the_extraction_cache(standin, docint_env, tmp_path):
+    docint_env.setenv("EXTRACTION_CACHE_BACKEND", "local")
+    docint_env.setenv("EXTRACTION_CACHE_DIR", str(tmp_path))
+    state, _ = standin(latency="fixed:0.02")
+    
+    metrics = [{}, {}]
+    for m in metrics:
+        assert asyncio.run(extract_with_document_intelligence_async(b"%PDF-1.4 cached", "INVOICE", metrics=m))
+    
+    assert [m["cache"] for m in metrics] == ["miss", "hit"]
+    assert state.counters["submits"] == 1
+    
+    sync_metrics = {}
+    assert extract_with_document_intelligence(b"%PDF-1.4 cached", "INVOICE", metrics=sync_metrics)
+    assert sync_metrics["cache"] == "hit"
+    
+    asyncio.run(extract_with_document_intelligence_async(
+        b"%PDF-1.4 cached", "INVOICE", metrics=metrics[0], force_refresh=True
+    ))
+    assert metrics[0]["cache"] == "refresh"
+    assert state.counters["submits"] == 2
+
+def test_rate_limiter_runs_off_the_event_loop(standin, docint_env, tmp_path, monkeypatch):
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_TPS", "100")
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_RATE_STATE_FILE", str(tmp_path / "rate.json"))
+    standin(latency="fixed:0.02")
+    
+    threads = set()
+    original = TokenBucketRateLimiter.try_acquire
+    
+    def recording_try_acquire(self):
+        threads.add(threading.current_thread())
+        return original(self)
+    
+    monkeypatch.setattr(TokenBucketRateLimiter, "try_acquire", recording_try_acquire)
+    
+    async def run():
+        async with AsyncDocumentIntelligenceClient(max_concurrency=4) as client:
+            return await asyncio.gather(*(
+                client.analyze_document(f"%PDF-1.4 {index}".encode(), "prebuilt-invoice") for index in range(4)
+            ))
+    
+    assert all(asyncio.run(run()))
+    assert threads
+    assert threading.main_thread() not in threads
+
+def test_client_can_be_reused_across_event_loops(standin):
+    standin(latency="fixed:0.02")
+    client = AsyncDocumentIntelligenceClient(max_concurrency=1)
+    
+    async def run(prefix):
+        async with client:
+            return await asyncio.gather(*(
+                client.analyze_document(f"%PDF-1.4 {prefix} {index}".encode(), "prebuilt-invoice") for index in range(2)
+            ))
+    
+    assert all(asyncio.run(run("first")))
+    assert all(asyncio.run(run("second")))
+    assert client.peak_in_flight == 1
@@ -0,0 +1,52 @@
+import importlib.util
+from pathlib import Path
+import pytest
+from src.operation_store import LocalOperationBackend, OperationStore
+
+ROOT = Path(__file__).parent.parent
+SAMPLE_PDF = ROOT / "sample_invoice.pdf"
+
+class FakeInputStream:
+    def __init__(self, name, data):
+        self.name = name
+        self._data = data
+    
+    def read(self):
+        return self._data
+
+def load_trigger(path):
+    spec = importlib.util.spec_from_file_location(f"trigger_{path.parent.parent.name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture(params=["main_blob_trigger/__init__.py", "src/main_blob_trigger/__init__.py"])
+def trigger(request, monkeypatch):
+    """ルート直下と src 配下の Blob トリガー（成果物の保存は記録するだけにする）"""
+    module = load_trigger(ROOT / request.param)
+    saved = []
+    monkeypatch.setattr(module, "save_artifacts", lambda **kwargs: saved.append(kwargs))
+    monkeypatch.setattr(module, "save_to_cosmos", lambda cdm_data: None)
+    module.saved = saved
+    return module
+
+def test_trigger_submits_to_the_operation_store(trigger, standin, tmp_path, monkeypatch):
+    standin(latency="fixed:0.5")
+    store = OperationStore(LocalOperationBackend(str(tmp_path)))
+    monkeypatch.setattr(trigger, "get_operation_store", lambda: store)
+    
+    trigger.main(FakeInputStream("inbox/sample.pdf", SAMPLE_PDF.read_bytes()))
+    
+    assert store.count() == 1
+    assert trigger.saved == []
+
+def test_trigger_runs_the_pipeline_without_a_store(trigger, standin, monkeypatch):
+    standin(latency="fixed:0.01")
+    monkeypatch.setattr(trigger, "get_operation_store", lambda: None)
+    
+    trigger.main(FakeInputStream("inbox/sample.pdf", SAMPLE_PDF.read_bytes()))
+    
+    assert len(trigger.saved) == 1
+    assert trigger.saved[0]["blob_name"] == "inbox/sample.pdf"
+    assert trigger.saved[0]["context"].blob_name == "inbox/sample.pdf"
+    assert "mock" not in trigger.saved[0]["raw_data"]
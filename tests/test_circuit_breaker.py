@@ -0,0 +1,137 @@
+import asyncio
+import socket
+import time
+from src.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from src.extract_azure_docint import analyze_document, classify_failed_response, is_service_failure
+from src.extract_azure_docint_async import AsyncDocumentIntelligenceClient
+
+def test_opens_on_failure_rate_and_recovers_through_probe():
+    breaker = CircuitBreaker("test", window_size=4, min_calls=4, failure_rate=0.5, open_seconds=0.05)
+    for success in (True, False, True, False):
+        assert breaker.allow_request()
+        breaker.record(success, 0.1)
+    
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+    
+    time.sleep(0.06)
+    probe = breaker.allow_request()
+    assert probe
+    assert not breaker.allow_request()
+    breaker.record(True, 0.1, probe)
+    
+    assert breaker.state == "closed"
+    assert [t["to"] for t in breaker.snapshot()["transitions"]] == ["open", "half_open", "closed"]
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("test", window_size=2, min_calls=2, open_seconds=0.05)
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+    time.sleep(0.06)
+    
+    probe = breaker.allow_request()
+    breaker.record(False, 0.1, probe)
+    assert breaker.state == "open"
+
+def test_calls_started_before_half_open_do_not_decide_the_probe():
+    breaker = CircuitBreaker("test", window_size=2, min_calls=2, open_seconds=0.05)
+    slow_call = breaker.allow_request()
+    breaker.record(False, 0.1, breaker.allow_request())
+    breaker.record(False, 0.1, breaker.allow_request())
+    time.sleep(0.06)
+    
+    probe = breaker.allow_request()
+    breaker.record(True, 0.1, slow_call)
+    breaker.record(False, 0.1)
+    assert breaker.state == "half_open"
+    
+    breaker.record(True, 0.1, probe)
+    assert breaker.state == "closed"
+
+def test_unrecorded_probe_expires():
+    breaker = CircuitBreaker("test", window_size=2, min_calls=2, open_seconds=0.05, probe_timeout_seconds=0.05)
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+    time.sleep(0.06)
+    
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+
+def test_slow_calls_open_the_breaker():
+    breaker = CircuitBreaker("test", window_size=3, min_calls=3, slow_call_seconds=1.0, slow_call_rate=0.6)
+    for elapsed in (2.0, 2.0, 0.1):
+        breaker.record(True, elapsed)
+    
+    assert breaker.state == "open"
+
+def test_failure_classes():
+    assert classify_failed_response(400) == "client_error"
+    assert classify_failed_response(401) == "client_error"
+    assert classify_failed_response(429) == "throttled"
+    assert classify_failed_response(503) == "throttled"
+    assert classify_failed_response(500) == "server_error"
+    
+    assert is_service_failure("timeout")
+    assert is_service_failure("transport_error")
+    assert not is_service_failure("client_error")
+    assert not is_service_failure("failed")
+
+def test_rejected_documents_do_not_open_the_breaker(standin, docint_env):
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_BREAKER_MIN_CALLS", "3")
+    state, _ = standin(strict=True)
+    
+    for _ in range(5):
+        metrics = {}
+        assert analyze_document(b"%PDF-1.4 bad", "prebuilt-invoice", metrics=metrics) is None
+        assert metrics["status"] == "client_error"
+    
+    assert get_circuit_breaker().state == "closed"
+    assert state.counters["missing"] == 5
+
+def test_failed_analyses_do_not_open_the_breaker(standin, docint_env):
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_BREAKER_MIN_CALLS", "3")
+    standin(failure_rate=1.0)
+    
+    for _ in range(4):
+        metrics = {}
+        assert analyze_document(b"%PDF-1.4", "prebuilt-invoice", metrics=metrics) is None
+        assert metrics["status"] == "failed"
+    
+    assert get_circuit_breaker().state == "closed"
+
+def test_connection_errors_open_the_breaker(docint_env):
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_BREAKER_MIN_CALLS", "3")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_ENDPOINT", f"http://127.0.0.1:{port}")
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_API_KEY", "standin")
+    
+    statuses = []
+    for _ in range(4):
+        metrics = {}
+        analyze_document(b"%PDF-1.4", "prebuilt-invoice", metrics=metrics)
+        statuses.append(metrics["status"])
+    
+    assert statuses == ["transport_error"] * 3 + ["circuit_open"]
+    assert get_circuit_breaker().state == "open"
+
+def test_async_client_classifies_failures_the_same_way(standin, docint_env):
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_BREAKER_MIN_CALLS", "3")
+    standin(strict=True)
+    
+    async def run():
+        async with AsyncDocumentIntelligenceClient(max_concurrency=5) as client:
+            metrics = [{} for _ in range(5)]
+            results = await asyncio.gather(*(
+                client.analyze_document(b"%PDF-1.4 bad", "prebuilt-invoice", metrics=m) for m in metrics
+            ))
+            return results, metrics
+    
+    results, metrics = asyncio.run(run())
+    
+    assert results == [None] * 5
+    assert {m["status"] for m in metrics} == {"client_error"}
+    assert get_circuit_breaker().state == "closed"
@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+from src import pipeline
+from src.classification_cache import ClassificationCache, get_classifier_fingerprint
+from src.config_loader import ConfigLoader
+from src.document_context import DocumentContext
+from src.pipeline import classify_with_cache, new_validation_report
+
+SAMPLE_PDF = Path(__file__).parent.parent / "sample_invoice.pdf"
+
+def classify(pdf_bytes):
+    context = DocumentContext("inbox/sample.pdf", pdf_bytes)
+    classification = classify_with_cache(pdf_bytes, ConfigLoader(), context, new_validation_report("inbox/sample.pdf"))
+    return classification, context
+
+def test_cache_hit_restores_the_same_context(monkeypatch):
+    cache = ClassificationCache()
+    monkeypatch.setattr(pipeline, "get_classification_cache", lambda settings: cache)
+    pdf_bytes = SAMPLE_PDF.read_bytes()
+    
+    missed, miss_context = classify(pdf_bytes)
+    hit, hit_context = classify(pdf_bytes)
+    
+    assert missed["cache"] == "miss"
+    assert hit["cache"] == "hit"
+    assert "page_texts" not in hit
+    assert miss_context.has_text
+    assert hit_context.page_texts == miss_context.page_texts
+    assert hit_context.page_count == miss_context.page_count
+    assert hit_context.text_source == miss_context.text_source
+    assert {k: v for k, v in hit.items() if k not in ("cache", "cache_stats")} == \
+        {k: v for k, v in missed.items() if k not in ("cache", "cache_stats")}
+
+def test_entry_without_page_texts_is_classified_again(monkeypatch):
+    cache = ClassificationCache()
+    monkeypatch.setattr(pipeline, "get_classification_cache", lambda settings: cache)
+    pdf_bytes = SAMPLE_PDF.read_bytes()
+    
+    missed, _ = classify(pdf_bytes)
+    cache.put(pdf_bytes, get_classifier_fingerprint(ConfigLoader()), {k: v for k, v in missed.items() if k not in ("cache", "cache_stats")})
+    
+    again, context = classify(pdf_bytes)
+    assert again["cache"] == "miss"
+    assert context.has_text
+
+def test_memory_tier_is_bounded_by_size():
+    page_text = "請求書 " * 2000
+    entry_size = len(json.dumps({"page_texts": [page_text]}, ensure_ascii=False).encode("utf-8"))
+    cache = ClassificationCache(max_entries=100, max_mb=entry_size * 2.5 / (1024 * 1024))
+    
+    for index in range(4):
+        cache.put(b"pdf %d" % index, "fp", {"page_texts": [page_text]})
+    
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] == entry_size * 2
+    assert cache.get(b"pdf 0", "fp") is None
+    assert cache.get(b"pdf 3", "fp") == {"page_texts": [page_text]}
+
+def test_oversized_entry_stays_on_disk_only(tmp_path):
+    cache = ClassificationCache(cache_dir=str(tmp_path), max_mb=0.001)
+    entry = {"page_texts": ["x" * 4096]}
+    
+    cache.put(b"large pdf", "fp", entry)
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["bytes"] == 0
+    
+    assert cache.get(b"large pdf", "fp") == entry
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["entries"] == 0
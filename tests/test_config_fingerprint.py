@@ -0,0 +1,33 @@
+from pathlib import Path
+from src.config_loader import ConfigLoader
+
+FILES = ["classifier/vendors.yaml", "classifier/settings.yaml"]
+
+def make_config(tmp_path):
+    (tmp_path / "classifier").mkdir()
+    (tmp_path / "classifier" / "vendors.yaml").write_text("株式会社テスト:\n  company_names: [テスト]\n", encoding="utf-8")
+    (tmp_path / "classifier" / "settings.yaml").write_text("text_mode: layout\n", encoding="utf-8")
+    return ConfigLoader(str(tmp_path))
+
+def test_fingerprint_does_not_reread_unchanged_files(tmp_path, monkeypatch):
+    config_loader = make_config(tmp_path)
+    first = config_loader.get_config_fingerprint(FILES)
+    
+    reads = []
+    original = Path.read_bytes
+    monkeypatch.setattr(Path, "read_bytes", lambda path: reads.append(path) or original(path))
+    
+    assert config_loader.get_config_fingerprint(FILES) == first
+    assert ConfigLoader(str(tmp_path)).get_config_fingerprint(FILES) == first
+    assert reads == []
+
+def test_fingerprint_changes_when_a_file_changes(tmp_path):
+    config_loader = make_config(tmp_path)
+    first = config_loader.get_config_fingerprint(FILES)
+    
+    (tmp_path / "classifier" / "vendors.yaml").write_text("株式会社テスト:\n  company_names: [テスト2]\n", encoding="utf-8")
+    second = config_loader.get_config_fingerprint(FILES)
+    assert second != first
+    
+    (tmp_path / "classifier" / "settings.yaml").unlink()
+    assert config_loader.get_config_fingerprint(FILES) != second
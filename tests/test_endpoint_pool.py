@@ -0,0 +1,80 @@
+import time
+from src.endpoint_pool import ROUTING_LEAST_OUTSTANDING, Endpoint, EndpointPool, get_endpoint_pool
+
+def make_pool(**options):
+    endpoints = [Endpoint("a", "https://a.example/", "key-a", weight=2), Endpoint("b", "https://b.example", "key-b")]
+    return EndpointPool(endpoints, **options)
+
+def test_weighted_routing_follows_weights():
+    pool = make_pool()
+    chosen = [pool.acquire().name for _ in range(6)]
+    
+    assert chosen.count("a") == 4
+    assert chosen.count("b") == 2
+    assert [endpoint["outstanding"] for endpoint in pool.snapshot()] == [4, 2]
+
+def test_least_outstanding_routing_balances_by_weight():
+    pool = make_pool(routing=ROUTING_LEAST_OUTSTANDING)
+    a = pool.acquire()
+    b = pool.acquire()
+    assert (a.name, b.name) == ("a", "b")
+    
+    pool.release(a, True, 0.5)
+    assert pool.acquire().name == "a"
+    assert pool.acquire().name == "a"
+    assert pool.snapshot()[0]["operation_p50_ms"] == 500.0
+
+def test_throttled_endpoint_is_ejected():
+    pool = make_pool(min_calls=2, eject_throttle_rate=0.5, eject_seconds=30)
+    a = pool.get("a")
+    pool.record_response(a, 429, 0.01)
+    pool.record_response(a, 200, 0.01)
+    
+    snapshot = {endpoint["name"]: endpoint for endpoint in pool.snapshot()}
+    assert snapshot["a"]["ejected"]
+    assert snapshot["a"]["ejections"] == 1
+    assert all(pool.acquire().name == "b" for _ in range(3))
+
+def test_all_ejected_routes_to_earliest_recovery():
+    pool = make_pool(min_calls=1, eject_error_rate=0.5)
+    pool.record_response(pool.get("b"), None, 0.01)
+    time.sleep(0.01)
+    pool.record_response(pool.get("a"), 503, 0.01)
+    
+    assert pool.acquire().name == "b"
+
+def test_unreleased_leases_expire():
+    pool = make_pool(max_operation_seconds=0.05)
+    pool.acquire()
+    assert pool.snapshot()[0]["outstanding"] == 1
+    
+    time.sleep(0.06)
+    assert pool.snapshot()[0]["outstanding"] == 0
+
+def test_find_by_operation_location():
+    pool = make_pool()
+    assert pool.find("https://b.example/documentintelligence/documentModels/x/analyzeResults/1").name == "b"
+    assert pool.find("https://c.example/") is None
+    assert pool.get("missing") is None
+
+def test_find_compares_scheme_and_host():
+    pool = make_pool()
+    assert pool.find("https://A.EXAMPLE:443/documentintelligence/documentModels/x/analyzeResults/1").name == "a"
+    assert pool.find("https://a.example.evil.test/analyzeResults/1") is None
+    assert pool.find("https://a.example@evil.test/analyzeResults/1") is None
+    assert pool.find("http://a.example/analyzeResults/1") is None
+    assert pool.find("https://a.example:8443/analyzeResults/1") is None
+    
+    gateway = EndpointPool([Endpoint("east", "https://gw.example/east", "key"), Endpoint("west", "https://gw.example/west", "key")])
+    assert gateway.find("https://gw.example/west/formrecognizer/documentModels/x/analyzeResults/1").name == "west"
+    assert gateway.find("https://gw.example/eastern/analyzeResults/1") is None
+
+def test_invalid_weight_falls_back_to_one(docint_env, caplog):
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_ENDPOINTS", "https://a.example,https://b.example,https://c.example")
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_API_KEYS", "key")
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_ENDPOINT_WEIGHTS", "heavy,-2,3")
+    
+    pool = get_endpoint_pool()
+    
+    assert [endpoint.weight for endpoint in pool.endpoints] == [1.0, 1.0, 3.0]
+    assert "'heavy'" in caplog.text and "'-2'" in caplog.text
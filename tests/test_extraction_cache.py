@@ -0,0 +1,49 @@
+import os
+import time
+from src.extraction_cache import ExtractionCache, LocalDirectoryBackend, make_cache_key
+
+def test_put_and_get_round_trip(tmp_path):
+    cache = ExtractionCache(LocalDirectoryBackend(str(tmp_path)))
+    cache.put("key", {"content": "請求書"}, {"model_id": "prebuilt-invoice"})
+    
+    assert cache.get("key") == {"content": "請求書"}
+    assert cache.get("other") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "expired": 0, "stores": 1, "evicted": 0}
+
+def test_expired_entry_is_removed(tmp_path):
+    cache = ExtractionCache(LocalDirectoryBackend(str(tmp_path)), ttl_hours=1)
+    cache.put("key", {"content": "old"})
+    
+    entry_file = tmp_path / "key.json"
+    entry_file.write_text(entry_file.read_text(encoding="utf-8").replace('"created_at": ', '"created_at": -'), encoding="utf-8")
+    
+    assert cache.get("key") is None
+    assert cache.stats()["expired"] == 1
+    assert not entry_file.exists()
+
+def test_corrupted_entry_is_a_miss(tmp_path):
+    cache = ExtractionCache(LocalDirectoryBackend(str(tmp_path)))
+    (tmp_path / "key.json").write_text("{not json", encoding="utf-8")
+    
+    assert cache.get("key") is None
+    assert not (tmp_path / "key.json").exists()
+
+def test_evict_removes_oldest_over_limit(tmp_path):
+    cache = ExtractionCache(LocalDirectoryBackend(str(tmp_path)), max_entries=2, evict_every=100)
+    now = time.time()
+    for index, key in enumerate(("first", "second", "third")):
+        cache.put(key, {"content": key})
+        os.utime(tmp_path / f"{key}.json", (now - 10 + index, now - 10 + index))
+    
+    assert cache.evict() == 1
+    assert cache.get("first") is None
+    assert cache.get("third") == {"content": "third"}
+
+def test_cache_key_covers_request_options():
+    base = make_cache_key(b"%PDF", "prebuilt-invoice", "2024-11-30", "ja-JP")
+    
+    assert base == make_cache_key(b"%PDF", "prebuilt-invoice", "2024-11-30", "ja-JP")
+    assert base != make_cache_key(b"%PDF-2", "prebuilt-invoice", "2024-11-30", "ja-JP")
+    assert base != make_cache_key(b"%PDF", "prebuilt-layout", "2024-11-30", "ja-JP")
+    assert base != make_cache_key(b"%PDF", "prebuilt-invoice", "2024-11-30", "ja-JP", pages="1-2")
+    assert base != make_cache_key(b"%PDF", "prebuilt-invoice", "2024-11-30", "ja-JP", features="keyValuePairs")
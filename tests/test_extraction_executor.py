@@ -0,0 +1,98 @@
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from src.extraction_executor import STATUS_ERROR, STATUS_OVERSIZE, STATUS_TIMEOUT, ExtractionExecutor
+
+@pytest.fixture
+def executor():
+    executors = []
+    
+    def create(**options):
+        executors.append(ExtractionExecutor(max_workers=1, **options))
+        return executors[-1]
+    
+    yield create
+    
+    for created in executors:
+        created.shutdown()
+
+def test_extracts_pages_and_lines_in_worker(executor, make_pdf):
+    pdf_bytes = make_pdf([["INVOICE No. 1"], ["Page two"]])
+    pool = executor()
+    
+    result = pool.extract(pdf_bytes, page_numbers=[1])
+    assert result.ok
+    assert result.page_count == 2
+    assert [text.strip() for text in result.page_texts] == ["Page two"]
+    
+    lines = pool.extract_lines(pdf_bytes)
+    assert lines.ok
+    assert len(lines.page_lines) == 2
+
+def test_worker_is_reused_until_recycled(executor, make_pdf):
+    pdf_bytes = make_pdf([["INVOICE"]])
+    pool = executor(max_tasks_per_worker=2)
+    
+    assert pool.extract(pdf_bytes).ok
+    assert len(pool._idle) == 1
+    assert pool.extract(pdf_bytes).ok
+    assert pool._idle == []
+
+def test_oversize_pdf_is_not_sent_to_worker(executor):
+    pool = executor(max_pdf_mb=1)
+    result = pool.extract(b"%PDF" + b"0" * (2 * 1024 * 1024))
+    
+    assert result.status == STATUS_OVERSIZE
+    assert pool._idle == []
+
+def test_timeout_kills_worker(executor, make_pdf):
+    result = executor(timeout_seconds=0.01).extract(make_pdf([["INVOICE"]]))
+    
+    assert result.status == STATUS_TIMEOUT
+    assert "0.01s" in result.detail
+
+def test_broken_pdf_is_reported_as_error(executor):
+    pool = executor()
+    result = pool.extract(b"not a pdf")
+    
+    assert result.status == STATUS_ERROR
+    assert len(pool._idle) == 1
+
+SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+from src.extraction_executor import ExtractionExecutor
+
+print("imported", flush=True)
+
+def run():
+    pool = ExtractionExecutor(max_workers=1)
+    try:
+        print(pool.extract(open({pdf!r}, "rb").read()).status, flush=True)
+    except RuntimeError as e:
+        print(e, flush=True)
+    pool.shutdown()
+
+"""
+
+def run_script(tmp_path, make_pdf, entry):
+    pdf_path = tmp_path / "doc.pdf"
+    pdf_path.write_bytes(make_pdf([["INVOICE"]]))
+    script = tmp_path / "script.py"
+    root = str(Path(__file__).parent.parent)
+    script.write_text(SCRIPT.format(root=root, pdf=str(pdf_path)) + entry, encoding="utf-8")
+    return subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=60).stdout
+
+def test_unguarded_script_does_not_start_workers(tmp_path, make_pdf):
+    output = run_script(tmp_path, make_pdf, "run()\n")
+    
+    assert output.count("imported") == 1
+    assert "if __name__ == \"__main__\":" in output
+
+def test_guarded_script_runs_workers_once(tmp_path, make_pdf):
+    output = run_script(tmp_path, make_pdf, "if __name__ == \"__main__\":\n    run()\n")
+    
+    # ワーカーは起動スクリプトを読み込み直すが、ガードの中の処理は親プロセスでだけ動く
+    assert output.count("imported") == 2
+    assert output.count("ok") == 1
@@ -0,0 +1,48 @@
+import socket
+from pathlib import Path
+from src.pipeline import run_pipeline
+
+SAMPLE_PDF = Path(__file__).parent.parent / "sample_invoice.pdf"
+
+def extraction_info(validation_report):
+    return next(entry for entry in validation_report["info"] if isinstance(entry, dict) and entry.get("step") == "extraction")
+
+def unreachable_endpoint(docint_env):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_ENDPOINT", f"http://127.0.0.1:{port}")
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_API_KEY", "standin")
+
+def test_missing_credentials_fail_the_document(docint_env):
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_FALLBACK", "local")
+    success, _, validation_report, _ = run_pipeline("inbox/sample.pdf", SAMPLE_PDF.read_bytes())
+    
+    assert not success
+    assert "Failed to extract data from document" in validation_report["errors"]
+    assert extraction_info(validation_report)["source"] != "local"
+
+def test_client_errors_fail_the_document(standin, docint_env):
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_FALLBACK", "local")
+    standin(strict=True)
+    success, _, validation_report, _ = run_pipeline("inbox/sample.pdf", SAMPLE_PDF.read_bytes())
+    
+    assert not success
+    assert extraction_info(validation_report)["status"] == "client_error"
+    assert extraction_info(validation_report)["source"] != "local"
+
+def test_service_failure_falls_back_when_enabled(docint_env):
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_FALLBACK", "local")
+    unreachable_endpoint(docint_env)
+    _, _, validation_report, raw_extraction = run_pipeline("inbox/sample.pdf", SAMPLE_PDF.read_bytes())
+    
+    assert extraction_info(validation_report)["status"] == "transport_error"
+    assert extraction_info(validation_report)["source"] == "local"
+    assert raw_extraction["source"] == "local"
+
+def test_service_failure_does_not_fall_back_by_default(docint_env):
+    unreachable_endpoint(docint_env)
+    success, _, validation_report, _ = run_pipeline("inbox/sample.pdf", SAMPLE_PDF.read_bytes())
+    
+    assert not success
+    assert extraction_info(validation_report)["source"] != "local"
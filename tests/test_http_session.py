@@ -0,0 +1,54 @@
+import socket
+import time
+import pytest
+import requests
+from src.extract_azure_docint import analyze_document, send_request
+from src.http_session import close_session, get_session, get_session_metrics, summarize_requests
+
+def test_request_counts_are_per_document(standin):
+    standin(latency="fixed:0.05")
+    close_session()
+    
+    first, second = {}, {}
+    assert analyze_document(b"%PDF-1.4 first", "prebuilt-invoice", metrics=first) is not None
+    assert analyze_document(b"%PDF-1.4 second", "prebuilt-invoice", metrics=second) is not None
+    
+    assert first["http"]["requests"] == 1 + first["poll_count"]
+    assert second["http"]["requests"] == 1 + second["poll_count"]
+    assert first["http"]["connections_opened"] >= 1
+    assert second["http"]["connections_opened"] == 0
+    assert get_session_metrics()["requests"] >= first["http"]["requests"] + second["http"]["requests"]
+
+def test_summarize_requests():
+    assert summarize_requests({"requests": 4, "connections_opened": 1}) == {
+        "requests": 4,
+        "connections_opened": 1,
+        "connections_reused": 3,
+        "reuse_ratio": 0.75
+    }
+    assert summarize_requests(None)["reuse_ratio"] == 0.0
+
+def test_failed_requests_are_counted(docint_env):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    before = get_session_metrics()["requests"]
+    metrics = {}
+    
+    with pytest.raises(requests.ConnectionError):
+        send_request("GET", f"http://127.0.0.1:{port}/", time.monotonic() + 5, metrics, timeout=1)
+    
+    assert metrics["http"]["requests"] == 1
+    assert get_session_metrics()["requests"] == before + 1
+
+def test_idle_session_is_replaced_without_closing_it(docint_env):
+    docint_env.setenv("DOCUMENT_INTELLIGENCE_IDLE_TIMEOUT", "0.01")
+    close_session()
+    
+    closed = []
+    shared = get_session()
+    shared.close = lambda: closed.append(shared)
+    time.sleep(0.05)
+    
+    assert get_session() is not shared
+    assert closed == []
@@ -0,0 +1,60 @@
+from pathlib import Path
+import pytest
+from src.classify import load_page_lines
+from src.config_loader import ConfigLoader
+from src.extract_local import extract_with_vendor_rules
+from src.extraction_executor import ExtractionError
+from src.pipeline import run_pipeline
+
+ROOT = Path(__file__).parent.parent
+EXAMPLE_PDF = ROOT / "sample_invoice_example.pdf"
+VENDOR = "株式会社エグザンプル"
+
+def vendor_rules():
+    return ConfigLoader().get_local_extraction_rules("INVOICE", VENDOR)
+
+def test_template_matches_example_invoice():
+    raw = extract_with_vendor_rules(
+        EXAMPLE_PDF.read_bytes(), "INVOICE", vendor_rules(), ConfigLoader().get_classifier_settings()
+    )
+    
+    assert raw["source"] == "local_rules"
+    assert raw["fields"] == {"請求No.": "EX-2024-0042", "ご請求金額": "88,000"}
+    assert raw["key_value_pairs"]["お客様コード"] == "C-1001"
+    
+    table = raw["tables"][0]
+    assert table["header"] == ["商品・サービス名", "個数", "単価（税抜）", "金額（税込）"]
+    assert table["row_count"] == 3
+    assert table["cells"][4:8] == ["保守サポート", "1", "50,000", "55,000"]
+
+def test_template_misses_other_layouts():
+    raw = extract_with_vendor_rules(
+        (ROOT / "sample_invoice.pdf").read_bytes(), "INVOICE", vendor_rules(), ConfigLoader().get_classifier_settings()
+    )
+    assert raw is None
+
+def test_pipeline_uses_template_without_document_intelligence(docint_env):
+    success, cdm_data, validation_report, raw_extraction = run_pipeline("inbox/example.pdf", EXAMPLE_PDF.read_bytes())
+    
+    assert success, validation_report["errors"]
+    assert validation_report["errors"] == []
+    assert raw_extraction["source"] == "local_rules"
+    assert cdm_data["doc"]["vendor"] == VENDOR
+    assert cdm_data["doc"]["document_no"] == "EX-2024-0042"
+    assert cdm_data["doc"]["due_date"] == "2024-03-31"
+    assert [line["description"] for line in cdm_data["lines"]] == ["保守サポート", "クラウド利用料"]
+    assert [(line["amount"], line["amount_incl_tax"]) for line in cdm_data["lines"]] == [(50000.0, 55000.0), (30000.0, 33000.0)]
+    assert sum(line["amount"] for line in cdm_data["lines"]) == cdm_data["totals"]["subtotal"]
+
+def test_page_lines_respect_isolated_size_limit():
+    settings = {"isolated_extraction": {"enabled": True, "workers": 1, "max_pdf_mb": 1}}
+    oversized = EXAMPLE_PDF.read_bytes() + b"\n%" + b"0" * (1024 * 1024)
+    
+    with pytest.raises(ExtractionError) as error:
+        load_page_lines(oversized, settings)
+    assert error.value.result.status == "oversize"
+    assert extract_with_vendor_rules(oversized, "INVOICE", vendor_rules(), settings) is None
+    
+    page_lines, page_count = load_page_lines(EXAMPLE_PDF.read_bytes(), settings)
+    assert page_count == 1
+    assert any(line[3] == "請求No. EX-2024-0042" for line in page_lines[0])
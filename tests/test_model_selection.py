@@ -0,0 +1,64 @@
+import shutil
+from pathlib import Path
+from src.config_loader import ConfigLoader
+from src.extract_azure_docint import API_VERSION, build_analyze_request, extract_with_document_intelligence, resolve_model
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+
+def test_model_defaults_follow_the_document_type():
+    assert resolve_model("INVOICE") == ("prebuilt-invoice", API_VERSION, None)
+    assert resolve_model("PURCHASE_ORDER", {}) == ("prebuilt-document", API_VERSION, None)
+    assert resolve_model("UNKNOWN") == ("prebuilt-document", API_VERSION, None)
+
+def test_extraction_config_takes_precedence():
+    config = {"model_id": "custom-invoice", "api_version": "2024-11-30", "features": ["keyValuePairs", "ocrHighResolution"]}
+    assert resolve_model("INVOICE", config) == ("custom-invoice", "2024-11-30", "keyValuePairs,ocrHighResolution")
+    
+    assert resolve_model("INVOICE", {"model_id": "", "api_version": None})[:2] == ("prebuilt-invoice", API_VERSION)
+    assert resolve_model("INVOICE", {"features": " keyValuePairs, ,keyValuePairs,barcodes "})[2] == "keyValuePairs,barcodes"
+
+def test_vendor_template_overrides_the_document_type(tmp_path):
+    config_dir = tmp_path / "config"
+    shutil.copytree(CONFIG_DIR, config_dir)
+    vendor_dir = config_dir / "mapping" / "vendors" / "テスト工業株式会社"
+    vendor_dir.mkdir(parents=True)
+    (vendor_dir / "INVOICE.yaml").write_text(
+        'extraction:\n  model_id: "test-ind-invoice"\n  api_version: "2024-11-30"\n  features: [keyValuePairs]\n',
+        encoding="utf-8"
+    )
+    config_loader = ConfigLoader(str(config_dir))
+    
+    assert resolve_model("INVOICE", config_loader.get_extraction_config("INVOICE")) == ("prebuilt-invoice", "2023-07-31", None)
+    assert resolve_model("INVOICE", config_loader.get_extraction_config("INVOICE", "テスト工業株式会社")) == (
+        "test-ind-invoice", "2024-11-30", "keyValuePairs"
+    )
+
+def test_analyze_path_follows_the_api_version():
+    url, params, _ = build_analyze_request("https://docint.example", "key", "prebuilt-invoice")
+    assert url == "https://docint.example/formrecognizer/documentModels/prebuilt-invoice:analyze"
+    assert params == {"api-version": API_VERSION, "locale": "ja-JP"}
+    
+    url, params, headers = build_analyze_request(
+        "https://docint.example", "key", "prebuilt-layout", "1-2", "2024-11-30", "keyValuePairs"
+    )
+    assert url == "https://docint.example/documentintelligence/documentModels/prebuilt-layout:analyze"
+    assert params == {"api-version": "2024-11-30", "locale": "ja-JP", "pages": "1-2", "features": "keyValuePairs"}
+    assert headers["Ocp-Apim-Subscription-Key"] == "key"
+    
+    assert "/documentintelligence/" in build_analyze_request("https://docint.example", "key", "m", api_version="2024-02-29-preview")[0]
+    assert "/formrecognizer/" in build_analyze_request("https://docint.example", "key", "m", api_version="2023-10-31-preview")[0]
+
+def test_configured_model_is_sent_to_the_service(standin):
+    state, _ = standin(latency="fixed:0.01")
+    metrics = {}
+    
+    result = extract_with_document_intelligence(
+        b"%PDF-1.4 model selection",
+        "INVOICE",
+        metrics=metrics,
+        extraction_config={"model_id": "prebuilt-layout", "api_version": "2024-11-30"}
+    )
+    
+    assert result is not None
+    assert (metrics["model_id"], metrics["api_version"]) == ("prebuilt-layout", "2024-11-30")
+    assert state.counters["submits"] == 1
@@ -0,0 +1,30 @@
+import numpy as np
+from src.ngram_classifier import NgramClassifier, hash_features, train_ngram_classifier
+
+TEXTS = ["請求書 ご請求金額", "御請求書 請求日", "見積書 御見積金額", "お見積書 有効期限"]
+LABELS = ["INVOICE", "INVOICE", "QUOTE", "QUOTE"]
+
+def test_features_do_not_cross_document_boundaries():
+    joined = hash_features(["ab", "cd"], 1 << 12, (1, 2))
+    separate = [hash_features([text], 1 << 12, (1, 2)) for text in ("ab", "cd")]
+    
+    assert sorted(joined[1][joined[0] == 0]) == sorted(separate[0][1])
+    assert sorted(joined[1][joined[0] == 1]) == sorted(separate[1][1])
+    
+    for doc_id in (0, 1):
+        values = joined[2][joined[0] == doc_id]
+        assert np.isclose(np.sqrt((values ** 2).sum()), 1.0)
+
+def test_trained_model_classifies_and_round_trips(tmp_path):
+    model = train_ngram_classifier(TEXTS, LABELS, num_features=1 << 12, epochs=100)
+    
+    results = model.classify_texts(["請求書", "見積書"])
+    assert [label for label, _ in results] == ["INVOICE", "QUOTE"]
+    assert all(confidence > 0.5 for _, confidence in results)
+    
+    path = tmp_path / "model.npz"
+    model.save(path)
+    loaded = NgramClassifier.load(path)
+    assert loaded.labels == model.labels
+    assert np.allclose(loaded.predict_proba(TEXTS), model.predict_proba(TEXTS))
+    assert loaded.classify_texts([]) == []
@@ -0,0 +1,143 @@
+import time
+from src.circuit_breaker import get_circuit_breaker
+from src.endpoint_pool import get_endpoint_pool
+from src.extract_azure_docint import submit_document
+from src.operation_poller import advance_operation, poll_operations
+from src.operation_store import LocalOperationBackend, OperationStore
+
+def make_record(store, operation, **fields):
+    """submit_pipeline が保存するものと同じ形の記録を作る"""
+    now = time.time()
+    return store.create({
+        "blob_name": "inbox/test.pdf",
+        "operation": operation,
+        "pages": None,
+        "classification": {"doc_type": "INVOICE", "vendor": None},
+        "validation_report": {"blob_name": "inbox/test.pdf", "errors": [], "warnings": [], "info": []},
+        "extraction_metrics": {"poll_count": 0},
+        "page_texts": ["INVOICE"],
+        "page_count": 1,
+        "text_source": "pdf_text",
+        "text_mode": "full",
+        "submitted_at": now,
+        "expires_at": now + 5,
+        "poll_interval": 0.02,
+        "next_poll_at": now,
+        **fields
+    })
+
+def submit(store):
+    submission = submit_document(b"%PDF-1.4 test", "INVOICE")
+    assert submission["status"] == "submitted"
+    return make_record(store, submission["operation"])
+
+def poll_until_done(store, on_complete, timeout=5.0):
+    deadline = time.time() + timeout
+    while store.count() and time.time() < deadline:
+        poll_operations(store, on_complete)
+        time.sleep(0.02)
+
+def test_list_due_reads_only_due_records(tmp_path, monkeypatch):
+    store = OperationStore(LocalOperationBackend(str(tmp_path)))
+    now = time.time()
+    later = store.create({"next_poll_at": now + 60})
+    second = store.create({"next_poll_at": now - 1})
+    first = store.create({"next_poll_at": now - 2})
+    
+    loaded = []
+    original_load = store.load
+    monkeypatch.setattr(store, "load", lambda operation_id: loaded.append(operation_id) or original_load(operation_id))
+    
+    assert [record["id"] for record in store.list_due()] == [first, second]
+    assert later not in loaded
+    assert [record["id"] for record in store.list_due(limit=1)] == [first]
+
+def test_claimed_record_is_not_due_until_released(tmp_path):
+    store = OperationStore(LocalOperationBackend(str(tmp_path)), lease_seconds=60)
+    store.create({"next_poll_at": 0})
+    
+    claimed = store.claim(store.list_due()[0])
+    assert claimed is not None
+    assert store.list_due() == []
+    assert OperationStore(store.backend).claim(claimed) is None
+    
+    store.release(claimed)
+    assert len(store.list_due()) == 1
+
+def test_submitted_operation_holds_endpoint_until_poller_finishes(standin, tmp_path):
+    standin(latency="fixed:0.1")
+    store = OperationStore(LocalOperationBackend(str(tmp_path)))
+    submit(store)
+    
+    pool = get_endpoint_pool()
+    assert pool.snapshot()[0]["outstanding"] == 1
+    assert get_circuit_breaker().snapshot()["calls"] == 0
+    
+    completed = []
+    poll_until_done(store, lambda blob_name, *_: completed.append(blob_name))
+    
+    endpoint = pool.snapshot()[0]
+    assert completed == ["inbox/test.pdf"]
+    assert endpoint["outstanding"] == 0
+    assert endpoint["operations"] == 1
+    assert endpoint["operation_p50_ms"] >= 100
+    assert get_circuit_breaker().snapshot()["calls"] == 1
+
+def test_half_open_probe_stays_open_until_operation_finishes(standin, tmp_path):
+    standin(latency="fixed:0.1")
+    store = OperationStore(LocalOperationBackend(str(tmp_path)))
+    breaker = get_circuit_breaker()
+    breaker._open("test")
+    breaker._opened_at = 0
+    
+    submit(store)
+    assert breaker.state == "half_open"
+    assert submit_document(b"%PDF-1.4 other", "INVOICE")["status"] == "failed"
+    
+    poll_until_done(store, lambda *_: None)
+    assert breaker.state == "closed"
+
+def test_failing_on_complete_does_not_abort_the_batch(standin, tmp_path):
+    standin(latency="fixed:0.01")
+    store = OperationStore(LocalOperationBackend(str(tmp_path)))
+    failing = submit(store)
+    submit(store)
+    time.sleep(0.05)
+    
+    def on_complete(blob_name, success, cdm_data, validation_report, raw_extraction, context):
+        if store.load(failing).get("lease_owner") == store.owner:
+            raise IOError("storage unavailable")
+        completed.append(validation_report)
+    
+    completed = []
+    counts = poll_operations(store, on_complete)
+    
+    assert len(completed) == 1
+    assert counts["errors"] == 1
+    assert store.load(failing)["finished_status"] == "succeeded"
+    assert store.load(failing)["next_poll_at"] > time.time()
+    assert get_circuit_breaker().snapshot()["calls"] == 2
+
+def test_expired_operation_falls_back_without_waiting(standin, tmp_path):
+    standin(latency="fixed:5")
+    store = OperationStore(LocalOperationBackend(str(tmp_path)))
+    record = store.load(submit(store))
+    record["expires_at"] = time.time()
+    
+    success, cdm_data, validation_report, _ = advance_operation(record)
+    
+    assert record["extraction_metrics"]["status"] == "timeout"
+    assert record["finished_status"] == "timeout"
+    assert get_endpoint_pool().snapshot()[0]["outstanding"] == 0
+
+def test_on_complete_receives_the_resumed_context(standin, tmp_path):
+    standin(latency="fixed:0.01")
+    store = OperationStore(LocalOperationBackend(str(tmp_path)))
+    submit(store)
+    
+    contexts = []
+    poll_until_done(store, lambda *args: contexts.append(args[-1]))
+    
+    assert len(contexts) == 1
+    assert contexts[0].blob_name == "inbox/test.pdf"
+    assert contexts[0].page_texts == ["INVOICE"]
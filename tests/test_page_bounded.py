@@ -0,0 +1,67 @@
+from src import classify
+from src.classify import classify_document
+from src.config_loader import ConfigLoader
+from src.document_context import DocumentContext
+
+FILLER = ["Line item details"]
+
+def page_bounded_loader(**page_bounded):
+    config_loader = ConfigLoader()
+    base = config_loader.get_classifier_settings()
+    settings = {
+        **base,
+        "isolated_extraction": {"enabled": False},
+        "streaming": {"enabled": False},
+        "page_bounded": {**base["page_bounded"], "enabled": True, **page_bounded}
+    }
+    config_loader.get_classifier_settings = lambda: settings
+    return config_loader
+
+def record_page_loads(monkeypatch):
+    loads = []
+    load_page_texts = classify.load_page_texts
+    
+    def recording(pdf_bytes, settings, context, page_numbers=None, stream_options=None):
+        loads.append(page_numbers)
+        return load_page_texts(pdf_bytes, settings, context, page_numbers, stream_options)
+    
+    monkeypatch.setattr(classify, "load_page_texts", recording)
+    return loads
+
+def test_confident_first_pages_stop_the_read(make_pdf, monkeypatch):
+    loads = record_page_loads(monkeypatch)
+    pages = [["INVOICE", "Example Corp", "Payment due"]] + [FILLER] * 7
+    context = DocumentContext("inbox/long.pdf", make_pdf(pages))
+    
+    doc_type, vendor, confidence = classify_document(context.pdf_bytes, page_bounded_loader(), context)
+    
+    assert (doc_type, vendor) == ("INVOICE", "株式会社エグザンプル")
+    assert confidence >= 0.8
+    assert loads == [range(0, 2)]
+    assert (context.pages_read, context.page_count) == (2, 8)
+
+def test_low_confidence_escalates_by_the_factor(make_pdf, monkeypatch):
+    loads = record_page_loads(monkeypatch)
+    pages = [["INVOICE", "Payment due"], FILLER, ["Example Corp"]] + [FILLER] * 5
+    context = DocumentContext("inbox/long.pdf", make_pdf(pages))
+    
+    doc_type, vendor, _ = classify_document(context.pdf_bytes, page_bounded_loader(), context)
+    
+    assert (doc_type, vendor) == ("INVOICE", "株式会社エグザンプル")
+    assert loads == [range(0, 2), range(2, 4)]
+    assert (context.pages_read, context.page_count) == (4, 8)
+    assert not context.is_complete
+
+def test_escalation_stops_at_the_last_page(make_pdf, monkeypatch):
+    loads = record_page_loads(monkeypatch)
+    pages = [["INVOICE", "Payment due"]] + [FILLER] * 4
+    context = DocumentContext("inbox/long.pdf", make_pdf(pages))
+    
+    doc_type, vendor, confidence = classify_document(
+        context.pdf_bytes, page_bounded_loader(initial_pages=1, escalation_factor=3), context
+    )
+    
+    assert (doc_type, vendor) == ("INVOICE", None)
+    assert confidence < 0.8
+    assert loads == [range(0, 1), range(1, 3), range(3, 5)]
+    assert context.is_complete
@@ -0,0 +1,48 @@
+from src.config_loader import ConfigLoader
+from src.document_context import DocumentContext
+from src.extract_azure_docint import select_pages
+from src.pipeline import select_extraction_pages
+
+AUTO = {"pages": "auto", "auto": {"trailing_pages": 1, "min_pages": 1, "max_pages": 0}}
+
+def test_fixed_ranges():
+    assert select_pages({"pages": "all"}, 10) is None
+    assert select_pages({"pages": 3}, 10) == "1-3"
+    assert select_pages({"pages": "1-2, 5"}, 10) == "1-2,5"
+    assert select_pages({"pages": "1-20"}, 10) is None
+    assert select_pages({"pages": "2-20"}, 10) == "2-10"
+    assert select_pages({"pages": "first"}, 10) is None
+
+def test_auto_range_from_keyword_pages():
+    assert select_pages(AUTO, 10, [1, 4]) == "1-5"
+    assert select_pages({**AUTO, "auto": {"trailing_pages": 1, "max_pages": 3}}, 10, [1, 4]) == "1-3"
+    assert select_pages(AUTO, 10, []) is None
+    assert select_pages(AUTO, 10, None) is None
+
+def test_auto_reads_pages_beyond_page_bounded_classification(make_pdf):
+    pages = [["INVOICE"], ["details"]] + [["details"]] * 4 + [["payment total"]] + [["terms"]] * 5
+    pdf_bytes = make_pdf(pages)
+    context = DocumentContext("long.pdf", pdf_bytes)
+    context.set_page_texts(["INVOICE\n\f", "details\n\f"], len(pages))
+    classification = {"doc_type": "INVOICE", "pages_read": 2, "page_count": len(pages), "keyword_pages": None}
+    
+    selected = select_extraction_pages(pdf_bytes, AUTO, classification, ConfigLoader(), context)
+    
+    assert selected == "1-8"
+    assert classification["keyword_pages"] == [1, 7]
+    assert context.is_complete
+
+def test_auto_ignores_keyword_pages_from_partial_classification(make_pdf):
+    pdf_bytes = make_pdf([["INVOICE"], ["details"], ["payment"], ["terms"], ["terms"]])
+    context = DocumentContext("cached.pdf", pdf_bytes)
+    context.page_count = 5
+    classification = {"doc_type": "INVOICE", "pages_read": 1, "page_count": 5, "keyword_pages": [1]}
+    
+    assert select_extraction_pages(pdf_bytes, AUTO, classification, ConfigLoader(), context) == "1-4"
+
+def test_auto_analyzes_all_pages_when_text_is_unavailable():
+    context = DocumentContext("missing.pdf", b"")
+    context.set_page_texts(["INVOICE\n\f"], 12)
+    classification = {"doc_type": "INVOICE", "pages_read": 1, "page_count": 12, "keyword_pages": None}
+    
+    assert select_extraction_pages(b"", AUTO, classification, ConfigLoader(), context) is None
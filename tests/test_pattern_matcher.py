@@ -0,0 +1,25 @@
+from src.pattern_matcher import AhoCorasickMatcher
+
+def build(patterns):
+    matcher = AhoCorasickMatcher()
+    for pattern, payload in patterns:
+        matcher.add(pattern, payload)
+    matcher.build()
+    return matcher
+
+def test_finds_overlapping_patterns_in_one_scan():
+    matcher = build([("請求書", "INVOICE"), ("請求", "CLAIM"), ("求書", "SUFFIX"), ("見積書", "QUOTE")])
+    
+    assert matcher.find_all("御請求書") == {"INVOICE", "CLAIM", "SUFFIX"}
+    assert matcher.find_all("納品書") == set()
+
+def test_reports_end_positions():
+    matcher = build([("he", 1), ("she", 2), ("hers", 3)])
+    
+    assert sorted(matcher.iter_matches("ushers")) == [(3, 1), (3, 2), (5, 3)]
+
+def test_same_pattern_keeps_every_payload():
+    matcher = build([("株式会社", "a"), ("株式会社", "b")])
+    
+    assert matcher.find_all("ABC株式会社") == {"a", "b"}
+    assert matcher.pattern_count == 2
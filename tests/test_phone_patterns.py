@@ -0,0 +1,48 @@
+from src.classify import ClassifierPatterns
+
+VENDORS = {
+    "東京商店": {"phone_patterns": ["03-1234-5678"]},
+    "東京支店": {"phone_patterns": ["03-1234-9999", "0312340000"]},
+    "名古屋工業": {"phone_patterns": [r"052-\d{3}-2222"]},
+    "名古屋物産": {"phone_patterns": [r"052-\d{3}-3333"]},
+    "default_patterns": {"company_suffixes": ["株式会社"]}
+}
+
+def vendor_names(patterns, text):
+    return {patterns.vendor_names[index] for index in patterns.scan_phones(text)}
+
+def test_literal_phones_match_with_any_separator():
+    patterns = ClassifierPatterns(VENDORS)
+    
+    for text in ("TEL 03-1234-5678", "TEL 03 1234 5678", "TEL:0312345678", "TEL 03-1234 5678"):
+        assert vendor_names(patterns, text) == {"東京商店"}
+
+def test_vendors_sharing_a_prefix_are_told_apart():
+    patterns = ClassifierPatterns(VENDORS)
+    
+    assert vendor_names(patterns, "TEL 03-1234-9999") == {"東京支店"}
+    assert vendor_names(patterns, "TEL 03-1234-0000") == {"東京支店"}
+    assert vendor_names(patterns, "TEL 03-1234-1111") == set()
+    assert vendor_names(patterns, "TEL 03-1234-5678 FAX 03-1234-9999") == {"東京商店", "東京支店"}
+
+def test_regex_phones_share_one_alternation():
+    patterns = ClassifierPatterns(VENDORS)
+    
+    assert len(patterns.phone_group_vendors) == 2
+    assert patterns.phone_regex.pattern.count("(?P<") == 2
+    assert vendor_names(patterns, "TEL 052-111-2222") == {"名古屋工業"}
+    assert vendor_names(patterns, "TEL 052 987 3333") == {"名古屋物産"}
+    assert vendor_names(patterns, "TEL 0529873333 / 052-111-2222") == {"名古屋工業", "名古屋物産"}
+    assert vendor_names(patterns, "TEL 052-111-4444") == set()
+
+def test_first_configured_vendor_wins():
+    patterns = ClassifierPatterns(VENDORS)
+    
+    assert patterns.resolve_vendor(set(), "FAX 03-1234-9999 TEL 03-1234-5678") == "東京商店"
+    assert patterns.resolve_vendor(set(), "no phone number") is None
+
+def test_invalid_regex_phone_is_skipped():
+    patterns = ClassifierPatterns({"壊れた設定": {"phone_patterns": [r"052-(\d{3}"]}, **VENDORS})
+    
+    assert "壊れた設定" in patterns.vendor_names
+    assert vendor_names(patterns, "TEL 052-111-2222") == {"名古屋工業"}
@@ -0,0 +1,147 @@
+import json
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+import pytest
+from src import extract_azure_docint
+from src.extract_azure_docint import parse_retry_after, poll_for_result, retry_delay, submit_analysis
+
+OPERATION_URL = "http://docint.invalid/operations/1"
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, retry_after=None):
+        self.status_code = status_code
+        self.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+        self.text = json.dumps(body or {})
+        self.raw = BytesIO(self.text.encode("utf-8"))
+    
+    def json(self):
+        return json.loads(self.text)
+    
+    def close(self):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+    
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs))
+        return self.responses.pop(0)
+
+class FakeClock:
+    """sleep で進むだけの時計"""
+    
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+    
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def fake_service(docint_env):
+    """固定のレスポンスを順に返すセッションと、sleep を記録する時計"""
+    clock = FakeClock()
+    docint_env.setattr(extract_azure_docint, "time", clock)
+    
+    def install(*responses):
+        session = FakeSession(responses)
+        docint_env.setattr(extract_azure_docint, "get_session", lambda: session)
+        return session, clock.sleeps
+    
+    return install
+
+def running(retry_after=None):
+    return FakeResponse(200, {"status": "running"}, retry_after)
+
+def succeeded():
+    return FakeResponse(200, {"status": "succeeded", "analyzeResult": {"content": "INVOICE"}})
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("") is None
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("0.5") == 0.5
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after("soon") is None
+    
+    retry_at = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= parse_retry_after(retry_at) <= 30
+    assert parse_retry_after("Thu, 01 Jan 2015 00:00:00 GMT") == 0.0
+
+def test_retry_delay_backs_off_with_jitter():
+    assert retry_delay("7", 1) == 7.0
+    
+    for attempt in (1, 2, 3):
+        full = extract_azure_docint.RETRY_BASE_DELAY * 2 ** attempt
+        delays = {retry_delay(None, attempt) for _ in range(20)}
+        assert all(full / 2 <= delay <= full for delay in delays)
+        assert len(delays) > 1
+
+def test_poll_follows_retry_after_and_backs_off(fake_service):
+    session, sleeps = fake_service(running("3"), running(), running(), succeeded())
+    metrics = {}
+    
+    result, status = poll_for_result(OPERATION_URL, "key", deadline=60, first_delay=1.5, metrics=metrics)
+    
+    assert status == "succeeded"
+    assert result["analyzeResult"] == {"content": "INVOICE"}
+    assert metrics["poll_count"] == 4
+    assert sleeps[:2] == [1.5, 3.0]
+    # 初期間隔 0.02 秒を 1.6 倍ずつ広げ、上限 0.05 秒で止める（ジッターで半分〜全体）
+    assert 0.02 * 1.6 ** 2 / 2 <= sleeps[2] <= 0.02 * 1.6 ** 2
+    assert 0.05 / 2 <= sleeps[3] <= 0.05
+    assert all(kwargs["stream"] and kwargs["timeout"] == 10 for _, _, kwargs in session.requests)
+
+def test_poll_retries_throttled_polls(fake_service):
+    session, sleeps = fake_service(FakeResponse(429, retry_after="2"), succeeded())
+    metrics = {}
+    
+    _, status = poll_for_result(OPERATION_URL, "key", deadline=60, first_delay=0.0, metrics=metrics)
+    
+    assert status == "succeeded"
+    assert sleeps == [0.0, 2.0]
+    assert metrics["throttled_responses"] == 1
+    assert metrics["poll_count"] == 1
+    assert len(session.requests) == 2
+
+def test_poll_stops_on_client_error(fake_service):
+    _, sleeps = fake_service(running(), FakeResponse(404), succeeded())
+    metrics = {}
+    
+    result, status = poll_for_result(OPERATION_URL, "key", deadline=60, metrics=metrics)
+    
+    assert (result, status) == (None, "client_error")
+    assert metrics["poll_count"] == 2
+    assert len(sleeps) == 2
+
+def test_poll_times_out_at_the_deadline(fake_service):
+    _, sleeps = fake_service(running("5"), running())
+    
+    result, status = poll_for_result(OPERATION_URL, "key", deadline=1, first_delay=0.0)
+    
+    assert (result, status) == (None, "timeout")
+    assert sleeps == [0.0, 1.0]
+
+def test_submit_returns_retry_after_as_first_delay(fake_service):
+    accepted = FakeResponse(202, retry_after="4")
+    accepted.headers["Operation-Location"] = OPERATION_URL
+    session, _ = fake_service(accepted)
+    
+    operation_location, first_delay = submit_analysis(b"%PDF-1.4", "prebuilt-invoice", "http://docint.invalid", "key", 60)
+    
+    assert (operation_location, first_delay) == (OPERATION_URL, 4.0)
+    assert session.requests[0][0] == "POST"
+    assert session.requests[0][2]["timeout"] == extract_azure_docint.SUBMIT_TIMEOUT_SECONDS
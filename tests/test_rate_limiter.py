@@ -0,0 +1,32 @@
+import time
+import pytest
+from src.rate_limiter import RateLimitTimeout, TokenBucketRateLimiter
+
+def test_burst_then_refill():
+    limiter = TokenBucketRateLimiter(20.0, burst=2)
+    assert limiter.try_acquire() == 0.0
+    assert limiter.try_acquire() == 0.0
+    
+    wait = limiter.try_acquire()
+    assert 0.0 < wait <= 0.05
+    
+    assert limiter.acquire() > 0.0
+
+def test_block_for_pauses_sending():
+    limiter = TokenBucketRateLimiter(100.0)
+    limiter.block_for(0.2)
+    
+    assert limiter.try_acquire() > 0.1
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(deadline=time.monotonic() + 0.05)
+
+def test_state_file_is_shared(tmp_path):
+    state_file = str(tmp_path / "rate.json")
+    first = TokenBucketRateLimiter(1.0, burst=1, state_file=state_file)
+    second = TokenBucketRateLimiter(1.0, burst=1, state_file=state_file)
+    
+    assert first.try_acquire() == 0.0
+    assert second.try_acquire() > 0.0
+    
+    second.block_for(5)
+    assert first.try_acquire() > 4.0
@@ -0,0 +1,66 @@
+from src.classify import classify_document, stream_page_texts
+from src.config_loader import ConfigLoader
+from src.document_context import DocumentContext
+from src.pdf_text import TEXT_MODE_FAST
+
+DECIDED = ["INVOICE", "Example Corp", "Payment due"]
+FILLER = ["Line item details"]
+
+def stream_options(**options):
+    return {"config_dir": str(ConfigLoader().config_dir), "decision_margin": 2, "max_pages": 0,
+            "text_mode": TEXT_MODE_FAST, **options}
+
+def streaming_loader(isolated=False):
+    config_loader = ConfigLoader()
+    base = config_loader.get_classifier_settings()
+    settings = {
+        **base,
+        "isolated_extraction": {**base["isolated_extraction"], "enabled": isolated},
+        "streaming": {**base["streaming"], "enabled": True}
+    }
+    config_loader.get_classifier_settings = lambda: settings
+    return config_loader
+
+def test_stream_stops_once_type_and_vendor_are_decided(make_pdf):
+    pdf_bytes = make_pdf([FILLER, DECIDED] + [FILLER] * 4)
+    
+    page_texts, page_count = stream_page_texts(pdf_bytes, stream_options())
+    
+    assert len(page_texts) == 2
+    assert page_count == 6
+    assert "Example Corp" in page_texts[1]
+
+def test_stream_reads_on_until_the_vendor_is_found(make_pdf):
+    pdf_bytes = make_pdf([["INVOICE", "Payment due"], FILLER, FILLER, ["Example Corp"], FILLER])
+    
+    page_texts, page_count = stream_page_texts(pdf_bytes, stream_options())
+    
+    assert (len(page_texts), page_count) == (4, 5)
+
+def test_stream_needs_the_decision_margin(make_pdf):
+    pdf_bytes = make_pdf([DECIDED, FILLER, FILLER, ["Bill to"], FILLER])
+    
+    assert len(stream_page_texts(pdf_bytes, stream_options())[0]) == 1
+    assert len(stream_page_texts(pdf_bytes, stream_options(decision_margin=3))[0]) == 4
+    assert len(stream_page_texts(pdf_bytes, stream_options(decision_margin=3, max_pages=2))[0]) == 2
+    
+    competing = make_pdf([DECIDED + ["Delivery date"], ["Bill to"], FILLER])
+    assert len(stream_page_texts(competing, stream_options())[0]) == 2
+
+def test_streaming_classification_leaves_later_pages_unread(make_pdf):
+    context = DocumentContext("inbox/long.pdf", make_pdf([DECIDED] + [FILLER] * 5))
+    
+    doc_type, vendor, _ = classify_document(context.pdf_bytes, streaming_loader(), context)
+    
+    assert (doc_type, vendor) == ("INVOICE", "株式会社エグザンプル")
+    assert (context.pages_read, context.page_count) == (1, 6)
+    assert not context.is_complete
+
+def test_streaming_runs_in_the_isolated_worker(make_pdf):
+    context = DocumentContext("inbox/long.pdf", make_pdf([FILLER, DECIDED] + [FILLER] * 4))
+    
+    doc_type, vendor, _ = classify_document(context.pdf_bytes, streaming_loader(isolated=True), context)
+    
+    assert (doc_type, vendor) == ("INVOICE", "株式会社エグザンプル")
+    assert (context.pages_read, context.page_count) == (2, 6)
+    assert context.text_layer["has_text_layer"] is True
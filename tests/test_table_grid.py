@@ -0,0 +1,75 @@
+from src.extract_azure_docint import build_table_grid
+from src.map_to_cdm import extract_line_items
+
+MAPPING = {"lines": {"table": {"headers": {"description": ["品名"], "amount": ["金額"]}}}}
+
+def cell(row, column, content, kind="content", row_span=1, column_span=1):
+    return {
+        "rowIndex": row,
+        "columnIndex": column,
+        "content": content,
+        "kind": kind,
+        "rowSpan": row_span,
+        "columnSpan": column_span
+    }
+
+def row_of(grid, row):
+    start = row * grid["column_count"]
+    return grid["cells"][start:start + grid["column_count"]]
+
+def test_cells_out_of_order_are_placed_by_index():
+    grid = build_table_grid({"rowCount": 2, "columnCount": 2, "cells": [
+        cell(1, 1, "100"), cell(0, 1, "金額", "columnHeader"), cell(1, 0, "A"), cell(0, 0, "品名", "columnHeader")
+    ]})
+    
+    assert grid["cells"] == ["品名", "金額", "A", "100"]
+    assert grid["header"] == ["品名", "金額"]
+    assert grid["header_row_count"] == 1
+
+def test_spans_fill_rows_and_only_header_columns():
+    grid = build_table_grid({"cells": [
+        cell(0, 0, "明細", "columnHeader", column_span=2),
+        cell(1, 0, "A", row_span=2),
+        cell(1, 1, "100", column_span=2)
+    ]})
+    
+    assert (grid["row_count"], grid["column_count"]) == (3, 3)
+    assert row_of(grid, 0) == ["明細", "明細", ""]
+    assert row_of(grid, 1) == ["A", "100", ""]
+    assert row_of(grid, 2) == ["A", "", ""]
+
+def test_repeated_header_rows_are_marked_and_skipped():
+    table = {"cells": [
+        cell(0, 0, "品名", "columnHeader"), cell(0, 1, "金額", "columnHeader"),
+        cell(1, 0, "A"), cell(1, 1, "100"),
+        cell(2, 0, "品名", "columnHeader"), cell(2, 1, "金額", "columnHeader"),
+        cell(3, 0, "B"), cell(3, 1, "200")
+    ]}
+    grid = build_table_grid(table)
+    
+    assert grid["header_row_count"] == 1
+    assert grid["repeated_header_rows"] == [2]
+    
+    items = extract_line_items({"tables": [grid]}, MAPPING)
+    assert [(item["description"], item["amount"]) for item in items] == [("A", 100.0), ("B", 200.0)]
+
+def test_multi_row_header_uses_lowest_label():
+    grid = build_table_grid({"cells": [
+        cell(0, 0, "明細", "columnHeader", column_span=2),
+        cell(1, 0, "品名", "columnHeader"), cell(1, 1, "金額", "columnHeader"),
+        cell(2, 0, "A"), cell(2, 1, "1,000")
+    ]})
+    
+    assert grid["header_row_count"] == 2
+    assert grid["header"] == ["品名", "金額"]
+    assert extract_line_items({"tables": [grid]}, MAPPING)[0]["amount"] == 1000.0
+
+def test_table_without_header_cells_uses_first_row():
+    grid = build_table_grid({"cells": [cell(0, 0, "品名"), cell(0, 1, "金額"), cell(1, 0, "A"), cell(1, 1, "5")]})
+    
+    assert grid["header_row_count"] == 1
+    assert grid["repeated_header_rows"] == []
+    assert len(extract_line_items({"tables": [grid]}, MAPPING)) == 1
+
+def test_empty_table_returns_none():
+    assert build_table_grid({"cells": []}) is None
@@ -0,0 +1,53 @@
+from src import classify
+from src.classify import classify_document
+from src.config_loader import ConfigLoader
+from src.document_context import DocumentContext
+from src.pdf_text import inspect_text_layer, sample_page_indexes
+
+def parent_must_not_parse(*args, **kwargs):
+    raise AssertionError("inspect_text_layer ran in the parent process")
+
+def isolated_loader(enabled):
+    config_loader = ConfigLoader()
+    settings = {**config_loader.get_classifier_settings(), "isolated_extraction": {"enabled": enabled}}
+    config_loader.get_classifier_settings = lambda: settings
+    return config_loader
+
+def test_image_only_pdf_is_detected_in_the_worker(make_pdf, monkeypatch):
+    monkeypatch.setattr(classify, "inspect_text_layer", parent_must_not_parse)
+    context = DocumentContext("inbox/scan.pdf", make_pdf([[]]))
+    
+    assert classify_document(context.pdf_bytes, isolated_loader(True), context) == (None, None, 0.0)
+    assert context.text_layer["has_text_layer"] is False
+    assert context.needs_ocr
+    assert not context.has_text
+
+def test_text_pdf_is_inspected_and_extracted_in_one_job(make_pdf, monkeypatch):
+    monkeypatch.setattr(classify, "inspect_text_layer", parent_must_not_parse)
+    context = DocumentContext("inbox/text.pdf", make_pdf([["INVOICE", "Invoice No: 1", "Payment due"]]))
+    
+    doc_type, _, _ = classify_document(context.pdf_bytes, isolated_loader(True), context)
+    
+    assert doc_type == "INVOICE"
+    assert context.text_layer["has_text_layer"] is True
+    assert "Invoice No: 1" in context.text
+
+def test_check_runs_in_process_when_isolation_is_disabled(make_pdf):
+    context = DocumentContext("inbox/scan.pdf", make_pdf([[]]))
+    
+    assert classify_document(context.pdf_bytes, isolated_loader(False), context) == (None, None, 0.0)
+    assert context.needs_ocr
+
+def test_pages_are_sampled_across_the_document(make_pdf):
+    assert sample_page_indexes(3, 3) is None
+    assert sample_page_indexes(10, 0) is None
+    assert sample_page_indexes(10, 3) == [0, 4, 9]
+    assert sample_page_indexes(10, 1) == [0]
+    
+    scanned_cover = make_pdf([[]] * 9 + [["Line item details"]])
+    result = inspect_text_layer(scanned_cover, max_pages=3)
+    assert result["has_text_layer"] is True
+    assert result["pages_checked"] == 3
+    
+    result = inspect_text_layer(make_pdf([[]] * 3), max_pages=3)
+    assert (result["has_text_layer"], result["pages_checked"]) == (False, 3)
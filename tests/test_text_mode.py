@@ -0,0 +1,76 @@
+from src import classify
+from src.classify import classify_document
+from src.config_loader import ConfigLoader
+from src.document_context import DocumentContext
+from src.pdf_text import TEXT_MODE_FAST, TEXT_MODE_LAYOUT, extract_page_texts, iter_page_texts
+
+PAGES = [["INVOICE", "Example Corp", "Payment due"], ["Line item details"]]
+
+def text_mode_loader(**overrides):
+    config_loader = ConfigLoader()
+    base = config_loader.get_classifier_settings()
+    settings = {
+        **base,
+        "isolated_extraction": {"enabled": False},
+        "page_bounded": {**base["page_bounded"], "enabled": False},
+        "streaming": {"enabled": False},
+        "text_mode": TEXT_MODE_FAST,
+        **overrides
+    }
+    config_loader.get_classifier_settings = lambda: settings
+    return config_loader
+
+def record_text_modes(monkeypatch):
+    modes = []
+    load_page_texts = classify.load_page_texts
+    
+    def recording(pdf_bytes, settings, context, page_numbers=None, stream_options=None):
+        modes.append(context.text_mode)
+        return load_page_texts(pdf_bytes, settings, context, page_numbers, stream_options)
+    
+    monkeypatch.setattr(classify, "load_page_texts", recording)
+    return modes
+
+def test_fast_text_keeps_lines_and_page_breaks(make_pdf):
+    pdf_bytes = make_pdf(PAGES)
+    
+    fast_texts, page_count = extract_page_texts(pdf_bytes, text_mode=TEXT_MODE_FAST)
+    layout_texts, _ = extract_page_texts(pdf_bytes, text_mode=TEXT_MODE_LAYOUT)
+    
+    assert page_count == 2
+    assert fast_texts[0] == "INVOICE\nExample Corp\nPayment due\n\f"
+    assert [text.split() for text in fast_texts] == [text.split() for text in layout_texts]
+    assert [text for text, _ in iter_page_texts(pdf_bytes, text_mode=TEXT_MODE_FAST)] == fast_texts
+    assert extract_page_texts(pdf_bytes, page_numbers=[1], text_mode=TEXT_MODE_FAST) == (fast_texts[1:], 2)
+
+def test_decided_document_keeps_the_fast_text(make_pdf, monkeypatch):
+    modes = record_text_modes(monkeypatch)
+    context = DocumentContext("inbox/invoice.pdf", make_pdf(PAGES))
+    
+    doc_type, vendor, _ = classify_document(context.pdf_bytes, text_mode_loader(), context)
+    
+    assert (doc_type, vendor) == ("INVOICE", "株式会社エグザンプル")
+    assert modes == [TEXT_MODE_FAST]
+    assert context.text_mode == TEXT_MODE_FAST
+
+def test_undecided_type_is_re_extracted_with_layout(make_pdf, monkeypatch):
+    modes = record_text_modes(monkeypatch)
+    context = DocumentContext("inbox/unknown.pdf", make_pdf([["Example Corp"], ["Line item details"]]))
+    
+    doc_type, vendor, _ = classify_document(context.pdf_bytes, text_mode_loader(), context)
+    
+    assert (doc_type, vendor) == (None, "株式会社エグザンプル")
+    assert modes == [TEXT_MODE_FAST, TEXT_MODE_LAYOUT]
+    assert context.text_mode == TEXT_MODE_LAYOUT
+    assert (context.pages_read, context.page_count) == (2, 2)
+
+def test_layout_vendor_is_re_extracted_with_layout(make_pdf, monkeypatch):
+    modes = record_text_modes(monkeypatch)
+    context = DocumentContext("inbox/invoice.pdf", make_pdf(PAGES))
+    config_loader = text_mode_loader(layout_vendors=["株式会社エグザンプル"])
+    
+    doc_type, vendor, _ = classify_document(context.pdf_bytes, config_loader, context)
+    
+    assert (doc_type, vendor) == ("INVOICE", "株式会社エグザンプル")
+    assert modes == [TEXT_MODE_FAST, TEXT_MODE_LAYOUT]
+    assert context.text_mode == TEXT_MODE_LAYOUT
@@ -0,0 +1,9 @@
+from src.transforms import apply_single_transform, apply_transforms
+
+def test_parse_japanese_date_accepts_the_transform_parameter():
+    assert apply_single_transform("令和6年3月1日", "parse_japanese_date") == "2024-03-01"
+    assert apply_single_transform("2024/3/31", "parse_japanese_date", "ignored") == "2024-03-31"
+
+def test_parse_japanese_date_in_a_transform_chain():
+    assert apply_transforms(" 平成31年4月30日 ", ["trim", "parse_japanese_date"]) == "2019-04-30"
+    assert apply_transforms("日付なし", ["parse_japanese_date"]) is None
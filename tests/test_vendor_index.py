@@ -0,0 +1,39 @@
+from src.vendor_index import VendorNameIndex, build_vendor_index
+
+def test_exact_match_ignores_legal_suffix_and_width():
+    index = VendorNameIndex(legal_suffixes=["株式会社"])
+    index.add("ABC商事", ["ABC Trading"])
+    
+    assert index.resolve("株式会社ＡＢＣ商事") == ("ABC商事", 1.0)
+    assert index.resolve("(株)ABC商事") == ("ABC商事", 1.0)
+    assert index.resolve("abc trading") == ("ABC商事", 1.0)
+
+def test_similar_candidate_resolves_by_ngram_overlap():
+    index = VendorNameIndex(legal_suffixes=["株式会社"], min_similarity=0.6)
+    index.add("山田電機工業", [])
+    index.add("田中物産", [])
+    
+    vendor, score = index.resolve("山田電機工業所")
+    assert vendor == "山田電機工業"
+    assert 0.6 <= score < 1.0
+    assert index.resolve("全く別の会社") is None
+
+def test_first_registered_vendor_wins_shared_alias():
+    index = VendorNameIndex()
+    index.add("VENDOR_A", ["共通商事"])
+    index.add("VENDOR_B", ["共通商事"])
+    
+    assert index.resolve("共通商事")[0] == "VENDOR_A"
+
+def test_build_from_vendor_config_and_dictionary():
+    vendor_config = {
+        "description": "vendors",
+        "default_patterns": {"company_suffixes": ["株式会社"]},
+        "ACME": {"company_names": ["アクメ株式会社"]}
+    }
+    entity_dictionary = {"vendors": {"BETA": {"aliases": ["ベータ工業"], "normalized_name": "ベータ"}}}
+    index = build_vendor_index(vendor_config, entity_dictionary, {"min_similarity": 0.8})
+    
+    assert index.vendor_names == ["ACME", "BETA"]
+    assert index.resolve("アクメ") == ("ACME", 1.0)
+    assert index.resolve("ベータ工業株式会社") == ("BETA", 1.0)